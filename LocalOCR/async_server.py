@@ -0,0 +1,636 @@
+"""
+异步 HTTP 服务模块 - asyncio 事件循环上的 WSGI 服务器
+
+替代 Werkzeug 开发服务器（每个连接一个线程，线程数没有上限）：
+
+- 连接的接收、HTTP/1.1 解析、请求体读取与 keep-alive 都在事件循环中完成，空闲连接不占线程
+- Flask 应用在固定大小的线程池中执行（OCR 推理期间释放 GIL），事件循环不会被阻塞。
+  同时执行的 POST 请求不超过 workers 个，其余在事件循环中排队；GET / OPTIONS
+  （/health、/stats、/metrics）使用单独的小线程池，OCR 繁忙时依然能及时响应
+- 准入控制：排队已满时不读取请求体，直接返回 429；客户端可用 X-Request-Timeout
+  请求头给出截止时间（秒），预计排队时间超过截止时间返回 503，排队中超时或客户端断开的
+  请求在执行前丢弃（均带 Retry-After，丢弃数见 snaptext_http_requests_shed_total）
+- 流式响应（NDJSON / SSE）逐块从线程池取出，以 chunked 编码写出
+- shutdown() 停止接收新连接并关闭空闲连接，等待进行中的请求完成（有超时）
+"""
+import asyncio
+import io
+import json
+import logging
+import math
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from typing import Optional
+from urllib.parse import unquote_to_bytes
+
+import metrics
+
+logger = logging.getLogger("async_server")
+
+# 请求行 + 请求头的上限
+_MAX_HEADER_BYTES = 64 * 1024
+# 分块编码的块大小只允许十六进制数字（int(..., 16) 还接受 0x 前缀、正负号与下划线）
+_HEX_DIGITS = b"0123456789abcdefABCDEF"
+# 读取请求体的块大小
+_READ_CHUNK = 1024 * 1024
+# GET / OPTIONS 等轻量请求的线程数
+_LIGHT_WORKERS = 2
+_SERVER_NAME = "SnapText"
+# 排队期间检查截止时间与客户端连接的间隔（秒）
+_QUEUE_POLL_INTERVAL = 0.25
+# 请求耗时滑动平均的权重（用于估计排队时间与 Retry-After）
+_SERVICE_TIME_ALPHA = 0.3
+# 客户端给出截止时间（秒）的请求头
+DEADLINE_HEADER = "X-Request-Timeout"
+# environ 中传给应用的截止时间（time.monotonic()）
+DEADLINE_ENVIRON_KEY = "snaptext.deadline"
+# environ 中已读入内存的完整请求体（bytearray，与 wsgi.input 共用同一块内存）
+BODY_ENVIRON_KEY = "snaptext.body"
+
+
+class _RequestError(Exception):
+    """请求不合法或被拒绝，返回对应状态码后关闭连接"""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_deadline(value: Optional[str], start: float) -> Optional[float]:
+    """X-Request-Timeout 的值（秒）-> 截止时间（time.monotonic()），缺失或无效时为 None"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    if not math.isfinite(seconds) or seconds <= 0:
+        return None
+    return start + seconds
+
+
+class _BodyReader(io.RawIOBase):
+    """已读入内存的请求体，作为 wsgi.input（支持 readinto，不再复制一份）"""
+
+    def __init__(self, body: bytearray):
+        self._view = memoryview(body)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), len(self._view) - self._pos)
+        buffer[:count] = self._view[self._pos:self._pos + count]
+        self._pos += count
+        return count
+
+
+def _run_app(app, environ: dict):
+    """
+    在线程池中调用 WSGI 应用，返回 (状态行, 响应头, 应用返回值, 迭代器, 已产生的数据)
+
+    Flask 在返回前已调用 start_response；流式响应的正文此时尚未开始生成
+    """
+    started = []
+    written = []
+
+    def start_response(status, headers, exc_info=None):
+        if exc_info is not None and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        started[:] = [status, headers]
+        return written.append
+
+    result = app(environ, start_response)
+    iterator = iter(result)
+    first = b""
+    while not started:
+        first = next(iterator, None)
+        if first is None:
+            raise RuntimeError("WSGI 应用未调用 start_response")
+    return started[0], started[1], result, iterator, b"".join(written) + first
+
+
+class AsyncWSGIServer:
+    """asyncio HTTP/1.1 服务器，在线程池中运行 WSGI 应用"""
+
+    def __init__(
+        self,
+        app,
+        host: str = "0.0.0.0",
+        port: int = 9999,
+        workers: int = 4,
+        keepalive_timeout: float = 15.0,
+        max_body_size: int = 128 * 1024 * 1024,
+        queue_size: int = 16,
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(int(workers), 1)
+        self.queue_size = max(int(queue_size), 0)
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body_size = max_body_size
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="http-worker")
+        self._light_executor = ThreadPoolExecutor(_LIGHT_WORKERS, thread_name_prefix="http-light")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._stopped = None
+        # POST 请求的执行槽：正在执行的数量与按到达顺序等待的 Future
+        self._busy = 0
+        self._waiters: deque = deque()
+        self._service_time: Optional[float] = None
+        self._light_slots = None
+        self._connections = set()
+        self._idle = set()
+        self._closing = False
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    # ---- 启动与关闭 ----
+
+    def serve_forever(self):
+        """在当前线程运行事件循环，直到 shutdown()（主线程中 Ctrl-C / SIGTERM 同样会正常关闭）"""
+        try:
+            asyncio.run(self._serve())
+        except BaseException as e:
+            self._error = e
+            self._ready.set()
+            if not isinstance(e, KeyboardInterrupt):
+                raise
+
+    def start(self) -> threading.Thread:
+        """在后台线程运行，端口监听成功后返回线程；监听失败时抛出异常"""
+        thread = threading.Thread(target=self._run_in_thread, name="http-server", daemon=True)
+        thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return thread
+
+    def _run_in_thread(self):
+        try:
+            self.serve_forever()
+        except Exception as e:
+            # 监听失败由 start() 抛给调用方
+            if self._server is not None:
+                logger.error(f"HTTP 服务异常退出: {e}")
+
+    def shutdown(self, timeout: float = 5.0):
+        """停止接收新连接，等待进行中的请求完成（最多 timeout 秒）后关闭，可在任意线程调用"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(timeout), loop)
+        try:
+            future.result(timeout + 1)
+        except Exception as e:
+            logger.warning(f"HTTP 服务关闭超时: {e}")
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._light_slots = asyncio.Semaphore(_LIGHT_WORKERS)
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port,
+            limit=_MAX_HEADER_BYTES, reuse_address=True,
+        )
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                self._loop.add_signal_handler(sig, lambda: asyncio.ensure_future(self._shutdown()))
+        logger.info(f"HTTP 服务已监听 {self.host}:{self.port}（worker 数: {self.workers}）")
+        self._ready.set()
+        await self._stopped.wait()
+
+    async def _shutdown(self, timeout: float = 5.0):
+        if self._closing:
+            return
+        self._closing = True
+        self._server.close()
+        # 空闲的 keep-alive 连接直接关闭，进行中的请求在响应完成后关闭
+        for task in list(self._idle):
+            task.cancel()
+        if self._connections:
+            _, pending = await asyncio.wait(list(self._connections), timeout=timeout)
+            for task in pending:
+                task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._light_executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("HTTP 服务已关闭")
+        self._stopped.set()
+
+    # ---- 连接处理 ----
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        metrics.HTTP_CONNECTIONS.inc()
+        peer = writer.get_extra_info("peername") or ("", 0)
+        try:
+            while not self._closing:
+                self._idle.add(task)
+                try:
+                    head = await asyncio.wait_for(self._read_head(reader), self.keepalive_timeout)
+                except asyncio.LimitOverrunError:
+                    await self._send_error(writer, 431, "请求头过大")
+                    break
+                except _RequestError as e:
+                    await self._send_error(writer, e.status, str(e))
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                finally:
+                    self._idle.discard(task)
+
+                try:
+                    environ, keep_alive = self._parse_head(head, peer)
+                    deadline = parse_deadline(environ.get("HTTP_X_REQUEST_TIMEOUT"), time.monotonic())
+                    if environ["REQUEST_METHOD"] == "POST":
+                        # 排队已满时不再读取请求体
+                        self._check_admission(deadline)
+                    body = await self._read_body(reader, writer, environ)
+                except _RequestError as e:
+                    await self._send_error(writer, e.status, str(e), e.retry_after)
+                    break
+                environ["wsgi.input"] = _BodyReader(body)
+                # 应用可直接使用缓冲区，不必再经 wsgi.input 读入另一份
+                environ[BODY_ENVIRON_KEY] = body
+                if deadline is not None:
+                    environ[DEADLINE_ENVIRON_KEY] = deadline
+                try:
+                    if not await self._respond(reader, writer, environ, keep_alive, deadline):
+                        break
+                except _RequestError as e:
+                    await self._send_error(writer, e.status, str(e), e.retry_after)
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # 关闭服务时取消的连接
+            pass
+        except Exception as e:
+            logger.error(f"连接处理异常: {e}")
+        finally:
+            self._connections.discard(task)
+            metrics.HTTP_CONNECTIONS.dec()
+            writer.close()
+
+    async def _read_head(self, reader) -> bytes:
+        """
+        读取请求行与请求头（到空行为止）
+
+        行尾为 CRLF 或单独的 LF（RFC 9112 2.2 建议兼容）；请求行之前的空行忽略
+        """
+        head = bytearray()
+        while True:
+            line = await reader.readuntil(b"\n")
+            if line in (b"\r\n", b"\n"):
+                if head:
+                    return bytes(head)
+                continue
+            head += line
+            if len(head) > _MAX_HEADER_BYTES:
+                raise _RequestError(431, "请求头过大")
+
+    def _parse_head(self, head: bytes, peer) -> tuple:
+        """
+        请求行与请求头 -> (WSGI environ, 是否保持连接)
+
+        请求体的长度只能由一个 Content-Length 或 Transfer-Encoding: chunked 之一给出，
+        重复、冲突或无法解析时返回 400（避免与前置代理对请求边界的理解不一致）
+        """
+        lines = [line[:-1] if line.endswith("\r") else line
+                 for line in head.decode("latin-1").split("\n")]
+        if any("\r" in line for line in lines):
+            raise _RequestError(400, "无效的换行符")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise _RequestError(400, "无效的请求行")
+        if version not in ("HTTP/1.1", "HTTP/1.0"):
+            raise _RequestError(505, f"不支持的协议版本: {version}")
+
+        path, _, query = target.partition("?")
+        environ = {
+            "REQUEST_METHOD": method.upper(),
+            "SCRIPT_NAME": "",
+            "PATH_INFO": unquote_to_bytes(path).decode("latin-1"),
+            "QUERY_STRING": query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": str(self.port),
+            "SERVER_PROTOCOL": version,
+            "REMOTE_ADDR": str(peer[0]),
+            "REMOTE_PORT": str(peer[1]),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, sep, value = line.partition(":")
+            # 折行（以空白开头的续行）与名称前后的空白都不允许
+            if not sep or not name or any(c.isspace() for c in name):
+                raise _RequestError(400, "无效的请求头")
+            # 与常见代理一致，忽略带下划线的请求头（避免与 X-Foo 冒充同一个变量）
+            if "_" in name:
+                continue
+            name = name.upper().replace("-", "_")
+            value = value.strip()
+            if name == "CONTENT_LENGTH":
+                if name in environ:
+                    raise _RequestError(400, "重复的 Content-Length")
+                if not (value.isascii() and value.isdigit()):
+                    raise _RequestError(400, f"无效的 Content-Length: {value}")
+            if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                environ[name] = value
+                continue
+            key = "HTTP_" + name
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+        encoding = environ.get("HTTP_TRANSFER_ENCODING")
+        if encoding is not None:
+            if "CONTENT_LENGTH" in environ:
+                raise _RequestError(400, "Transfer-Encoding 与 Content-Length 不能同时出现")
+            if version == "HTTP/1.0":
+                raise _RequestError(400, "HTTP/1.0 请求不支持 Transfer-Encoding")
+            if encoding.strip().lower() != "chunked":
+                raise _RequestError(501, f"不支持的 Transfer-Encoding: {encoding}")
+
+        connection = environ.get("HTTP_CONNECTION", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = "close" not in connection
+        else:
+            keep_alive = "keep-alive" in connection
+        return environ, keep_alive
+
+    async def _read_body(self, reader, writer, environ: dict) -> bytearray:
+        """在事件循环中读取完整请求体（预分配缓冲区），超过上限返回 413"""
+        if "HTTP_TRANSFER_ENCODING" in environ:
+            # _parse_head 已确认只有 chunked
+            await self._send_continue(writer, environ)
+            body = await self._read_chunked(reader)
+            # 应用看到的是已解码的完整请求体
+            del environ["HTTP_TRANSFER_ENCODING"]
+            environ["CONTENT_LENGTH"] = str(len(body))
+            return body
+
+        length = environ.get("CONTENT_LENGTH")
+        if not length:
+            return bytearray()
+        try:
+            length = int(length)
+        except ValueError:
+            raise _RequestError(400, f"无效的 Content-Length: {length}")
+        if length < 0:
+            raise _RequestError(400, f"无效的 Content-Length: {length}")
+        if length > self.max_body_size:
+            raise _RequestError(413, f"请求体过大（上限 {self.max_body_size} 字节）")
+
+        await self._send_continue(writer, environ)
+        body = bytearray(length)
+        view = memoryview(body)
+        received = 0
+        while received < length:
+            chunk = await reader.read(min(_READ_CHUNK, length - received))
+            if not chunk:
+                raise asyncio.IncompleteReadError(bytes(view[:received]), length)
+            view[received:received + len(chunk)] = chunk
+            received += len(chunk)
+        return body
+
+    async def _read_chunked(self, reader) -> bytearray:
+        body = bytearray()
+        while True:
+            size_text = (await self._read_line(reader)).split(b";", 1)[0].strip()
+            if not size_text or any(c not in _HEX_DIGITS for c in size_text):
+                raise _RequestError(400, "无效的分块编码")
+            size = int(size_text, 16)
+            if size == 0:
+                # 跳过 trailer
+                while await self._read_line(reader):
+                    pass
+                return body
+            if len(body) + size > self.max_body_size:
+                raise _RequestError(413, f"请求体过大（上限 {self.max_body_size} 字节）")
+            body += await reader.readexactly(size)
+            if await self._read_line(reader):
+                raise _RequestError(400, "无效的分块编码")
+
+    @staticmethod
+    async def _read_line(reader) -> bytes:
+        """分块编码中的一行（去掉 CRLF 或 LF 行尾）"""
+        try:
+            line = await reader.readuntil(b"\n")
+        except asyncio.LimitOverrunError:
+            raise _RequestError(400, "无效的分块编码")
+        return line[:-2] if line.endswith(b"\r\n") else line[:-1]
+
+    async def _send_continue(self, writer, environ: dict):
+        """客户端（如 curl 上传大文件）等待 100 Continue 后才发送请求体"""
+        if (
+            environ.get("HTTP_EXPECT", "").lower() == "100-continue"
+            and environ["SERVER_PROTOCOL"] == "HTTP/1.1"
+        ):
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+
+    # ---- 准入控制 ----
+
+    def _estimated_wait(self) -> Optional[float]:
+        """新请求预计的排队时间（秒），还没有完成过请求时为 None"""
+        if self._service_time is None:
+            return None
+        if self._busy < self.workers and not self._waiters:
+            return 0.0
+        return self._service_time * math.ceil((len(self._waiters) + 1) / self.workers)
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._estimated_wait() or 1))
+
+    def _shed(self, reason: str, status: int, message: str) -> _RequestError:
+        """记录被丢弃的请求，返回要发给客户端的错误"""
+        metrics.SHED.inc(reason=reason)
+        logger.warning(f"丢弃请求（{reason}）: {message}")
+        return _RequestError(status, message, self._retry_after())
+
+    def _check_admission(self, deadline: Optional[float]):
+        """读取请求体之前的检查：排队已满返回 429，预计排队时间超过截止时间返回 503"""
+        if self._busy < self.workers and not self._waiters:
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise self._shed("queue_full", 429, "OCR 服务繁忙，排队已满，请稍后重试")
+        wait = self._estimated_wait()
+        if deadline is not None and wait is not None and time.monotonic() + wait > deadline:
+            raise self._shed("deadline", 503, "OCR 服务繁忙，预计排队时间超过请求截止时间")
+
+    async def _acquire(self, reader: asyncio.StreamReader, deadline: Optional[float]):
+        """
+        等待 POST 执行槽（先到先得）
+
+        排队期间定期检查：超过截止时间返回 503，客户端断开则直接关闭连接
+        """
+        if self._busy < self.workers and not self._waiters:
+            self._busy += 1
+            return
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        metrics.HTTP_QUEUED.set(len(self._waiters))
+        try:
+            while not waiter.done():
+                timeout = _QUEUE_POLL_INTERVAL
+                if deadline is not None:
+                    timeout = min(timeout, max(deadline - time.monotonic(), 0))
+                await asyncio.wait([waiter], timeout=timeout)
+                if waiter.done():
+                    break
+                if reader.at_eof():
+                    metrics.SHED.inc(reason="disconnected")
+                    raise ConnectionAbortedError("客户端在排队期间断开")
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise self._shed("deadline", 503, "排队时间超过请求截止时间")
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # 执行槽已经交给本请求，转交给下一个
+                self._release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+        finally:
+            metrics.HTTP_QUEUED.set(len(self._waiters))
+
+    def _release(self):
+        """归还执行槽：直接交给队首仍在等待的请求"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._busy -= 1
+
+    async def _run_post(self, reader, writer, environ, keep_alive, deadline) -> bool:
+        """POST 请求占用执行槽运行；开始执行前再检查一次截止时间与客户端连接"""
+        await self._acquire(reader, deadline)
+        start = time.monotonic()
+        completed = False
+        try:
+            if reader.at_eof():
+                metrics.SHED.inc(reason="disconnected")
+                raise ConnectionAbortedError("客户端在执行前断开")
+            if deadline is not None and start >= deadline:
+                raise self._shed("deadline", 503, "请求在执行前已超过截止时间")
+            result = await self._run_app(writer, environ, keep_alive, self._executor)
+            completed = True
+            return result
+        finally:
+            if completed:
+                elapsed = time.monotonic() - start
+                if self._service_time is None:
+                    self._service_time = elapsed
+                else:
+                    self._service_time += _SERVICE_TIME_ALPHA * (elapsed - self._service_time)
+            self._release()
+
+    async def _respond(self, reader, writer, environ: dict, keep_alive: bool, deadline) -> bool:
+        """执行应用并写出响应，返回连接是否可以继续使用"""
+        if environ["REQUEST_METHOD"] == "POST":
+            return await self._run_post(reader, writer, environ, keep_alive, deadline)
+        async with self._light_slots:
+            return await self._run_app(writer, environ, keep_alive, self._light_executor)
+
+    async def _run_app(self, writer, environ: dict, keep_alive: bool, executor) -> bool:
+        """在线程池中执行应用并写出响应"""
+        loop = asyncio.get_running_loop()
+        try:
+            status, headers, result, iterator, first = await loop.run_in_executor(
+                executor, _run_app, self.app, environ
+            )
+        except Exception as e:
+            logger.error(f"请求处理异常: {e}")
+            await self._send_error(writer, 500, "服务器内部错误")
+            return False
+        try:
+            return await self._write_response(
+                writer, environ, keep_alive, status, headers, iterator, first, executor
+            )
+        finally:
+            close = getattr(result, "close", None)
+            if close is not None:
+                # 关闭生成器（客户端提前断开时同样执行流式响应的清理逻辑）
+                await loop.run_in_executor(executor, close)
+
+    async def _write_response(
+        self, writer, environ, keep_alive, status, headers, iterator, first, executor
+    ) -> bool:
+        loop = asyncio.get_running_loop()
+        names = {name.lower() for name, _ in headers}
+        code = int(status.split(" ", 1)[0])
+        has_body = environ["REQUEST_METHOD"] != "HEAD" and code not in (204, 304) and code >= 200
+        chunked = False
+        if has_body and "content-length" not in names:
+            if environ["SERVER_PROTOCOL"] == "HTTP/1.1":
+                chunked = True
+                headers = headers + [("Transfer-Encoding", "chunked")]
+            else:
+                # HTTP/1.0 只能以关闭连接表示响应结束
+                keep_alive = False
+        keep_alive = keep_alive and not self._closing
+        extra = [("Connection", "keep-alive" if keep_alive else "close")]
+        if "date" not in names:
+            extra.append(("Date", formatdate(usegmt=True)))
+        if "server" not in names:
+            extra.append(("Server", _SERVER_NAME))
+        head = f"HTTP/1.1 {status}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers + extra
+        ) + "\r\n"
+        writer.write(head.encode("latin-1"))
+
+        if has_body:
+            chunk = first
+            while True:
+                if chunk:
+                    if chunked:
+                        writer.write(b"%x\r\n" % len(chunk) + chunk + b"\r\n")
+                    else:
+                        writer.write(chunk)
+                    await writer.drain()
+                chunk = await loop.run_in_executor(executor, next, iterator, None)
+                if chunk is None:
+                    break
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return keep_alive
+
+    async def _send_error(self, writer, status: int, message: str, retry_after: int = None):
+        """服务器层面的错误（请求不合法、被拒绝等），JSON 格式与接口错误一致，随后关闭连接"""
+        body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+        headers = [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(body))),
+            ("Access-Control-Allow-Origin", "*"),
+            ("Connection", "close"),
+            ("Date", formatdate(usegmt=True)),
+            ("Server", _SERVER_NAME),
+        ]
+        if retry_after is not None:
+            headers.append(("Retry-After", str(retry_after)))
+        head = f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers
+        ) + "\r\n"
+        try:
+            writer.write(head.encode("latin-1") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
@@ -0,0 +1,7 @@
+"""
+基准测试工具
+
+在 LocalOCR 目录下以模块方式运行，例如::
+
+    python -m bench.modes
+"""
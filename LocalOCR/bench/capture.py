@@ -0,0 +1,100 @@
+"""
+截图路径基准：截图文件 / 剪贴板字节 -> 模型输入 BGR 数组
+
+旧路径为 读临时文件 -> base64 编码 -> 引擎内 base64 解码 -> 图片解码；
+capture_method = clipboard 时为 剪贴板字节（NSData -> bytes，这里用内存拷贝模拟）-> 图片解码。
+分别测量各步骤（不含 screencapture 本身与识别），给出每次截图节省的毫秒数。
+用法（在 LocalOCR 目录下）::
+
+    python -m bench.capture [--repeat 10]
+"""
+import argparse
+import base64
+import os
+import statistics
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from bench.corpus import render_screenshot
+from image_input import decode_image
+from ocr_engine import decode_base64
+
+SIZES = ((2560, 1600), (3840, 2160), (5120, 2880))
+
+
+def _p50(func, repeat: int) -> float:
+    func()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def _photo(width: int, height: int) -> bytes:
+    """照片类截图（平滑噪声），PNG 压缩率低、文件大"""
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    image = np.clip(image.astype(np.int16) + rng.integers(-6, 7, image.shape), 0, 255)
+    return cv2.imencode(".png", image.astype(np.uint8))[1].tobytes()
+
+
+def _measure(png: bytes, repeat: int) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
+        f.write(png)
+        path = f.name
+    try:
+        def read_file():
+            with open(path, "rb") as f:
+                return f.read()
+
+        def base64_round_trip():
+            return decode_base64(base64.b64encode(png).decode("utf-8"))
+
+        read_ms = _p50(read_file, repeat)
+        base64_ms = _p50(base64_round_trip, repeat)
+        copy_ms = _p50(lambda: bytes(bytearray(png)), repeat)
+        decode_ms = _p50(lambda: decode_image(png), repeat)
+    finally:
+        os.remove(path)
+    return {
+        "read_ms": read_ms,
+        "base64_ms": base64_ms,
+        "copy_ms": copy_ms,
+        "decode_ms": decode_ms,
+        # 旧路径：读文件 + base64 往返；剪贴板路径：NSData -> bytes 拷贝（都不含共同的图片解码）
+        "saved_ms": read_ms + base64_ms - copy_ms,
+    }
+
+
+def run(repeat: int):
+    cases = [(f"{w}x{h} 文本", render_screenshot(w, h)) for w, h in SIZES]
+    cases += [(f"{w}x{h} 照片", _photo(w, h)) for w, h in SIZES[:2]]
+    print(f"截图取图各步骤耗时（p50，{repeat} 次；图片解码为各路径共有）\n")
+    print(
+        "| 截图 | PNG 大小 | 读临时文件 (ms) | base64 编码 + 解码 (ms) "
+        "| 剪贴板字节拷贝 (ms) | 图片解码 (ms) | 节省 (ms) |"
+    )
+    print("| :--- | ---: | ---: | ---: | ---: | ---: | ---: |")
+    for name, png in cases:
+        r = _measure(png, repeat)
+        print(
+            f"| {name} | {len(png) / 1024:.0f} KB | {r['read_ms']:.2f} | {r['base64_ms']:.2f} | "
+            f"{r['copy_ms']:.2f} | {r['decode_ms']:.1f} | {r['saved_ms']:.2f} |"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="菜单栏截图取图路径基准测试")
+    parser.add_argument("--repeat", type=int, default=10, help="重复次数")
+    args = parser.parse_args()
+    run(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
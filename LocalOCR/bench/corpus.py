@@ -0,0 +1,232 @@
+"""
+合成测试图片 - 用 PIL 渲染确定性的文本截图
+"""
+import io
+import os
+import random
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+SAMPLE_LINES = [
+    "The quick brown fox jumps over the lazy dog",
+    "SnapText local OCR benchmark 2024-01-01 12:34:56",
+    "def merge_lines_by_position(ocr_result: list) -> List[str]:",
+    "Total: 1,234.56 USD   Tax: 98.76   Items: 42",
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit",
+    "HTTP/1.1 200 OK  Content-Type: application/json",
+    "Settings  General  Shortcuts  About  Check for updates",
+    "Error: connection refused (port 9999)",
+]
+
+
+CJK_LINES = [
+    "截图识别完成，结果已复制到剪贴板",
+    "偏好设置  通用  快捷键  关于  检查更新",
+    "合计：1,234.56 元  税额：98.76  数量：42",
+    "本地文字识别服务正在端口 9999 上运行",
+    "ファイルを保存しました（12:34:56）",
+    "設定を開いてショートカットを変更します",
+]
+
+MIXED_LINES = [
+    "SnapText 截图识别 OCR 结果：42 行",
+    "错误 Error: connection refused（端口 9999）",
+    "下载 Download v1.2.3 更新 Update",
+    "模型 model_profile = int8，速度 fast",
+]
+
+# 各平台常见的字体文件（按顺序取第一个存在的），全部来自本机，不需要联网
+FONT_CANDIDATES = {
+    "sans": [
+        "/System/Library/Fonts/Helvetica.ttc",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+        "C:/Windows/Fonts/arial.ttf",
+    ],
+    "serif": [
+        "/System/Library/Fonts/Times.ttc",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf",
+        "/usr/share/fonts/dejavu/DejaVuSerif.ttf",
+        "C:/Windows/Fonts/times.ttf",
+    ],
+    "mono": [
+        "/System/Library/Fonts/Menlo.ttc",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
+        "/usr/share/fonts/dejavu/DejaVuSansMono.ttf",
+        "C:/Windows/Fonts/consola.ttf",
+    ],
+    "cjk": [
+        "/System/Library/Fonts/PingFang.ttc",
+        "/System/Library/Fonts/STHeiti Light.ttc",
+        "/System/Library/Fonts/Hiragino Sans GB.ttc",
+        "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+        "C:/Windows/Fonts/msyh.ttc",
+    ],
+}
+
+
+def find_fonts() -> Dict[str, Optional[str]]:
+    """各字体族在本机的字体文件路径（找不到时为 None）"""
+    return {
+        family: next((path for path in paths if os.path.exists(path)), None)
+        for family, paths in FONT_CANDIDATES.items()
+    }
+
+
+def load_font(size: int) -> ImageFont.ImageFont:
+    """加载默认字体（Pillow >= 10.1 支持指定字号）"""
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def render_text_image(
+    lines, width: int = 1280, font_size: int = 24, line_gap: int = 14
+) -> Image.Image:
+    """把若干行文字渲染为白底黑字的截图"""
+    font = load_font(font_size)
+    height = 40 + len(lines) * (font_size + line_gap)
+    image = Image.new("RGB", (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    y = 20
+    for line in lines:
+        draw.text((24, y), line, fill=(20, 20, 20), font=font)
+        y += font_size + line_gap
+    return image
+
+
+def simple_corpus(count: int = 12, seed: int = 0) -> Iterator[Tuple[Image.Image, list]]:
+    """生成 (图片, 真实文本行) 序列，相同 seed 得到相同结果"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        line_count = rng.randint(1, 12)
+        lines = [rng.choice(SAMPLE_LINES) for _ in range(line_count)]
+        font_size = rng.choice([16, 20, 24, 32])
+        width = rng.choice([640, 1280, 1920])
+        yield render_text_image(lines, width=width, font_size=font_size), lines
+
+
+def render_screenshot(
+    width: int = 3840, height: int = 2160, transparent: bool = False, shadow: int = 80
+) -> bytes:
+    """
+    全屏文本截图的 RGBA PNG 字节
+
+    transparent 时四周 shadow 像素为渐变透明的阴影（如 macOS 窗口截图）
+    """
+    lines = [SAMPLE_LINES[i % len(SAMPLE_LINES)] for i in range(height // 46)]
+    image = render_text_image(lines, width=width, font_size=32).crop((0, 0, width, height))
+    image = image.convert("RGBA")
+    if transparent:
+        y, x = np.mgrid[0:height, 0:width]
+        edge = np.minimum.reduce([x, y, width - 1 - x, height - 1 - y])
+        alpha = np.clip(edge * 255 // shadow, 0, 255).astype(np.uint8)
+        image.putalpha(Image.fromarray(alpha))
+    buf = io.BytesIO()
+    image.save(buf, "PNG")
+    return buf.getvalue()
+
+
+class BenchCase(NamedTuple):
+    """基准语料中的一张图片"""
+
+    name: str
+    script: str  # latin / cjk / mixed
+    png: bytes
+    lines: List[str]
+    width: int
+    height: int
+
+
+# 截图风格的背景：(底色, 文字颜色)
+BACKGROUNDS = {
+    "light": ((255, 255, 255), (20, 20, 20)),
+    "dark": ((30, 30, 30), (230, 230, 230)),
+    "gradient": ((235, 240, 250), (30, 30, 60)),
+    "window": ((246, 246, 246), (30, 30, 30)),
+}
+
+# (尺寸名, 宽, 高, 行数, 字号)
+SUITE_SIZES = [
+    ("small", 640, 160, 3, 20),
+    ("medium", 1280, 720, 12, 24),
+    ("large", 2560, 1440, 24, 32),
+]
+
+
+def _draw_background(image: Image.Image, style: str, rng: random.Random):
+    """渐变底色，或带标题栏、侧边栏和按钮的窗口界面"""
+    draw = ImageDraw.Draw(image)
+    width, height = image.size
+    if style == "gradient":
+        top, bottom = np.array([235, 240, 250]), np.array([200, 215, 240])
+        ramp = np.linspace(0, 1, height)[:, None, None]
+        pixels = (top * (1 - ramp) + bottom * ramp).astype(np.uint8)
+        image.paste(Image.fromarray(np.repeat(pixels, width, axis=1)))
+    elif style == "window":
+        draw.rectangle((0, 0, width, 28), fill=(225, 225, 225))
+        for i, color in enumerate([(255, 95, 87), (254, 188, 46), (40, 200, 64)]):
+            draw.ellipse((10 + i * 20, 8, 22 + i * 20, 20), fill=color)
+        draw.rectangle((0, 28, width // 8, height), fill=(232, 232, 237))
+        for _ in range(3):
+            x = rng.randint(width // 4, width - 120)
+            y = rng.randint(40, max(height - 40, 41))
+            draw.rounded_rectangle((x, y, x + 90, y + 26), radius=6, fill=(0, 122, 255))
+
+
+def _render_case(
+    lines: List[str], width: int, height: int, font_path: Optional[str], font_size: int,
+    style: str, rng: random.Random,
+) -> bytes:
+    background, color = BACKGROUNDS[style]
+    image = Image.new("RGB", (width, height), background)
+    _draw_background(image, style, rng)
+    font = ImageFont.truetype(font_path, font_size) if font_path else load_font(font_size)
+    draw = ImageDraw.Draw(image)
+    left = width // 8 + 24 if style == "window" else 24
+    y = 40 if style == "window" else 16
+    for line in lines:
+        draw.text((left, y), line, fill=color, font=font)
+        y += int(font_size * 1.6)
+    buf = io.BytesIO()
+    image.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def suite_corpus(seed: int = 0, sizes=None) -> Tuple[List[BenchCase], List[str]]:
+    """
+    基准套件的确定性语料：文字（latin / cjk / mixed）× 尺寸，字体与背景轮换
+
+    返回 (图片列表, 因缺少字体而跳过的用例名)。相同 seed 与相同字体得到相同图片
+    """
+    fonts = find_fonts()
+    latin_fonts = [fonts[f] for f in ("sans", "serif", "mono") if fonts[f]] or [None]
+    styles = list(BACKGROUNDS)
+    texts = {"latin": SAMPLE_LINES, "cjk": CJK_LINES, "mixed": MIXED_LINES}
+    rng = random.Random(seed)
+    cases, skipped = [], []
+    index = 0
+    for script, pool in texts.items():
+        for size_name, width, height, line_count, font_size in SUITE_SIZES:
+            if sizes and size_name not in sizes:
+                continue
+            name = f"{script}-{size_name}"
+            if script == "latin":
+                font_path = latin_fonts[index % len(latin_fonts)]
+            elif fonts["cjk"]:
+                font_path = fonts["cjk"]
+            else:
+                # 默认字体没有中日文字形，渲染出来是方框，不如不测
+                skipped.append(name)
+                continue
+            style = styles[index % len(styles)]
+            index += 1
+            lines = [rng.choice(pool) for _ in range(line_count)]
+            png = _render_case(lines, width, height, font_path, font_size, style, rng)
+            cases.append(BenchCase(name, script, png, lines, width, height))
+    return cases, skipped
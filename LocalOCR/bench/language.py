@@ -0,0 +1,144 @@
+"""
+语言检测基准：码位查表实现 vs 原逐字符实现
+
+用混合中英文、各语种样例拼出 1 KB ~ 1 MB 的识别文本，比较整体检测与逐行检测的耗时。
+计时前先核对 CHECKS 中的样例（含人名、地名、外来词的英文句子仍应判为英文），不符时以退出码 1 结束。
+用法（在 LocalOCR 目录下）::
+
+    python -m bench.language
+"""
+import argparse
+import random
+import sys
+import time
+from typing import List
+
+from language import detect_language, detect_line_languages
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+SAMPLES = [
+    "SnapText 本地 OCR 识别服务",
+    "这是一个用于测试文字识别的句子",
+    "這是一個用於測試文字識別的句子",
+    "日本語のテキストを認識します",
+    "한국어 텍스트 인식 테스트",
+    "Распознавание текста на русском",
+    "The quick brown fox jumps over the lazy dog",
+    "Ça fait très longtemps, à bientôt",
+    "Schöne Grüße aus München",
+    "¿Dónde está la estación de tren?",
+]
+
+# (文本, 期望的语言)
+CHECKS = [
+    ("Meeting notes from the Zürich office: the quarterly review moves to Thursday.", "en"),
+    ("Order a jalapeño burger with extra cheese and a large soda.", "en"),
+    ("Ça fait très longtemps, à bientôt", "fr"),
+    ("Schöne Grüße aus München", "de"),
+    ("¿Dónde está la estación de tren?", "es"),
+    ("这是一个用于测试文字识别的句子", "zh-Hans"),
+]
+
+
+def check() -> List[str]:
+    """核对 CHECKS，返回不符的样例说明"""
+    failures = []
+    for text, expected in CHECKS:
+        whole = detect_language(text)
+        per_line = detect_line_languages([text])[0]
+        if whole != expected or per_line != expected:
+            failures.append(f"{text!r}: 期望 {expected}，整体 {whole}，逐行 {per_line}")
+    return failures
+
+
+def legacy_detect_language(text: str) -> str:
+    """原逐字符判断码位范围的实现，仅作对照"""
+    if not text:
+        return "auto"
+
+    # 统计字符类型
+    chinese_count = 0
+    english_count = 0
+    japanese_count = 0
+    korean_count = 0
+
+    for char in text:
+        code = ord(char)
+        if 0x4E00 <= code <= 0x9FFF:  # 中文
+            chinese_count += 1
+        elif 0x3040 <= code <= 0x30FF:  # 日文假名
+            japanese_count += 1
+        elif 0xAC00 <= code <= 0xD7AF:  # 韩文
+            korean_count += 1
+        elif 0x0041 <= code <= 0x007A:  # 英文字母
+            english_count += 1
+
+    # 确定主要语言
+    counts = {
+        "zh-Hans": chinese_count,
+        "en": english_count,
+        "ja": japanese_count,
+        "ko": korean_count
+    }
+
+    max_lang = max(counts, key=counts.get)
+    if counts[max_lang] > 0:
+        return max_lang
+    return "auto"
+
+
+def synthetic_lines(chars: int, seed: int = 0) -> List[str]:
+    """生成总长度约为 chars 个字符的文本行"""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < chars:
+        line = rng.choice(SAMPLES)
+        lines.append(line)
+        total += len(line) + 1
+    return lines
+
+
+def _best_of(func, data, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(sizes: List[int], repeat: int):
+    print(
+        f"{'chars':>10}{'lines':>8}{'legacy(ms)':>12}{'table(ms)':>11}"
+        f"{'speedup':>10}{'per-line(ms)':>14}"
+    )
+    for size in sizes:
+        lines = synthetic_lines(size)
+        text = " ".join(lines)
+        legacy_ms = _best_of(legacy_detect_language, text, repeat)
+        table_ms = _best_of(detect_language, text, repeat)
+        lines_ms = _best_of(detect_line_languages, lines, repeat)
+        print(
+            f"{len(text):>10}{len(lines):>8}{legacy_ms:>12.3f}{table_ms:>11.3f}"
+            f"{legacy_ms / table_ms:>9.1f}x{lines_ms:>14.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="detect_language 基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="文本字符数")
+    parser.add_argument("--repeat", type=int, default=5, help="每组重复次数（取最快）")
+    args = parser.parse_args()
+    failures = check()
+    for failure in failures:
+        print(f"检测结果不符: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"{len(CHECKS)} 个样例检测正确\n")
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
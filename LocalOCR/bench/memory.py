@@ -0,0 +1,42 @@
+"""
+基准测试用的常驻内存测量
+
+Linux 上可以通过 /proc/self/clear_refs 重置峰值 RSS（VmHWM），只统计被测代码的峰值，
+避免导入模块时的瞬时峰值掩盖测量结果；其他平台退回 ru_maxrss（无法重置，取增量）。
+"""
+import resource
+import sys
+
+
+def _status_mb(field: str):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def max_rss_mb() -> float:
+    """进程启动以来的峰值 RSS（MB）"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上 ru_maxrss 单位为 KB，macOS 上为字节
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def reset_peak() -> float:
+    """重置峰值并返回当前 RSS 作为基线（不支持重置时返回当前峰值）"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return max_rss_mb()
+    return _status_mb("VmRSS")
+
+
+def peak_since(base: float) -> float:
+    """reset_peak 之后的峰值 RSS 增量（MB）"""
+    peak = _status_mb("VmHWM")
+    return (peak if peak is not None else max_rss_mb()) - base
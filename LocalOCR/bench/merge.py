@@ -0,0 +1,140 @@
+"""
+文本行合并基准：NumPy 实现 vs 原逐框实现
+
+生成 10 ~ 10,000 个框的合成文档（多行、行内多列、带坐标抖动），
+校验两种实现输出一致并比较耗时。用法（在 LocalOCR 目录下）::
+
+    python -m bench.merge
+"""
+import argparse
+import random
+import time
+from typing import List
+
+import numpy as np
+
+from ocr_engine import join_lines, merge_lines_by_position
+
+SIZES = [10, 100, 1000, 10000]
+
+
+def legacy_merge_lines_by_position(ocr_result: list) -> List[str]:
+    """
+    原逐框构建 dict 的实现（每个框都重新计算当前行平均高度），仅作对照
+    """
+    if not ocr_result:
+        return []
+    
+    # 提取每个文本框的信息：(y_center, x_left, text)
+    items = []
+    for item in ocr_result:
+        box = item[0]  # [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
+        text = item[1]
+        
+        # 计算 Y 中心点（取四个点的平均值）
+        y_center = sum(point[1] for point in box) / 4
+        # 取左边缘的 X 坐标用于排序
+        x_left = min(point[0] for point in box)
+        # 计算文本框高度（用于判断行间距阈值）
+        y_coords = [point[1] for point in box]
+        height = max(y_coords) - min(y_coords)
+        
+        items.append({
+            'y_center': y_center,
+            'x_left': x_left,
+            'text': text,
+            'height': height
+        })
+    
+    # 按 Y 坐标分组（Y 坐标接近的为同一行）
+    # 阈值：文本框高度的一半
+    items.sort(key=lambda x: (x['y_center'], x['x_left']))
+    
+    lines = []
+    current_line = [items[0]]
+    
+    for item in items[1:]:
+        # 判断是否为同一行：Y 坐标差小于当前行平均高度的一半
+        avg_height = sum(i['height'] for i in current_line) / len(current_line)
+        threshold = max(avg_height * 0.6, 10)  # 至少 10 像素
+        
+        if abs(item['y_center'] - current_line[0]['y_center']) < threshold:
+            current_line.append(item)
+        else:
+            lines.append(current_line)
+            current_line = [item]
+    
+    lines.append(current_line)
+    
+    # 每行内部按 X 坐标排序，然后用空格连接
+    result = []
+    for line in lines:
+        line.sort(key=lambda x: x['x_left'])
+        line_text = ' '.join(item['text'] for item in line)
+        result.append(line_text)
+    
+    return result
+
+
+def synthetic_result(count: int, seed: int = 0, per_line: int = 0) -> list:
+    """生成 RapidOCR 格式的合成结果：终端/表格式的密集文本框"""
+    rng = random.Random(seed)
+    per_line = per_line or rng.randint(4, 12)
+    result = []
+    for i in range(count):
+        row, col = divmod(i, per_line)
+        height = rng.uniform(14, 22)
+        x = 20 + col * 110 + rng.uniform(-3, 3)
+        y = 20 + row * 28 + rng.uniform(-3, 3)
+        width = rng.uniform(40, 100)
+        box = [[x, y], [x + width, y], [x + width, y + height], [x, y + height]]
+        result.append([box, f"r{row}c{col}", 0.99])
+    rng.shuffle(result)
+    return result
+
+
+def _best_of(func, data, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(sizes: List[int], repeat: int, per_line: int = 0):
+    """
+    list 列为传入 RapidOCR 列表格式（含转换为数组的开销），
+    ndarray 列为引擎流水线内直接传入 (n, 4, 2) 数组的情况
+    """
+    print(
+        f"{'boxes':>8}{'legacy(ms)':>12}{'list(ms)':>10}{'ndarray(ms)':>13}"
+        f"{'speedup':>10}  identical"
+    )
+    for size in sizes:
+        data = synthetic_result(size, per_line=per_line)
+        boxes = np.array([item[0] for item in data], dtype=np.float64)
+        texts = [item[1] for item in data]
+        expected = legacy_merge_lines_by_position(data)
+        identical = merge_lines_by_position(data) == expected == join_lines(boxes, texts)
+
+        legacy_ms = _best_of(legacy_merge_lines_by_position, data, repeat)
+        list_ms = _best_of(merge_lines_by_position, data, repeat)
+        array_ms = _best_of(lambda _: join_lines(boxes, texts), None, repeat)
+        print(
+            f"{size:>8}{legacy_ms:>12.3f}{list_ms:>10.3f}{array_ms:>13.3f}"
+            f"{legacy_ms / array_ms:>9.1f}x  {identical}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="merge_lines_by_position 基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="框数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每组重复次数（取最快）")
+    parser.add_argument("--per-line", type=int, default=0, help="每行框数（0 = 随机 4~12）")
+    args = parser.parse_args()
+    run(args.sizes, args.repeat, args.per_line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+识别模式对比：fast vs accurate 的延迟与文本一致性
+
+用法（在 LocalOCR 目录下）::
+
+    python -m bench.modes [--images 12] [--repeat 3]
+"""
+import argparse
+import statistics
+import time
+
+import ocr_engine
+from bench.corpus import simple_corpus
+from text_metrics import similarity
+
+
+def run(images: int, repeat: int):
+    corpus = list(simple_corpus(images))
+    print(f"{'mode':<10}{'load(s)':>10}{'p50(ms)':>10}{'mean(ms)':>10}{'max(ms)':>10}{'accuracy':>10}")
+    for mode in ocr_engine.MODE_PROFILES:
+        start = time.perf_counter()
+        ocr_engine.get_ocr_engine(mode)
+        load_time = time.perf_counter() - start
+
+        latencies = []
+        scores = []
+        for image, expected in corpus:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                texts = ocr_engine._ocr_image(image, mode)["texts"]
+                latencies.append((time.perf_counter() - start) * 1000)
+            scores.append(similarity(texts, expected))
+
+        print(
+            f"{mode:<10}{load_time:>10.2f}{statistics.median(latencies):>10.1f}"
+            f"{statistics.mean(latencies):>10.1f}{max(latencies):>10.1f}"
+            f"{statistics.mean(scores):>10.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fast / accurate 模式基准测试")
+    parser.add_argument("--images", type=int, default=12, help="合成图片数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每张图片重复次数")
+    args = parser.parse_args()
+    run(args.images, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
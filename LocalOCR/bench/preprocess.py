@@ -0,0 +1,104 @@
+"""
+预处理基准：图片字节 -> 模型输入 BGR 数组（含缓存 key 计算）
+
+对比旧路径（PIL 解码 -> 新建白底 paste 合成 -> tobytes 计算 key -> np.array -> RGB 转 BGR）
+与 image_input 的直接解码路径。每个场景在独立子进程中运行，测量峰值常驻内存增量与延迟。
+用法（在 LocalOCR 目录下）::
+
+    python -m bench.preprocess [--repeat 10]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from bench.corpus import render_screenshot
+
+_CHILD = r"""
+import hashlib, io, json, statistics, sys, time
+import cv2
+import numpy as np
+from PIL import Image
+import ocr_engine
+from image_input import decode_image
+from bench.memory import peak_since, reset_peak
+
+def legacy(data):
+    image = Image.open(io.BytesIO(data))
+    if image.mode == "RGBA":
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+    h = hashlib.blake2b(digest_size=16)
+    h.update(image.tobytes())
+    return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+
+def current(data):
+    img = decode_image(data)
+    ocr_engine.make_cache_key(img, "accurate", "lines")
+    return img
+
+method = {"legacy": legacy, "current": current}[sys.argv[1]]
+with open(sys.argv[2], "rb") as f:
+    data = f.read()
+repeat = int(sys.argv[3])
+# 峰值内存只统计单个请求，之后的重复只用于测延迟
+base = reset_peak()
+latencies = []
+for i in range(repeat):
+    start = time.perf_counter()
+    img = method(data)
+    latencies.append((time.perf_counter() - start) * 1000)
+    del img
+    if i == 0:
+        peak_mb = peak_since(base)
+print(json.dumps({
+    "peak_mb": peak_mb,
+    "p50_ms": statistics.median(latencies),
+    "mean_ms": statistics.mean(latencies),
+}))
+"""
+
+WIDTH, HEIGHT = 3840, 2160
+
+
+def _run_child(method: str, path: Path, repeat: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD, method, str(path), str(repeat)],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(repeat: int):
+    print(f"{WIDTH}x{HEIGHT} PNG 截图 × {repeat} 次\n")
+    print("| 图片 | 路径 | 峰值内存增量 (MB) | p50 (ms) | 平均 (ms) |")
+    print("| :--- | :--- | ---: | ---: | ---: |")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, transparent in (("RGBA 不透明", False), ("RGBA 阴影透明", True)):
+            path = Path(workdir) / "screenshot.png"
+            path.write_bytes(render_screenshot(WIDTH, HEIGHT, transparent))
+            for method in ("legacy", "current"):
+                result = _run_child(method, path, repeat)
+                print(
+                    f"| {name} | `{method}` | {result['peak_mb']:.0f} | "
+                    f"{result['p50_ms']:.1f} | {result['mean_ms']:.1f} |"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片预处理（解码 / 透明合成）基准测试")
+    parser.add_argument("--repeat", type=int, default=10, help="每个场景重复次数")
+    args = parser.parse_args()
+    run(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+模型档位对比：fp32 vs int8 的延迟、常驻内存与识别准确度
+
+每个档位在独立子进程中运行（内存互不影响），在基准套件的语料（bench.corpus.suite_corpus）上测量
+加载耗时、p50 / 平均延迟、峰值常驻内存（RSS）与各文字（latin / cjk / mixed）的字符相似度，
+输出 Markdown 表格。缺少中日文字体时 cjk / mixed 用例被跳过并在表头注明。
+int8 档位需要先运行 quantize_models.py。用法（在 LocalOCR 目录下）::
+
+    python -m bench.profiles [--sizes small medium] [--repeat 3] [--mode accurate]
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import ort_session
+from bench.corpus import suite_corpus
+
+SCRIPTS = ("latin", "cjk", "mixed")
+
+_CHILD = r"""
+import json, resource, statistics, sys, time
+from config import config
+config.override(ort_model_cache=False)
+import ocr_engine
+from bench.corpus import suite_corpus
+from image_input import decode_image
+from text_metrics import similarity
+
+profile, mode, repeat = sys.argv[1], sys.argv[2], int(sys.argv[3])
+sizes = sys.argv[4:] or None
+start = time.perf_counter()
+ocr_engine.get_ocr_engine(mode, profile)
+load_ms = (time.perf_counter() - start) * 1000
+
+latencies = []
+scores = {}
+for case in suite_corpus(sizes=sizes)[0]:
+    image = decode_image(case.png)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        texts = ocr_engine._ocr_image(image, mode, "lines", profile)["texts"]
+        latencies.append((time.perf_counter() - start) * 1000)
+    scores.setdefault(case.script, []).append(similarity(texts, case.lines))
+
+# Linux 上 ru_maxrss 单位为 KB，macOS 上为字节
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+rss_mb = rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+print(json.dumps({
+    "load_ms": load_ms,
+    "p50_ms": statistics.median(latencies),
+    "mean_ms": statistics.mean(latencies),
+    "rss_mb": rss_mb,
+    "accuracy": {script: statistics.mean(values) for script, values in scores.items()},
+}))
+"""
+
+
+def _run_child(profile: str, mode: str, repeat: int, sizes) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD, profile, mode, str(repeat), *(sizes or [])],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(repeat: int, mode: str, sizes=None):
+    cases, skipped = suite_corpus(sizes=sizes)
+    print(f"模式 `{mode}`，{len(cases)} 张语料图片 × {repeat} 次", end="")
+    if skipped:
+        print(f"（缺少中日文字体，跳过 {', '.join(skipped)}；中文相似度未测量）", end="")
+    print("\n")
+    print(
+        "| 档位 | 加载 (ms) | p50 (ms) | 平均 (ms) | 峰值 RSS (MB) | "
+        + " | ".join(f"相似度 {script}" for script in SCRIPTS) + " |"
+    )
+    print("| :--- | ---: | ---: | ---: | ---: |" + " ---: |" * len(SCRIPTS))
+    for profile in ("fp32", "int8"):
+        result = _run_child(profile, mode, repeat, sizes)
+        accuracy = result["accuracy"]
+        print(
+            f"| `{profile}` | {result['load_ms']:.0f} | {result['p50_ms']:.1f} | "
+            f"{result['mean_ms']:.1f} | {result['rss_mb']:.0f} | "
+            + " | ".join(
+                f"{accuracy[script]:.3f}" if script in accuracy else "跳过" for script in SCRIPTS
+            ) + " |"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fp32 / int8 模型档位对比")
+    parser.add_argument("--repeat", type=int, default=3, help="每张图片重复次数")
+    parser.add_argument("--mode", default="accurate", help="识别模式")
+    parser.add_argument("--sizes", nargs="+", choices=["small", "medium", "large"],
+                        help="只测试这些尺寸（默认全部）")
+    args = parser.parse_args()
+    if not ort_session.int8_available():
+        # 否则 int8 档位回退到 FP32，两行结果是同一个模型
+        parser.error(f"未找到 INT8 模型（{ort_session.int8_model_dir()}），请先运行 python quantize_models.py")
+    run(args.repeat, args.mode, args.sizes)
+
+
+if __name__ == "__main__":
+    main()
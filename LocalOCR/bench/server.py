@@ -0,0 +1,166 @@
+"""
+HTTP 服务基准：Werkzeug 开发服务器 vs asyncio 服务器
+
+每个后端在独立子进程中运行完整的 OCR 服务（关闭结果缓存），父进程用多个
+keep-alive 客户端并发提交 /ocr 请求，同时每 200 ms 探测一次 /health，并采样服务进程的
+线程数与常驻内存。输出吞吐、/ocr 与 /health 延迟、峰值线程数与峰值 RSS。
+用法（在 LocalOCR 目录下）::
+
+    python -m bench.server [--clients 16] [--requests 2] [--mode fast]
+"""
+import argparse
+import http.client
+import io
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from bench.corpus import simple_corpus
+
+_CHILD = r"""
+import sys
+from config import config
+# 修改只在子进程内生效，不写回用户配置文件
+config.override(server_backend=sys.argv[1], cache_enabled=False, mode=sys.argv[3])
+import ocr_server
+ocr_server.run_server(int(sys.argv[2]))
+"""
+
+PORT = 19111
+
+
+def _percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def _proc_status(pid: int) -> dict:
+    """/proc/<pid>/status 中的线程数与 RSS（MB）"""
+    fields = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name == "Threads":
+                fields["threads"] = int(value)
+            elif name == "VmRSS":
+                fields["rss_mb"] = int(value.split()[0]) / 1024
+    return fields
+
+
+def _wait_ready(timeout: float = 300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=5)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("服务启动超时")
+
+
+def _run_backend(backend: str, images: list, clients: int, requests: int, mode: str) -> dict:
+    process = subprocess.Popen(
+        [sys.executable, "-c", _CHILD, backend, str(PORT), mode],
+        cwd=Path(__file__).resolve().parent.parent,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready()
+        stop = threading.Event()
+        latencies, health, samples, errors = [], [], [], []
+
+        def client(index: int):
+            conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=300)
+            for n in range(requests):
+                body = images[(index + n) % len(images)]
+                start = time.perf_counter()
+                conn.request("POST", "/ocr", body=body, headers={"Content-Type": "image/png"})
+                response = conn.getresponse()
+                response.read()
+                latencies.append(time.perf_counter() - start)
+                if response.status != 200:
+                    errors.append(response.status)
+
+        def probe():
+            while not stop.is_set():
+                start = time.perf_counter()
+                conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=60)
+                conn.request("GET", "/health")
+                conn.getresponse().read()
+                conn.close()
+                health.append(time.perf_counter() - start)
+                stop.wait(0.2)
+
+        def sample():
+            while not stop.is_set():
+                samples.append(_proc_status(process.pid))
+                stop.wait(0.1)
+
+        monitors = [threading.Thread(target=probe), threading.Thread(target=sample)]
+        for thread in monitors:
+            thread.start()
+        start = time.perf_counter()
+        workers = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for thread in monitors:
+            thread.join()
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "health_p95_ms": _percentile(health, 0.95) * 1000,
+        "peak_threads": max(s["threads"] for s in samples),
+        "peak_rss_mb": max(s["rss_mb"] for s in samples),
+        "errors": len(errors),
+    }
+
+
+def run(clients: int, requests: int, mode: str):
+    images = []
+    for image, _ in simple_corpus(4):
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG")
+        images.append(buffer.getvalue())
+    print(f"{clients} 个并发客户端 × {requests} 次 /ocr（模式 `{mode}`，关闭结果缓存）\n")
+    print(
+        "| 后端 | 吞吐 (req/s) | /ocr p50 (ms) | /ocr p95 (ms) | /health p95 (ms) "
+        "| 峰值线程数 | 峰值 RSS (MB) | 错误 |"
+    )
+    print("| :--- | ---: | ---: | ---: | ---: | ---: | ---: | ---: |")
+    for backend in ("werkzeug", "asyncio"):
+        result = _run_backend(backend, images, clients, requests, mode)
+        print(
+            f"| `{backend}` | {result['throughput']:.2f} | {result['p50_ms']:.0f} | "
+            f"{result['p95_ms']:.0f} | {result['health_p95_ms']:.0f} | {result['peak_threads']} | "
+            f"{result['peak_rss_mb']:.0f} | {result['errors']} |"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP 服务后端并发基准测试")
+    parser.add_argument("--clients", type=int, default=16, help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=2, help="每个客户端的请求数")
+    parser.add_argument("--mode", default="fast", help="识别模式")
+    args = parser.parse_args()
+    run(args.clients, args.requests, args.mode)
+
+
+if __name__ == "__main__":
+    main()
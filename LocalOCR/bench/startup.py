@@ -0,0 +1,89 @@
+"""
+启动与稳态延迟基准：ONNX 会话配置与优化模型缓存
+
+每个场景在独立子进程中运行（HOME 指向临时目录，模型缓存互不影响），
+测量导入 + 构建引擎的耗时、首次推理耗时，以及之后的稳态延迟。用法（在 LocalOCR 目录下）::
+
+    python -m bench.startup [--images 6] [--repeat 3] [--threads 0]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+_CHILD = r"""
+import json, statistics, sys, time
+start = time.perf_counter()
+from config import config
+config.override(**json.loads(sys.argv[1]))
+import ocr_engine
+from bench.corpus import simple_corpus
+
+ocr_engine.get_ocr_engine("accurate")
+load_ms = (time.perf_counter() - start) * 1000
+
+corpus = list(simple_corpus(int(sys.argv[2])))
+start = time.perf_counter()
+ocr_engine._ocr_image(corpus[0][0], "accurate")
+first_ms = (time.perf_counter() - start) * 1000
+
+latencies = []
+for image, _ in corpus:
+    for _ in range(int(sys.argv[3])):
+        start = time.perf_counter()
+        ocr_engine._ocr_image(image, "accurate")
+        latencies.append((time.perf_counter() - start) * 1000)
+print(json.dumps({
+    "load_ms": load_ms,
+    "first_ms": first_ms,
+    "p50_ms": statistics.median(latencies),
+    "mean_ms": statistics.mean(latencies),
+}))
+"""
+
+
+def _run_child(home: Path, overrides: dict, images: int, repeat: int) -> dict:
+    env = dict(os.environ, HOME=str(home))
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD, json.dumps(overrides), str(images), str(repeat)],
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(images: int, repeat: int, threads: int):
+    base = {"ort_intra_op_threads": threads}
+    scenarios = [
+        ("no cache", dict(base, ort_model_cache=False)),
+        ("cache: first run", dict(base, ort_model_cache=True)),
+        ("cache: cached", dict(base, ort_model_cache=True)),
+    ]
+    print(f"{'scenario':<18}{'load(ms)':>10}{'first(ms)':>11}{'p50(ms)':>10}{'mean(ms)':>10}")
+    with tempfile.TemporaryDirectory() as no_cache_home, tempfile.TemporaryDirectory() as cache_home:
+        homes = [Path(no_cache_home), Path(cache_home), Path(cache_home)]
+        for (name, overrides), home in zip(scenarios, homes):
+            result = _run_child(home, overrides, images, repeat)
+            print(
+                f"{name:<18}{result['load_ms']:>10.0f}{result['first_ms']:>11.0f}"
+                f"{result['p50_ms']:>10.1f}{result['mean_ms']:>10.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX 会话配置 / 模型缓存基准测试")
+    parser.add_argument("--images", type=int, default=6, help="合成图片数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每张图片重复次数")
+    parser.add_argument("--threads", type=int, default=0, help="ort_intra_op_threads（0 = 默认）")
+    args = parser.parse_args()
+    run(args.images, args.repeat, args.threads)
+
+
+if __name__ == "__main__":
+    main()
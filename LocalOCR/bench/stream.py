@@ -0,0 +1,99 @@
+"""
+流式响应基准：首行文本到达时间 vs 完整结果时间
+
+在独立子进程中通过 ocr_server 的 /ocr 流式接口（NDJSON）识别全屏文本截图，
+记录客户端收到 detected 事件、第一条 line 事件与 done 事件的时间，以及普通 JSON
+响应的耗时。重复请求同一张图会命中结果缓存，因此子进程关闭了缓存。
+用法（在 LocalOCR 目录下）::
+
+    python -m bench.stream [--repeat 3] [--mode accurate]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from bench.corpus import render_screenshot
+
+_CHILD = r"""
+import json, statistics, sys, time
+from config import config
+# 修改只在子进程内生效，不写回用户配置文件（识别计数也不保存）
+config.override(cache_enabled=False, ort_model_cache=False)
+import ocr_server
+
+with open(sys.argv[1], "rb") as f:
+    body = f.read()
+mode, repeat = sys.argv[2], int(sys.argv[3])
+client = ocr_server.app.test_client()
+
+# 第一次请求加载模型，不计入
+client.post("/ocr", data=body, content_type="image/png", query_string={"mode": mode})
+
+timings = {"detected_ms": [], "first_line_ms": [], "done_ms": [], "json_ms": []}
+for _ in range(repeat):
+    start = time.perf_counter()
+    response = client.post(
+        "/ocr", data=body, content_type="image/png",
+        query_string={"mode": mode, "stream": "ndjson"}, buffered=False,
+    )
+    first_line = None
+    for chunk in response.response:
+        elapsed = (time.perf_counter() - start) * 1000
+        event = json.loads(chunk)["event"]
+        if event == "detected":
+            timings["detected_ms"].append(elapsed)
+        elif event == "line" and first_line is None:
+            first_line = elapsed
+        elif event == "done":
+            timings["done_ms"].append(elapsed)
+    timings["first_line_ms"].append(first_line)
+    response.close()
+
+    start = time.perf_counter()
+    client.post("/ocr", data=body, content_type="image/png", query_string={"mode": mode})
+    timings["json_ms"].append((time.perf_counter() - start) * 1000)
+
+print(json.dumps({name: statistics.median(values) for name, values in timings.items()}))
+"""
+
+WIDTH, HEIGHT = 3840, 2160
+
+
+def _run_child(path: Path, mode: str, repeat: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD, str(path), mode, str(repeat)],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(repeat: int, mode: str):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "screenshot.png"
+        path.write_bytes(render_screenshot(WIDTH, HEIGHT))
+        result = _run_child(path, mode, repeat)
+    print(f"{WIDTH}x{HEIGHT} 全屏文本截图，模式 `{mode}` × {repeat} 次（p50）\n")
+    print("| 检测完成 (ms) | 首行文本 (ms) | 流式完成 (ms) | 普通 JSON 响应 (ms) |")
+    print("| ---: | ---: | ---: | ---: |")
+    print(
+        f"| {result['detected_ms']:.0f} | {result['first_line_ms']:.0f} | "
+        f"{result['done_ms']:.0f} | {result['json_ms']:.0f} |"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/ocr 流式响应基准测试")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数")
+    parser.add_argument("--mode", default="accurate", help="识别模式")
+    args = parser.parse_args()
+    run(args.repeat, args.mode)
+
+
+if __name__ == "__main__":
+    main()
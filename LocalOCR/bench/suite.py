@@ -0,0 +1,279 @@
+"""
+引擎基准套件：确定性合成语料 × 识别模式 × 并发数，结果保存为 JSON 并可与基线比较
+
+语料由 bench.corpus.suite_corpus 用本机字体渲染（latin / cjk / mixed 文字，三种尺寸，
+浅色 / 深色 / 渐变 / 窗口界面背景），缺少中日文字体时跳过相应用例并在结果中注明。
+在进程内调用 ocr_engine（图片解码 + 检测 + 识别，不经过结果缓存与请求合并），输出
+p50 / p95 / p99 延迟、吞吐、峰值 RSS、各阶段平均耗时与文本相似度。全程不需要联网。
+用法（在 LocalOCR 目录下）::
+
+    python -m bench.suite [--modes fast accurate] [--concurrency 1 2] [--repeat 3]
+                          [--output result.json] [--baseline baseline.json]
+
+指定 --baseline 时逐项比较，超过阈值的退化会列出并以退出码 1 结束（可用于 CI）。
+"""
+import argparse
+import ctypes
+import ctypes.util
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import metrics
+import ocr_engine
+from bench.corpus import suite_corpus
+from bench.memory import peak_since, reset_peak
+from image_input import decode_image
+from text_metrics import similarity
+
+SCHEMA_VERSION = 1
+
+# 默认退化阈值：延迟 / 内存增加超过该比例、吞吐下降超过该比例、相似度下降超过该绝对值
+DEFAULT_THRESHOLDS = {
+    "latency": 0.20,
+    "throughput": 0.15,
+    "rss": 0.20,
+    "accuracy": 0.02,
+}
+
+# (指标, 阈值类别, 越大越好)
+COMPARED_METRICS = [
+    ("p50_ms", "latency", False),
+    ("p95_ms", "latency", False),
+    ("p99_ms", "latency", False),
+    ("images_per_sec", "throughput", True),
+    ("peak_rss_mb", "rss", False),
+    ("accuracy", "accuracy", True),
+]
+
+
+def percentile(values, q: float) -> float:
+    """最近秩百分位（q 为 0~1）"""
+    values = sorted(values)
+    index = max(int(round(q * len(values) + 0.5)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def _environment() -> dict:
+    """结果对应的运行环境（比较前确认基线来自同一类机器）"""
+    import onnxruntime
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "onnxruntime": onnxruntime.__version__,
+        "commit": commit,
+    }
+
+
+def _release_memory():
+    """把上一轮释放的内存还给系统，使各轮的 RSS 基线可比（glibc 才有 malloc_trim）"""
+    gc.collect()
+    try:
+        ctypes.CDLL(ctypes.util.find_library("c") or None).malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _run_one(case, mode: str) -> dict:
+    """识别一张图片，返回耗时、阶段耗时与相似度"""
+    with metrics.capture() as observations:
+        start = time.perf_counter()
+        with metrics.stage("image_decode"):
+            img = decode_image(case.png)
+        result = ocr_engine._ocr_image(img, mode, "lines")
+        elapsed = (time.perf_counter() - start) * 1000
+    stages = {}
+    for name, value, labels in observations:
+        if name == metrics.STAGE_LATENCY.name:
+            stages[labels["stage"]] = stages.get(labels["stage"], 0.0) + value * 1000
+    return {
+        "case": case.name,
+        "ms": elapsed,
+        "stages": stages,
+        "accuracy": similarity(result["texts"], case.lines),
+    }
+
+
+def run_config(cases, mode: str, concurrency: int, repeat: int) -> dict:
+    """一种模式、一个并发数下的结果"""
+    tasks = [case for _ in range(repeat) for case in cases]
+    _release_memory()
+    base = reset_peak()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        runs = list(executor.map(lambda case: _run_one(case, mode), tasks))
+    wall = time.perf_counter() - start
+    peak = peak_since(base)
+
+    latencies = [r["ms"] for r in runs]
+    stage_names = sorted({name for r in runs for name in r["stages"]})
+    per_case = {}
+    for case in cases:
+        values = [r["ms"] for r in runs if r["case"] == case.name]
+        per_case[case.name] = {"p50_ms": round(statistics.median(values), 1)}
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "images": len(runs),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "images_per_sec": round(len(runs) / wall, 3),
+        # 进程峰值 RSS（含已加载的模型）与本轮运行中的增量
+        "peak_rss_mb": round(base + peak, 1),
+        "rss_increase_mb": round(peak, 1),
+        "accuracy": round(statistics.mean(r["accuracy"] for r in runs), 4),
+        "stages_ms": {
+            name: round(statistics.mean(r["stages"].get(name, 0.0) for r in runs), 1)
+            for name in stage_names
+        },
+        "cases": per_case,
+    }
+
+
+def run_suite(modes, concurrency_levels, repeat: int, sizes=None) -> dict:
+    cases, skipped = suite_corpus(sizes=sizes)
+    if not cases:
+        raise RuntimeError("没有可用的基准图片")
+    results = {}
+    load_seconds = {}
+    for mode in modes:
+        # 加载模型并预热，不计入结果
+        start = time.perf_counter()
+        ocr_engine.get_ocr_engine(mode)
+        load_seconds[mode] = round(time.perf_counter() - start, 2)
+        _run_one(cases[0], mode)
+        for concurrency in concurrency_levels:
+            key = f"{mode}/c{concurrency}"
+            print(f"运行 {key}（{len(cases)} 张图片 × {repeat} 次）...", file=sys.stderr)
+            results[key] = run_config(cases, mode, concurrency, repeat)
+    return {
+        "schema": SCHEMA_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": _environment(),
+        "corpus": {
+            "cases": [
+                {"name": c.name, "script": c.script, "size": f"{c.width}x{c.height}",
+                 "lines": len(c.lines)}
+                for c in cases
+            ],
+            "skipped": skipped,
+        },
+        "repeat": repeat,
+        "load_seconds": load_seconds,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, thresholds: dict) -> list:
+    """返回退化列表 [(配置, 指标, 基线值, 当前值, 变化)]"""
+    regressions = []
+    for key, result in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            continue
+        for metric, category, higher_is_better in COMPARED_METRICS:
+            old, new = base.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            limit = thresholds[category]
+            if category == "accuracy":
+                change = new - old
+                regressed = change < -limit
+            else:
+                change = (new - old) / old if old else 0.0
+                regressed = change < -limit if higher_is_better else change > limit
+            if regressed:
+                regressions.append((key, metric, old, new, change))
+    return regressions
+
+
+def print_report(report: dict):
+    print(f"\n语料: {len(report['corpus']['cases'])} 张图片 × {report['repeat']} 次", end="")
+    if report["corpus"]["skipped"]:
+        print(f"（缺少中日文字体，跳过 {', '.join(report['corpus']['skipped'])}）", end="")
+    print("\n")
+    print("| 配置 | p50 (ms) | p95 (ms) | p99 (ms) | 吞吐 (张/s) | 峰值 RSS (MB) | 相似度 |")
+    print("| :--- | ---: | ---: | ---: | ---: | ---: | ---: |")
+    for key, r in report["results"].items():
+        print(
+            f"| `{key}` | {r['p50_ms']:.0f} | {r['p95_ms']:.0f} | {r['p99_ms']:.0f} | "
+            f"{r['images_per_sec']:.2f} | {r['peak_rss_mb']:.0f} | {r['accuracy']:.3f} |"
+        )
+    stage_names = sorted({name for r in report["results"].values() for name in r["stages_ms"]})
+    print("\n各阶段平均耗时 (ms):\n")
+    print("| 配置 | " + " | ".join(stage_names) + " |")
+    print("| :--- | " + " | ".join("---:" for _ in stage_names) + " |")
+    for key, r in report["results"].items():
+        print(f"| `{key}` | " + " | ".join(
+            f"{r['stages_ms'].get(name, 0):.0f}" for name in stage_names) + " |")
+
+
+def print_comparison(regressions: list, current: dict, baseline: dict):
+    env, base_env = current["environment"], baseline.get("environment", {})
+    for field in ("machine", "cpu_count", "onnxruntime"):
+        if env.get(field) != base_env.get(field):
+            print(f"注意: 基线的 {field} 为 {base_env.get(field)}，当前为 {env.get(field)}")
+    missing = sorted(set(baseline.get("results", {})) - set(current["results"]))
+    if missing:
+        print(f"注意: 基线中的 {', '.join(missing)} 本次未运行")
+    if not regressions:
+        print(f"\n与基线（{base_env.get('commit') or baseline.get('created')}）相比没有超过阈值的退化")
+        return
+    print("\n超过阈值的退化:\n")
+    print("| 配置 | 指标 | 基线 | 当前 | 变化 |")
+    print("| :--- | :--- | ---: | ---: | ---: |")
+    for key, metric, old, new, change in regressions:
+        shown = f"{change:+.3f}" if metric == "accuracy" else f"{change:+.1%}"
+        print(f"| `{key}` | {metric} | {old} | {new} | {shown} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 引擎基准套件")
+    parser.add_argument("--modes", nargs="+", default=list(ocr_engine.MODE_PROFILES),
+                        help="识别模式")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 2],
+                        help="并发线程数")
+    parser.add_argument("--repeat", type=int, default=3, help="每张图片重复次数")
+    parser.add_argument("--sizes", nargs="+", choices=["small", "medium", "large"],
+                        help="只运行这些尺寸的图片")
+    parser.add_argument("--output", help="结果 JSON 的保存路径")
+    parser.add_argument("--baseline", help="与此基线 JSON 比较，出现退化时退出码为 1")
+    for category, default in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--{category}-threshold", type=float, default=default,
+                            help=f"{category} 退化阈值（默认 {default}）")
+    args = parser.parse_args()
+
+    report = run_suite(args.modes, args.concurrency, args.repeat, args.sizes)
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"\n结果已保存到 {args.output}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        thresholds = {c: getattr(args, f"{c}_threshold") for c in DEFAULT_THRESHOLDS}
+        regressions = compare(report, baseline, thresholds)
+        print_comparison(regressions, report, baseline)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
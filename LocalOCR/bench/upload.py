@@ -0,0 +1,142 @@
+"""
+上传格式基准：/ocr 请求体 -> 模型输入 BGR 数组
+
+对比 Base64 JSON、PNG 请求体、multipart 与未压缩 BGRA 像素四种上传方式：
+客户端编码耗时（从截图得到的像素开始）、请求体大小，以及服务端解析请求 + 解码的耗时与
+峰值内存增量（每种格式在独立子进程中运行，走 ocr_server 的请求解析代码）。
+用法（在 LocalOCR 目录下）::
+
+    python -m bench.upload [--repeat 10]
+"""
+import argparse
+import base64
+import io
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from werkzeug.datastructures import FileStorage
+from werkzeug.test import encode_multipart
+
+from bench.corpus import render_screenshot
+
+_CHILD = r"""
+import io, json, statistics, sys, time
+from werkzeug.test import EnvironBuilder
+import ocr_server
+from image_input import decode_image
+from ocr_engine import decode_base64
+from bench.memory import peak_since, reset_peak
+
+with open(sys.argv[1], "rb") as f:
+    body = f.read()
+content_type, headers, repeat = sys.argv[2], json.loads(sys.argv[3]), int(sys.argv[4])
+
+def ingest():
+    environ = EnvironBuilder(
+        path="/ocr", method="POST", input_stream=io.BytesIO(body), content_length=len(body),
+        content_type=content_type, headers=headers,
+    ).get_environ()
+    with ocr_server.app.request_context(environ):
+        kind, image, _ = ocr_server._parse_upload()
+        if kind == "base64":
+            return decode_image(decode_base64(image))
+        if kind == "bytes":
+            return decode_image(image)
+        return image
+
+# 峰值内存只统计单个请求，之后的重复只用于测延迟
+base = reset_peak()
+latencies = []
+for i in range(repeat):
+    start = time.perf_counter()
+    img = ingest()
+    latencies.append((time.perf_counter() - start) * 1000)
+    del img
+    if i == 0:
+        peak_mb = peak_since(base)
+print(json.dumps({
+    "peak_mb": peak_mb,
+    "p50_ms": statistics.median(latencies),
+}))
+"""
+
+WIDTH, HEIGHT = 3840, 2160
+
+
+def _timed(func, repeat: int):
+    """返回 (结果, p50 毫秒)"""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(latencies)
+
+
+def _requests(bgra: np.ndarray, repeat: int):
+    """生成各上传方式的 (名称, 客户端编码 ms, 请求体, Content-Type, 请求头)"""
+    png, png_ms = _timed(lambda: cv2.imencode(".png", bgra)[1].tobytes(), repeat)
+
+    def to_json():
+        return json.dumps({"image": base64.b64encode(png).decode("ascii")}).encode("utf-8")
+
+    body, json_ms = _timed(to_json, repeat)
+    yield "Base64 JSON", png_ms + json_ms, body, "application/json", {}
+
+    yield "PNG 请求体", png_ms, png, "image/png", {}
+
+    boundary, body = encode_multipart(
+        {"image": FileStorage(io.BytesIO(png), "screenshot.png", content_type="image/png")}
+    )
+    yield "multipart", png_ms, body, f"multipart/form-data; boundary={boundary}", {}
+
+    height, width = bgra.shape[:2]
+    body, raw_ms = _timed(bgra.tobytes, repeat)
+    headers = {"X-Image-Width": str(width), "X-Image-Height": str(height), "X-Pixel-Format": "bgra"}
+    yield "BGRA 像素", raw_ms, body, "application/x-snaptext-pixels", headers
+
+
+def _run_child(path: Path, content_type: str, headers: dict, repeat: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD, str(path), content_type, json.dumps(headers), str(repeat)],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(repeat: int):
+    png = render_screenshot(WIDTH, HEIGHT, transparent=True)
+    bgra = cv2.imdecode(np.frombuffer(png, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    print(f"{WIDTH}x{HEIGHT} 带透明阴影的截图 × {repeat} 次\n")
+    print("| 上传方式 | 请求体 (MB) | 客户端编码 (ms) | 服务端解析+解码 p50 (ms) | 服务端峰值内存增量 (MB) |")
+    print("| :--- | ---: | ---: | ---: | ---: |")
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "body"
+        for name, client_ms, body, content_type, headers in _requests(bgra, repeat):
+            path.write_bytes(body)
+            result = _run_child(path, content_type, headers, repeat)
+            print(
+                f"| {name} | {len(body) / 1e6:.1f} | {client_ms:.0f} | "
+                f"{result['p50_ms']:.0f} | {result['peak_mb']:.0f} |"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/ocr 上传格式基准测试")
+    parser.add_argument("--repeat", type=int, default=10, help="每种格式重复次数")
+    args = parser.parse_args()
+    run(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
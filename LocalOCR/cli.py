@@ -0,0 +1,252 @@
+"""
+命令行批量识别 - snaptext ocr <路径...> [--jobs N] [--mode fast|accurate] [--out results.jsonl]
+
+目录按需逐层遍历（不预先列出全部文件），图片分发给 OCR 进程池的 worker，
+结果按完成顺序逐行写入 JSONL。输出文件中已有的图片（按 路径 + mtime + 大小 判断）
+会被跳过，中断后重新运行同一命令即可从上次的位置继续。
+PDF 与多帧 TIFF 逐页识别，每个文档一行，逐页结果在 pages 中。
+
+用法::
+
+    python main.py ocr ~/Pictures/scans --jobs 4 --mode fast --out results.jsonl
+    SnapText.app/Contents/MacOS/SnapText ocr ...   # 打包后的应用
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, Optional, Set, Tuple
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp", ".gif")
+# 多页文档（多帧 TIFF 按文件头识别，扩展名同图片）
+DOCUMENT_EXTENSIONS = (".pdf",)
+
+FileKey = Tuple[str, int, int]
+
+
+def iter_images(
+    paths, extensions=IMAGE_EXTENSIONS + DOCUMENT_EXTENSIONS
+) -> Iterator[Tuple[str, os.stat_result]]:
+    """
+    逐个产出 (绝对路径, stat)：文件直接产出，目录用 os.scandir 深度优先逐层遍历
+
+    目录内按文件名排序，多次运行的处理顺序相同；隐藏文件与目录跳过
+    """
+    for path in paths:
+        path = os.path.abspath(os.path.expanduser(path))
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            print(f"跳过 {path}: {e}", file=sys.stderr)
+            continue
+        if not os.path.isdir(path):
+            yield path, st
+            continue
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                print(f"跳过 {directory}: {e}", file=sys.stderr)
+                continue
+            subdirs = []
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.lower().endswith(extensions):
+                        yield entry.path, entry.stat()
+                except OSError:
+                    continue
+            # 倒序入栈，保持按名称的遍历顺序
+            stack.extend(reversed(subdirs))
+
+
+def file_key(path: str, st: os.stat_result) -> FileKey:
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def load_done(out_path: Optional[str]) -> Set[FileKey]:
+    """输出文件中已成功识别的图片；最后一行不完整（上次运行被中断）时忽略"""
+    done = set()
+    if not out_path or out_path == "-" or not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "error" not in record:
+                done.add((record["path"], record["mtime_ns"], record["size"]))
+    return done
+
+
+def _open_output(out_path: Optional[str]):
+    if not out_path or out_path == "-":
+        return sys.stdout
+    # 上次运行中断时最后一行可能没有换行，先补上再追加
+    if os.path.exists(out_path) and os.path.getsize(out_path) > 0:
+        with open(out_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+        if needs_newline:
+            with open(out_path, "a", encoding="utf-8") as f:
+                f.write("\n")
+    return open(out_path, "a", encoding="utf-8")
+
+
+def _configure(jobs: int, dpi: Optional[int] = None):
+    """
+    本次运行的配置（config.override：只在内存中生效，不写回用户配置文件，并传给 worker 进程）
+
+    jobs > 1 时启动 jobs 个 worker 进程；批量识别的图片各不相同，关闭结果缓存
+    """
+    from config import config
+
+    overrides = {"pool_size": jobs if jobs > 1 else 0, "cache_enabled": False, "warmup": False}
+    if dpi:
+        overrides["document_dpi"] = dpi
+    config.override(**overrides)
+
+
+def _as_completed(futures):
+    """按完成顺序产出 future"""
+    remaining = set(futures)
+    while remaining:
+        finished, remaining = wait(remaining, return_when=FIRST_COMPLETED)
+        yield from finished
+
+
+def _drain(pending, emit, quiet: bool):
+    """
+    中断后的收尾：取消尚未开始的任务，等待进行中的任务完成并写入结果（下次运行时跳过）
+
+    等待期间再次 Ctrl-C 则不再等待，只写入已经完成的结果
+    """
+    running = {future for future in pending if not future.cancel()}
+    if not quiet and running:
+        print(f"已中断，等待进行中的 {len(running)} 个任务完成（再次 Ctrl-C 立即退出）...", file=sys.stderr)
+    remaining = running
+    try:
+        while remaining:
+            finished, remaining = wait(remaining, return_when=FIRST_COMPLETED)
+            for future in finished:
+                emit(future.result())
+    except KeyboardInterrupt:
+        for future in remaining:
+            if future.done():
+                emit(future.result())
+
+
+def run(args) -> int:
+    _configure(args.jobs, args.dpi)
+    import ocr_engine
+
+    mode = ocr_engine.resolve_mode(args.mode)
+    layout = ocr_engine.resolve_layout(args.layout)
+    done = load_done(args.out)
+    out = _open_output(args.out)
+    write_lock = threading.Lock()
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    start = time.perf_counter()
+
+    def process(path: str, st: os.stat_result) -> dict:
+        record = {"path": path, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        task_start = time.perf_counter()
+        try:
+            result = ocr_engine.ocr_detailed_from_file(path, mode, layout)
+            record["texts"] = result["texts"]
+            record["from"] = result["from"]
+            for field in ("blocks", "pages"):
+                if field in result:
+                    record[field] = result[field]
+        except Exception as e:
+            record["error"] = str(e)
+        record["elapsed_ms"] = round((time.perf_counter() - task_start) * 1000, 1)
+        return record
+
+    def emit(record: dict):
+        with write_lock:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            counts["error" if "error" in record else "ok"] += 1
+            if not args.quiet:
+                total = counts["ok"] + counts["error"]
+                rate = total / (time.perf_counter() - start)
+                status = "失败" if "error" in record else f"{len(record['texts'])} 行"
+                print(f"[{total}] {record['path']}: {status}（{rate:.2f} 张/s）", file=sys.stderr)
+
+    # 同时在途的任务不超过 jobs 的两倍：目录遍历随处理进度推进，不会一次列出全部文件
+    max_pending = max(args.jobs, 1) * 2
+    pending = set()
+    interrupted = False
+    try:
+        with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+            try:
+                for path, st in iter_images(args.paths):
+                    if file_key(path, st) in done:
+                        counts["skipped"] += 1
+                        continue
+                    if len(pending) >= max_pending:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            emit(future.result())
+                    pending.add(executor.submit(process, path, st))
+                for future in _as_completed(pending):
+                    emit(future.result())
+            except KeyboardInterrupt:
+                interrupted = True
+                _drain(pending, emit, args.quiet)
+                # 进行中的任务已结束或放弃，在退出线程池之前关闭进程池
+                ocr_engine.shutdown_ocr_pool()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        ocr_engine.shutdown_ocr_pool()
+
+    elapsed = time.perf_counter() - start
+    processed = counts["ok"] + counts["error"]
+    print(
+        f"完成 {counts['ok']} 张，失败 {counts['error']} 张，跳过已识别 {counts['skipped']} 张，"
+        f"耗时 {elapsed:.1f} s（{processed / elapsed if elapsed else 0:.2f} 张/s）"
+        + ("，已中断" if interrupted else ""),
+        file=sys.stderr,
+    )
+    if interrupted:
+        return 130
+    return 1 if counts["error"] else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="snaptext", description="SnapText 命令行")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ocr = commands.add_parser("ocr", help="批量识别图片、PDF 文件或目录")
+    ocr.add_argument("paths", nargs="+", help="图片 / PDF 文件或目录（递归遍历）")
+    ocr.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                     help="并行 worker 进程数（默认 CPU 核数，1 = 在当前进程内识别）")
+    ocr.add_argument("--mode", choices=["fast", "accurate"], help="识别模式（默认使用配置）")
+    ocr.add_argument("--layout", choices=["lines", "blocks"], help="版面模式（默认使用配置）")
+    ocr.add_argument("--dpi", type=int, help="PDF 栅格化分辨率（默认使用配置）")
+    ocr.add_argument("--out", "-o", default="-",
+                     help="JSONL 输出文件（追加写入，已识别的图片跳过；默认标准输出）")
+    ocr.add_argument("--quiet", "-q", action="store_true", help="不输出逐张进度")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "ocr":
+        return run(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,68 @@
 """
 配置管理模块
 """
+import atexit
+import copy
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date
 from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 class Config:
     """应用配置管理"""
     
+    # 识别计数写回磁盘的最短间隔（秒）
+    STATS_FLUSH_INTERVAL = 5.0
+    
     # 默认配置
     DEFAULTS = {
         "port": 9999,
         "language": "auto",  # auto, zh, en, ja, ko
         "mode": "accurate",  # fast, accurate
+        "layout": "blocks",  # lines（仅按行合并）, blocks（多栏版面分析）
+        "model_profile": "fp32",  # fp32（RapidOCR 自带模型）, int8（quantize_models.py 生成的量化模型）
+        "warmup": True,  # 启动后在后台预加载模型
         "launch_at_login": False,
         "silent_mode": True,  # 静默模式（通知而非弹窗）
         "hotkey": "<cmd>+<shift>+o",  # 默认截图快捷键 (pynput格式)
-        "history_limit": 20,
+        "capture_method": "clipboard",  # clipboard（经剪贴板，不写临时文件）, file（临时文件，不占用剪贴板）
+        "history_limit": 20,  # /history 每页默认条数
+        "history_enabled": False,  # 识别历史（~/.snaptext/history.sqlite3，支持全文检索；需要手动开启）
+        "history_max_entries": 100000,  # 超过后删除最旧的记录
+        "history_max_bytes": 256 * 1024 * 1024,  # 历史数据库大小上限
+        "history_thumbnails": False,  # 保存截图缩略图（最长边 160 像素的 JPEG）
+        "pool_size": 0,  # OCR 进程池 worker 数（0 = 在服务进程内执行）
+        "rec_batch_size": 6,  # 文本识别每个 ONNX 批次的行数（RapidOCR 默认 6）
+        "tile_size": 1536,  # 超大截图分块检测的块边长（0 = 关闭分块）
+        "tile_overlap": 128,  # 相邻块重叠像素
+        "tile_threshold": 3200,  # 最长边超过该值才分块检测（仅 accurate 模式；更小的图整体缩小后检测）
+        "tile_workers": 0,  # 分块检测线程数（0 = CPU 核数）
+        "document_dpi": 200,  # PDF 页面栅格化分辨率
+        "document_pages_in_flight": 0,  # 多页文档同时识别的页数上限（0 = 进程池 worker 数 + 1，未启用进程池时为 2）
+        "cache_enabled": True,  # 识别结果缓存
+        "cache_max_entries": 256,
+        "cache_max_bytes": 8 * 1024 * 1024,
+        "cache_persist": False,  # 持久化到 ~/.snaptext/ocr_cache.sqlite3
+        "ort_intra_op_threads": 0,  # 单个算子内的线程数（0 = ONNX Runtime 默认）
+        "ort_inter_op_threads": 0,  # 算子间并行线程数（仅 parallel 执行模式有效）
+        "ort_graph_optimization": "all",  # disable, basic, extended, all
+        "ort_execution_mode": "sequential",  # sequential, parallel
+        "ort_cpu_mem_arena": False,  # CPU 内存 arena（RapidOCR 默认关闭）
+        "ort_model_cache": True,  # 缓存优化后的模型到 ~/.snaptext/models
+        "max_upload_bytes": 128 * 1024 * 1024,  # /ocr 请求体上限（超过返回 413）
+        "server_backend": "asyncio",  # asyncio（事件循环 + 固定线程池）, werkzeug（开发服务器）
+        "server_workers": 4,  # 同时执行的 POST 请求数（asyncio 模式）
+        "server_keepalive_timeout": 15,  # 空闲 keep-alive 连接保持秒数
+        "server_queue_size": 16,  # 等待执行的 POST 请求上限，排满后返回 429（asyncio 模式）
         "stats": {
             "today_count": 0,
             "total_count": 0,
@@ -27,44 +73,132 @@ class Config:
     def __init__(self):
         self.config_dir = Path.home() / ".snaptext"
         self.config_file = self.config_dir / "config.json"
+        self.lock_file = self.config_dir / "config.lock"
         self.history_file = self.config_dir / "history.json"
         self.log_file = self.config_dir / "service.log"
         
         # 确保目录存在
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
-        # 加载配置
-        self._load()
-    
-    def reload(self):
-        """重新从磁盘加载配置"""
-        self._load()
-    
-    def _load(self):
-        """加载配置"""
+        # _config 是内存中的配置快照，读取配置不访问磁盘；
+        # 文件的 (mtime, inode, 大小) 变化时才重新解析
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._signature = None
+        # 本进程修改过、尚未写回的配置项（保存时只写这些项，不覆盖其他进程的修改）
+        self._dirty_keys = set()
+        # 识别计数只在内存中累加，由后台定时器批量写回
+        self._stats_dirty = False
+        self._flush_timer = None
+        self._subscribers = []
+        self._watcher = None
+        # 只在本进程内生效的配置（override），设置后本进程不再写回配置文件
+        self._overrides = {}
+        
         # 旧目录（用于迁移）
         self._old_config_dir = Path.home() / ".local_ocr"
+        self._migrate_old_config()  # 迁移旧配置（只在启动时检查一次）
         
-        # 确保配置目录存在 (虽然__init__中已创建，但_migrate_old_config可能需要)
-        self._ensure_config_dir()
-        self._migrate_old_config()  # 迁移旧配置
-        
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, "r", encoding="utf-8") as f:
-                    saved = json.load(f)
-                    # 合并默认配置
-                    config = self.DEFAULTS.copy()
-                    config.update(saved)
-                    self._config = config
-                    return
-            except Exception:
-                pass
-        self._config = self.DEFAULTS.copy()
+        # 加载配置
+        self._config, self._signature = self._read_file()
+        atexit.register(self._flush_at_exit)
     
-    def _ensure_config_dir(self):
-        """确保配置目录存在"""
-        self.config_dir.mkdir(parents=True, exist_ok=True)
+    def reload(self) -> set:
+        """
+        配置文件变化时重新加载，返回变化的配置项
+
+        只比较文件的 stat，文件未变化时不读取内容。本进程还有尚未写回的修改
+        （识别计数、未保存的配置项）时保留内存中的值。
+        """
+        if self._file_signature() == self._signature:
+            return set()
+        with self._save_lock:
+            saved, signature = self._read_file()
+            changed = self._apply(saved, signature)
+        self._notify(changed)
+        return changed
+    
+    def subscribe(self, callback: Callable[[set], None], keys: Optional[Iterable[str]] = None):
+        """
+        订阅配置变更：其他进程修改配置文件后，以变化的配置项集合调用 callback
+
+        keys 不为空时只在这些项变化时调用。callback 在监听线程中执行
+        """
+        with self._lock:
+            self._subscribers.append((callback, frozenset(keys) if keys else None))
+    
+    def watch(self):
+        """启动后台监听（Linux 用 inotify，其他平台定期比较 stat），变化时自动 reload"""
+        from file_watch import FileWatcher
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = FileWatcher(self.config_file, self.reload)
+                self._watcher.start()
+    
+    def _file_signature(self):
+        try:
+            st = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+    
+    def _read_file(self):
+        """读取配置文件并合并默认配置，返回 (配置, 文件签名)"""
+        config = copy.deepcopy(self.DEFAULTS)
+        signature = None
+        try:
+            with open(self.config_file, "r", encoding="utf-8") as f:
+                st = os.fstat(f.fileno())
+                signature = (st.st_mtime_ns, st.st_ino, st.st_size)
+                config.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"读取配置失败: {e}")
+        return config, signature
+    
+    def _apply(self, saved: dict, signature) -> set:
+        """用磁盘上的配置替换快照（保留本进程未写回的修改），返回变化的配置项"""
+        with self._lock:
+            merged = dict(saved)
+            for key in self._dirty_keys:
+                merged[key] = self._config[key]
+            if self._stats_dirty:
+                merged["stats"] = self._config["stats"]
+            merged.update(self._overrides)
+            changed = {
+                key for key in set(merged) | set(self._config)
+                if key != "stats" and merged.get(key) != self._config.get(key)
+            }
+            self._config = merged
+            self._signature = signature
+        return changed
+    
+    def _notify(self, changed: set):
+        """通知订阅者（在释放锁之后调用，回调中可以再读写配置）"""
+        if not changed:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, keys in subscribers:
+            if keys is None or keys & changed:
+                try:
+                    callback(changed)
+                except Exception as e:
+                    print(f"配置变更回调失败: {e}")
+    
+    @contextmanager
+    def _file_lock(self):
+        """跨进程写锁（设置窗口与主程序是两个进程）"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
     
     def _migrate_old_config(self):
         """从旧目录迁移配置（如果存在且新配置不存在）"""
@@ -79,24 +213,75 @@ class Config:
             except Exception as e:
                 print(f"迁移配置失败: {e}")
     
-    def _load_config(self) -> dict:
-        """加载配置"""
-        if self.config_file.exists():
+    def save(self):
+        """
+        保存本进程修改过的配置项与识别计数
+
+        持有文件锁读取磁盘上的最新配置，只覆盖本进程修改的项后原子写回，
+        其他进程同时保存的修改不会丢失。用 override() 覆盖过配置的进程不写文件
+        """
+        if self._overrides:
+            return
+        with self._save_lock, self._file_lock():
+            saved, signature = self._read_file()
+            # 先合并磁盘上的新内容（其他进程的修改），再写回
+            changed = self._apply(saved, signature)
+            with self._lock:
+                data = copy.deepcopy(self._config)
+                keys, self._dirty_keys = self._dirty_keys, set()
+                stats_dirty, self._stats_dirty = self._stats_dirty, False
+            if keys or stats_dirty or signature is None:
+                try:
+                    self._signature = self._write(data)
+                except BaseException:
+                    with self._lock:
+                        self._dirty_keys |= keys
+                        self._stats_dirty = self._stats_dirty or stats_dirty
+                    raise
+        self._notify(changed)
+    
+    def override(self, **values):
+        """
+        只在本进程内覆盖配置项（如命令行批量识别的进程数、关闭缓存）
+
+        覆盖的值在重新加载配置文件后依然有效；调用后本进程不再写回配置文件
+        （包括识别计数），用户的配置不受影响
+        """
+        unknown = set(values) - set(self.DEFAULTS)
+        if unknown:
+            raise KeyError(f"未知的配置项: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self._overrides.update(values)
+            self._config.update(values)
+    
+    @property
+    def overrides(self) -> dict:
+        """override() 覆盖的配置项（进程池把它传给 worker 进程）"""
+        with self._lock:
+            return dict(self._overrides)
+    
+    def _set(self, key: str, value):
+        with self._lock:
+            self._config[key] = value
+            self._dirty_keys.add(key)
+        self.save()
+    
+    def _write(self, data: dict):
+        """原子写入配置文件：先写临时文件再 rename，读者不会看到写了一半的文件；返回新文件签名"""
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".config.", suffix=".tmp", dir=self.config_dir
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.config_file)
+        except BaseException:
             try:
-                with open(self.config_file, "r", encoding="utf-8") as f:
-                    saved = json.load(f)
-                    # 合并默认配置
-                    config = self.DEFAULTS.copy()
-                    config.update(saved)
-                    return config
-            except Exception:
+                os.unlink(tmp_path)
+            except OSError:
                 pass
-        return self.DEFAULTS.copy()
-    
-    def save(self):
-        """保存配置"""
-        with open(self.config_file, "w", encoding="utf-8") as f:
-            json.dump(self._config, f, ensure_ascii=False, indent=2)
+            raise
+        return self._file_signature()
     
     @property
     def port(self) -> int:
@@ -104,8 +289,7 @@ class Config:
     
     @port.setter
     def port(self, value: int):
-        self._config["port"] = value
-        self.save()
+        self._set("port", value)
     
     @property
     def language(self) -> str:
@@ -113,8 +297,7 @@ class Config:
     
     @language.setter
     def language(self, value: str):
-        self._config["language"] = value
-        self.save()
+        self._set("language", value)
     
     @property
     def mode(self) -> str:
@@ -122,8 +305,19 @@ class Config:
     
     @mode.setter
     def mode(self, value: str):
-        self._config["mode"] = value
-        self.save()
+        self._set("mode", value)
+    
+    @property
+    def layout(self) -> str:
+        return self._config.get("layout", "blocks")
+    
+    @property
+    def model_profile(self) -> str:
+        return self._config.get("model_profile", "fp32")
+    
+    @property
+    def warmup(self) -> bool:
+        return bool(self._config.get("warmup", True))
     
     @property
     def launch_at_login(self) -> bool:
@@ -131,8 +325,7 @@ class Config:
     
     @launch_at_login.setter
     def launch_at_login(self, value: bool):
-        self._config["launch_at_login"] = value
-        self.save()
+        self._set("launch_at_login", value)
         # 实际设置开机启动
         self._set_launch_at_login(value)
     
@@ -142,8 +335,7 @@ class Config:
     
     @silent_mode.setter
     def silent_mode(self, value: bool):
-        self._config["silent_mode"] = value
-        self.save()
+        self._set("silent_mode", value)
         
     @property
     def hotkey(self) -> str:
@@ -151,8 +343,7 @@ class Config:
     
     @hotkey.setter
     def hotkey(self, value: str):
-        self._config["hotkey"] = value
-        self.save()
+        self._set("hotkey", value)
 
     
     def _set_launch_at_login(self, enable: bool):
@@ -226,35 +417,175 @@ class Config:
             except Exception as e:
                 print(f"移除开机启动失败: {e}")
     
+    @property
+    def capture_method(self) -> str:
+        return self._config.get("capture_method", "clipboard")
+    
     @property
     def history_limit(self) -> int:
         return self._config.get("history_limit", 20)
     
-    def get_stats(self) -> dict:
-        """获取统计信息"""
-        from datetime import date
-        stats = self._config.get("stats", self.DEFAULTS["stats"].copy())
+    @property
+    def history_enabled(self) -> bool:
+        return bool(self._config.get("history_enabled", False))
+    
+    @property
+    def history_max_entries(self) -> int:
+        return max(int(self._config.get("history_max_entries", 100000)), 1)
+    
+    @property
+    def history_max_bytes(self) -> int:
+        return max(int(self._config.get("history_max_bytes", 256 * 1024 * 1024)), 1024 * 1024)
+    
+    @property
+    def history_thumbnails(self) -> bool:
+        return bool(self._config.get("history_thumbnails", False))
+    
+    @property
+    def pool_size(self) -> int:
+        """OCR 进程池 worker 数，每个 worker 独立加载一份模型"""
+        return max(int(self._config.get("pool_size", 0)), 0)
+    
+    @property
+    def rec_batch_size(self) -> int:
+        return max(int(self._config.get("rec_batch_size", 6)), 1)
+    
+    @property
+    def tile_size(self) -> int:
+        return max(int(self._config.get("tile_size", 1536)), 0)
+    
+    @property
+    def tile_threshold(self) -> int:
+        return max(int(self._config.get("tile_threshold", 3200)), 0)
+    
+    @property
+    def tile_overlap(self) -> int:
+        return max(int(self._config.get("tile_overlap", 128)), 0)
+    
+    @property
+    def tile_workers(self) -> int:
+        return max(int(self._config.get("tile_workers", 0)), 0)
+    
+    @property
+    def document_dpi(self) -> int:
+        return min(max(int(self._config.get("document_dpi", 200)), 36), 600)
+    
+    @property
+    def document_pages_in_flight(self) -> int:
+        """同时在栅格化之后、识别完成之前的页数，决定多页文档识别的内存上限"""
+        value = max(int(self._config.get("document_pages_in_flight", 0)), 0)
+        return value or max(self.pool_size, 1) + 1
+    
+    @property
+    def cache_enabled(self) -> bool:
+        return self._config.get("cache_enabled", True)
+    
+    @property
+    def cache_max_entries(self) -> int:
+        return self._config.get("cache_max_entries", 256)
+    
+    @property
+    def cache_max_bytes(self) -> int:
+        return self._config.get("cache_max_bytes", 8 * 1024 * 1024)
+    
+    @property
+    def cache_persist(self) -> bool:
+        return self._config.get("cache_persist", False)
+    
+    @property
+    def ort_intra_op_threads(self) -> int:
+        return max(0, int(self._config.get("ort_intra_op_threads", 0)))
+    
+    @property
+    def ort_inter_op_threads(self) -> int:
+        return max(0, int(self._config.get("ort_inter_op_threads", 0)))
+    
+    @property
+    def ort_graph_optimization(self) -> str:
+        return self._config.get("ort_graph_optimization", "all")
+    
+    @property
+    def ort_execution_mode(self) -> str:
+        return self._config.get("ort_execution_mode", "sequential")
+    
+    @property
+    def ort_cpu_mem_arena(self) -> bool:
+        return bool(self._config.get("ort_cpu_mem_arena", False))
+    
+    @property
+    def ort_model_cache(self) -> bool:
+        return bool(self._config.get("ort_model_cache", True))
+    
+    @property
+    def max_upload_bytes(self) -> int:
+        return int(self._config.get("max_upload_bytes", 128 * 1024 * 1024))
+    
+    @property
+    def server_backend(self) -> str:
+        return self._config.get("server_backend", "asyncio")
+    
+    @property
+    def server_workers(self) -> int:
+        return max(int(self._config.get("server_workers", 4)), 1)
+    
+    @property
+    def server_keepalive_timeout(self) -> float:
+        return max(float(self._config.get("server_keepalive_timeout", 15)), 0.1)
+    
+    @property
+    def server_queue_size(self) -> int:
+        return max(int(self._config.get("server_queue_size", 16)), 0)
+    
+    def _roll_stats_date(self, stats: dict):
+        """跨天时重置今日计数（调用方持有 _lock）"""
         today = date.today().isoformat()
-        
-        # 如果是新的一天，重置今日计数
         if stats.get("last_date") != today:
             stats["today_count"] = 0
             stats["last_date"] = today
-            self._config["stats"] = stats
-            self.save()
-        
-        return stats
+            self._stats_dirty = True
+    
+    def get_stats(self) -> dict:
+        """获取统计信息（内存中的副本，不写磁盘）"""
+        with self._lock:
+            stats = self._config.setdefault("stats", copy.deepcopy(self.DEFAULTS["stats"]))
+            self._roll_stats_date(stats)
+            return dict(stats)
     
     def increment_count(self):
-        """增加识别计数"""
-        from datetime import date
-        stats = self.get_stats()
-        stats["today_count"] += 1
-        stats["total_count"] += 1
-        stats["last_date"] = date.today().isoformat()
-        self._config["stats"] = stats
-        self.save()
-
+        """增加识别计数：只更新内存，由后台定时器在 STATS_FLUSH_INTERVAL 秒内写回"""
+        with self._lock:
+            stats = self._config.setdefault("stats", copy.deepcopy(self.DEFAULTS["stats"]))
+            self._roll_stats_date(stats)
+            stats["today_count"] = stats.get("today_count", 0) + 1
+            stats["total_count"] = stats.get("total_count", 0) + 1
+            self._stats_dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.STATS_FLUSH_INTERVAL, self._on_flush_timer)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def _on_flush_timer(self):
+        with self._lock:
+            self._flush_timer = None
+        try:
+            self.flush_stats()
+        except Exception as e:
+            print(f"保存识别计数失败: {e}")
+    
+    def _flush_at_exit(self):
+        with self._lock:
+            timer, self._flush_timer = self._flush_timer, None
+        if timer is not None:
+            timer.cancel()
+        try:
+            self.flush_stats()
+        except Exception as e:
+            print(f"保存识别计数失败: {e}")
+    
+    def flush_stats(self):
+        """把内存中的识别计数写回配置文件（没有新计数时不写）"""
+        if self._stats_dirty:
+            self.save()
 
 # 全局配置实例
 config = Config()
@@ -0,0 +1,223 @@
+"""
+多页文档输入模块 - PDF 与多帧 TIFF 按需逐页转为 BGR 数组
+
+文档只在打开时读取页数，页面在 pages() 迭代时才逐页栅格化（PDF）或 seek 解码（TIFF），
+同一时刻只有当前页的像素在内存中，与文档页数无关。
+PDF 需要可选依赖 pypdfium2（优先）或 PyMuPDF，都未安装时打开 PDF 报错；TIFF 只需要 Pillow。
+PDFium / MuPDF 都不是线程安全的，所有 PDF 调用在模块锁内串行执行。
+"""
+import io
+import math
+import os
+import threading
+from typing import Iterator, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from image_input import pil_to_bgr
+
+PDF_MAGIC = b"%PDF-"
+# 小端 / 大端 TIFF 与 BigTIFF
+TIFF_MAGICS = (b"II*\x00", b"MM\x00*", b"II+\x00", b"MM\x00+")
+
+# 单页栅格化的像素上限：超大幅面的页面按比例降低分辨率，避免单页占用数百 MB
+MAX_PAGE_PIXELS = 40_000_000
+
+DocumentSource = Union[str, os.PathLike, bytes, bytearray, memoryview]
+
+_pdf_lock = threading.Lock()
+
+
+class DocumentError(ValueError):
+    """不是可识别的多页文档，或文档已损坏"""
+
+
+def _head(source: DocumentSource, size: int = 8) -> bytes:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:size])
+    with open(source, "rb") as f:
+        return f.read(size)
+
+
+def document_kind(source: DocumentSource) -> Optional[str]:
+    """按文件头判断文档类型：pdf / tiff，其他返回 None"""
+    head = _head(source)
+    if head.startswith(PDF_MAGIC):
+        return "pdf"
+    if head[:4] in TIFF_MAGICS:
+        return "tiff"
+    return None
+
+
+def is_multipage(source: DocumentSource) -> bool:
+    """PDF（任意页数）或多于一帧的 TIFF；单帧图片走普通的图片解码"""
+    kind = document_kind(source)
+    if kind == "pdf":
+        return True
+    if kind == "tiff":
+        try:
+            with _open_image(source) as img:
+                return getattr(img, "n_frames", 1) > 1
+        except Exception:
+            return False
+    return False
+
+
+def _open_image(source: DocumentSource) -> Image.Image:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return Image.open(io.BytesIO(source))
+    return Image.open(source)
+
+
+def _import_mupdf():
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf  # PyMuPDF < 1.24
+    return pymupdf
+
+
+def _pdf_backend() -> str:
+    try:
+        import pypdfium2  # noqa: F401
+        return "pdfium"
+    except ImportError:
+        pass
+    try:
+        _import_mupdf()
+        return "mupdf"
+    except ImportError:
+        raise RuntimeError("识别 PDF 需要安装 pypdfium2（pip install pypdfium2）或 PyMuPDF")
+
+
+def _page_scale(width_pt: float, height_pt: float, dpi: int) -> float:
+    """页面尺寸（pt）与 DPI -> 缩放比例，超过 MAX_PAGE_PIXELS 时按比例降低"""
+    scale = dpi / 72
+    pixels = width_pt * height_pt * scale * scale
+    if pixels > MAX_PAGE_PIXELS:
+        scale *= math.sqrt(MAX_PAGE_PIXELS / pixels)
+    return scale
+
+
+class Document:
+    """
+    打开的多页文档（PDF / TIFF），用 with 语句或 close() 释放
+
+    source 为文件路径或文档字节；dpi 只影响 PDF（TIFF 按原始分辨率解码）
+    """
+
+    def __init__(self, source: DocumentSource, dpi: int = 200):
+        self.kind = document_kind(source)
+        self.dpi = dpi
+        self._closed = False
+        if self.kind == "pdf":
+            self.backend = _pdf_backend()
+            try:
+                with _pdf_lock:
+                    self._open_pdf(source)
+            except Exception as e:
+                raise DocumentError(f"无法打开 PDF: {e}")
+        elif self.kind == "tiff":
+            self.backend = "pillow"
+            try:
+                self._image = _open_image(source)
+                self.page_count = getattr(self._image, "n_frames", 1)
+            except Exception as e:
+                raise DocumentError(f"无法打开 TIFF: {e}")
+        else:
+            raise DocumentError("不支持的文档格式（支持 PDF 与 TIFF）")
+
+    def _open_pdf(self, source: DocumentSource):
+        if isinstance(source, (bytearray, memoryview)):
+            source = bytes(source)
+        elif not isinstance(source, bytes):
+            source = os.fspath(source)
+        if self.backend == "pdfium":
+            import pypdfium2 as pdfium
+            self._pdf = pdfium.PdfDocument(source)
+            self.page_count = len(self._pdf)
+        else:
+            pymupdf = _import_mupdf()
+            if isinstance(source, bytes):
+                self._pdf = pymupdf.open(stream=source, filetype="pdf")
+            else:
+                self._pdf = pymupdf.open(source)
+            self.page_count = self._pdf.page_count
+
+    def page_range(self, first_page: int = 1, last_page: Optional[int] = None) -> range:
+        """1 起始、包含两端的页码范围（超出文档的部分截掉）"""
+        first = max(int(first_page or 1), 1)
+        last = self.page_count if last_page is None else min(int(last_page), self.page_count)
+        return range(first, last + 1)
+
+    def render(self, number: int) -> np.ndarray:
+        """第 number 页（1 起始）-> BGR 数组"""
+        if self._closed:
+            raise DocumentError("文档已关闭")
+        if self.kind == "tiff":
+            self._image.seek(number - 1)
+            return pil_to_bgr(self._image)
+        with _pdf_lock:
+            if self.backend == "pdfium":
+                return self._render_pdfium(number - 1)
+            return self._render_mupdf(number - 1)
+
+    def _render_pdfium(self, index: int) -> np.ndarray:
+        page = self._pdf[index]
+        try:
+            width, height = page.get_size()
+            bitmap = page.render(scale=_page_scale(width, height, self.dpi))
+            try:
+                pixels = bitmap.to_numpy()
+                mode = bitmap.mode
+                # 位图缓冲区在 close() 时释放，转换结果必须是独立的数组
+                if mode == "L":
+                    return cv2.cvtColor(pixels, cv2.COLOR_GRAY2BGR)
+                if mode in ("BGRA", "BGRX"):
+                    return cv2.cvtColor(pixels, cv2.COLOR_BGRA2BGR)
+                if mode in ("RGBA", "RGBX"):
+                    return cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR)
+                if mode == "RGB":
+                    return cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+                return pixels.copy()
+            finally:
+                bitmap.close()
+        finally:
+            page.close()
+
+    def _render_mupdf(self, index: int) -> np.ndarray:
+        page = self._pdf.load_page(index)
+        scale = _page_scale(page.rect.width, page.rect.height, self.dpi)
+        pixmap = page.get_pixmap(matrix=_import_mupdf().Matrix(scale, scale), alpha=False)
+        pixels = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(
+            pixmap.height, pixmap.stride
+        )[:, :pixmap.width * pixmap.n].reshape(pixmap.height, pixmap.width, pixmap.n)
+        if pixmap.n == 1:
+            return cv2.cvtColor(pixels, cv2.COLOR_GRAY2BGR)
+        return cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+
+    def pages(
+        self, first_page: int = 1, last_page: Optional[int] = None
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """逐页产出 (页码, BGR 数组)，下一页在迭代推进时才栅格化"""
+        for number in self.page_range(first_page, last_page):
+            yield number, self.render(number)
+
+    def close(self):
+        """释放文档（可重复调用）"""
+        if self._closed:
+            return
+        self._closed = True
+        if self.kind == "tiff":
+            self._image.close()
+        else:
+            with _pdf_lock:
+                self._pdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,114 @@
+"""
+文件变更监听模块 - 配置文件被其他进程修改时通知
+
+Linux 上通过 ctypes 调用 inotify 监听文件所在目录（配置文件以临时文件 + rename 的方式
+原子替换，监听目录才能收到 IN_MOVED_TO）；其他平台（macOS）或 inotify 不可用时，
+每隔 poll_interval 秒调用一次回调，由回调自己比较 stat（mtime / inode / 大小）判断是否变化。
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+# inotify 常量（linux/inotify.h）
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _inotify_open(directory: Path):
+    """返回 (inotify fd, libc)；不支持时返回 None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+        if libc.inotify_add_watch(fd, os.fsencode(str(directory)), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+class FileWatcher:
+    """在后台线程中监听单个文件，文件（可能）变化时调用 callback()"""
+
+    def __init__(self, path: Path, callback: Callable[[], None], poll_interval: float = 1.0):
+        self.path = Path(path)
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fd: Optional[int] = None
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._fd is not None else "stat"
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._fd = _inotify_open(self.path.parent)
+        target = self._run_inotify if self._fd is not None else self._run_poll
+        self._thread = threading.Thread(target=target, name="ConfigWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _notify(self):
+        try:
+            self.callback()
+        except Exception as e:
+            print(f"配置变更处理失败: {e}")
+
+    def _run_poll(self):
+        while not self._stop.wait(self.poll_interval):
+            self._notify()
+
+    def _run_inotify(self):
+        name = os.fsencode(self.path.name)
+        while not self._stop.is_set():
+            # 超时只是为了定期检查 stop 标志
+            readable, _, _ = select.select([self._fd], [], [], 1.0)
+            if not readable:
+                continue
+            changed = False
+            # 合并短时间内的一串事件（写临时文件、rename）为一次回调
+            while True:
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    break
+                offset = 0
+                while offset < len(data):
+                    _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                    offset += _EVENT_HEADER.size
+                    if data[offset:offset + length].rstrip(b"\0") == name:
+                        changed = True
+                    offset += length
+                if not self._stop.wait(0.05):
+                    continue
+                break
+            if changed:
+                self._notify()
@@ -0,0 +1,367 @@
+"""
+识别历史模块 - SQLite + FTS5 全文索引
+
+每次识别的文本、语言、时间、来源、图片哈希（可选缩略图）追加写入
+~/.snaptext/history.sqlite3。请求线程计算图片哈希（与可选的缩略图）后只把这几项放进队列，
+不持有图片本身；写入在后台线程中批量提交。
+全文检索使用 FTS5 trigram 分词（中日韩文本没有空格分词，trigram 支持任意子串查询），
+超过条目数或文件大小上限时删除最旧的记录并做增量 vacuum。
+"""
+import base64
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# trigram 索引只能匹配不短于 3 个字符的词，更短的词在候选结果上逐条过滤
+_TRIGRAM = 3
+# 队列中等待写入的记录总字节数上限（文本与缩略图），写入跟不上时丢弃新记录而不是阻塞请求
+_QUEUE_MAX_BYTES = 16 * 1024 * 1024
+# 单条记录的固定开销估算（元组、时间、哈希等）
+_ENTRY_OVERHEAD = 256
+# 每写入多少条检查一次保留上限
+_RETENTION_EVERY = 200
+# 缩略图最长边（像素）
+_THUMBNAIL_SIZE = 160
+
+
+def _fts_query(terms: List[str]) -> str:
+    """FTS5 查询：每个词作为短语（转义双引号），词之间为 AND"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _image_hash(image) -> Optional[str]:
+    """图片哈希（与结果缓存的 key 无关，仅用于识别同一张图片的多次记录）"""
+    if image is None:
+        return None
+    data = image if isinstance(image, (bytes, bytearray, memoryview)) else image.tobytes()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _thumbnail(image) -> Optional[bytes]:
+    """JPEG 缩略图，失败时返回 None"""
+    try:
+        import cv2
+        import numpy as np
+
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            image = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return None
+        if image.ndim == 3 and image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        height, width = image.shape[:2]
+        scale = _THUMBNAIL_SIZE / max(height, width)
+        if scale < 1:
+            image = cv2.resize(
+                image, (max(int(width * scale), 1), max(int(height * scale), 1)),
+                interpolation=cv2.INTER_AREA,
+            )
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        return encoded.tobytes() if ok else None
+    except Exception:
+        return None
+
+
+class HistoryStore:
+    """追加写入的识别历史（线程安全，写入在后台线程中执行）"""
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 100000,
+        max_bytes: int = 256 * 1024 * 1024,
+        thumbnails: bool = False,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.thumbnails = thumbnails
+        self._queue: "queue.Queue" = queue.Queue()
+        self._queued_bytes = 0
+        self._dropped = 0
+        # 队列计数单独加锁：请求线程不等待写入线程的事务与压缩
+        self._queue_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._db = self._open_db()
+        self._since_retention = 0
+        self._writer = threading.Thread(target=self._run_writer, name="HistoryWriter", daemon=True)
+        self._writer.start()
+
+    def _open_db(self) -> sqlite3.Connection:
+        db = sqlite3.connect(str(self.path), check_same_thread=False)
+        # auto_vacuum 必须在建表前设置，之后删除记录可用 incremental_vacuum 归还空间
+        db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        db.execute("PRAGMA journal_mode = WAL")
+        db.execute("PRAGMA synchronous = NORMAL")
+        db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY,
+                created REAL NOT NULL,
+                source TEXT NOT NULL,
+                language TEXT,
+                text TEXT NOT NULL,
+                image_hash TEXT,
+                thumbnail BLOB
+            );
+            CREATE INDEX IF NOT EXISTS history_image_hash ON history(image_hash);
+            CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+                text, content='history', content_rowid='id', tokenize='trigram'
+            );
+            CREATE TRIGGER IF NOT EXISTS history_insert AFTER INSERT ON history BEGIN
+                INSERT INTO history_fts(rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS history_delete AFTER DELETE ON history BEGIN
+                INSERT INTO history_fts(history_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+            """
+        )
+        db.commit()
+        return db
+
+    # ---- 写入 ----
+
+    def record(self, text: str, language: str = None, source: str = "api", image=None):
+        """
+        追加一条历史记录（放入队列后立即返回）
+
+        image 为图片字节或像素数组，在当前线程计算哈希与缩略图，队列中不保留图片
+        """
+        if not text:
+            return
+        image_hash = _image_hash(image)
+        thumbnail = _thumbnail(image) if self.thumbnails and image is not None else None
+        size = _ENTRY_OVERHEAD + len(text.encode("utf-8")) + len(thumbnail or b"")
+        with self._queue_lock:
+            if self._queued_bytes + size > _QUEUE_MAX_BYTES:
+                self._dropped += 1
+                return
+            self._queued_bytes += size
+        self._queue.put_nowait((size, (time.time(), source, language, text, image_hash, thumbnail)))
+
+    def _run_writer(self):
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # 把已在排队的记录合并到同一个事务
+            while len(batch) < 256:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            entries = [entry for entry in batch if entry is not None]
+            try:
+                if entries:
+                    self._insert([row for _, row in entries])
+            except sqlite3.Error as e:
+                print(f"识别历史写入失败: {e}")
+            finally:
+                with self._queue_lock:
+                    self._queued_bytes -= sum(size for size, _ in entries)
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _insert(self, rows: list):
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO history (created, source, language, text, image_hash, thumbnail)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+            self._since_retention += len(rows)
+            if self._since_retention >= _RETENTION_EVERY:
+                self._since_retention = 0
+                self._enforce_retention()
+
+    def _size_bytes(self) -> int:
+        page_count = self._db.execute("PRAGMA page_count").fetchone()[0]
+        freelist = self._db.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+        return (page_count - freelist) * page_size
+
+    def _enforce_retention(self):
+        """超过条目数或大小上限时删除最旧的记录并回收空间（调用方持有锁）"""
+        removed = self._db.execute(
+            "DELETE FROM history WHERE id IN ("
+            " SELECT id FROM history ORDER BY id DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        # 大小超限时按平均记录大小估算，删除最旧的记录直到约为上限的 90%
+        # （FTS 的删除先写入标记，optimize 之后索引才会变小，不能边删边量）
+        size = self._size_bytes()
+        if size > self.max_bytes:
+            count = self._db.execute("SELECT count(*) FROM history").fetchone()[0]
+            excess = count - int(count * self.max_bytes * 0.9 / size)
+            removed += self._db.execute(
+                "DELETE FROM history WHERE id IN ("
+                " SELECT id FROM history ORDER BY id LIMIT ?)",
+                (max(excess, 1),),
+            ).rowcount
+        self._db.commit()
+        if removed:
+            self._compact()
+
+    def _compact(self):
+        """合并 FTS 索引段并把空闲页归还给文件系统（调用方持有锁）"""
+        self._db.execute("INSERT INTO history_fts(history_fts) VALUES ('optimize')")
+        self._db.commit()
+        self._db.execute("PRAGMA incremental_vacuum")
+        self._db.commit()
+
+    def flush(self, timeout: float = 5.0):
+        """等待队列中的记录写入完成"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self, timeout: float = 5.0):
+        """写完队列中的记录后关闭数据库"""
+        if not self._writer.is_alive():
+            return
+        self._queue.put(None)
+        self._writer.join(timeout)
+        with self._lock:
+            self._db.close()
+
+    def compact(self):
+        """立即执行保留策略与压缩"""
+        with self._lock:
+            self._enforce_retention()
+            self._compact()
+
+    def clear(self):
+        """删除全部历史"""
+        with self._lock:
+            self._db.execute("DELETE FROM history")
+            self._db.commit()
+            self._compact()
+
+    # ---- 查询 ----
+
+    def search(
+        self,
+        query: str = "",
+        limit: int = 20,
+        before: Optional[int] = None,
+        thumbnails: bool = False,
+    ) -> List[dict]:
+        """
+        按时间倒序返回历史记录；query 不为空时只返回包含所有词的记录
+
+        before 为上一页最后一条记录的 id（翻页）
+        """
+        terms = query.split()
+        indexed = [term for term in terms if len(term) >= _TRIGRAM]
+        short = [term for term in terms if len(term) < _TRIGRAM]
+        columns = "h.id, h.created, h.source, h.language, h.text, h.image_hash"
+        if thumbnails:
+            columns += ", h.thumbnail"
+        where, params = [], []
+        if indexed:
+            # 以 FTS 为外层按 rowid 倒序遍历，取够 limit 条即停止，不必先取出全部匹配再排序
+            sql = f"SELECT {columns} FROM history_fts f JOIN history h ON h.id = f.rowid"
+            where.append("history_fts MATCH ?")
+            params.append(_fts_query(indexed))
+            order = "f.rowid"
+        else:
+            sql = f"SELECT {columns} FROM history h"
+            order = "h.id"
+        for term in short:
+            where.append("instr(h.text, ?) > 0")
+            params.append(term)
+        if before is not None:
+            where.append(f"{order} < ?")
+            params.append(int(before))
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} DESC LIMIT ?"
+        params.append(max(int(limit), 0))
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        entries = []
+        for row in rows:
+            entry = {
+                "id": row[0],
+                "time": row[1],
+                "source": row[2],
+                "language": row[3],
+                "text": row[4],
+                "image_hash": row[5],
+            }
+            if thumbnails:
+                entry["thumbnail"] = base64.b64encode(row[6]).decode("ascii") if row[6] else None
+            entries.append(entry)
+        return entries
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._db.execute("SELECT count(*) FROM history").fetchone()[0]
+            size = self._size_bytes()
+        with self._queue_lock:
+            pending_bytes, dropped = self._queued_bytes, self._dropped
+        return {
+            "entries": count,
+            "bytes": size,
+            "pending": self._queue.unfinished_tasks,
+            "pending_bytes": pending_bytes,
+            "dropped": dropped,
+        }
+
+
+# 全局历史实例（首次使用时打开）
+_history: Optional[HistoryStore] = None
+_history_lock = threading.Lock()
+_history_failed = False
+
+
+def get_history() -> Optional[HistoryStore]:
+    """获取历史实例；未开启历史记录或数据库不可用时返回 None"""
+    global _history, _history_failed
+    from config import config
+
+    if not config.history_enabled or _history_failed:
+        return None
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                try:
+                    _history = HistoryStore(
+                        config.config_dir / "history.sqlite3",
+                        max_entries=config.history_max_entries,
+                        max_bytes=config.history_max_bytes,
+                        thumbnails=config.history_thumbnails,
+                    )
+                except sqlite3.Error as e:
+                    print(f"识别历史不可用: {e}")
+                    _history_failed = True
+                    return None
+    return _history
+
+
+def record(text: str, language: str = None, source: str = "api", image=None):
+    """
+    记录一次识别结果（未开启历史时不做任何事）
+
+    image 为图片字节或像素数组（base64 请先解码），只用于计算哈希与缩略图
+    """
+    history = get_history()
+    if history is not None:
+        history.record(text, language, source, image)
+
+
+def shutdown_history():
+    """写完队列中的记录并关闭历史数据库"""
+    global _history
+    with _history_lock:
+        history, _history = _history, None
+    if history is not None:
+        history.close()
@@ -0,0 +1,125 @@
+"""
+图片输入模块 - 把编码后的图片直接解码为模型所需的 BGR 数组
+
+cv2.imdecode 直接解码到 NumPy 缓冲区（保留 alpha 通道），一次 BGRA -> BGR 转换得到
+RapidOCR 需要的输入数组，透明背景在该数组上按行分块原地合成到白底，
+不再经过 PIL 的 RGBA 背景合成、np.array 与 RGB -> BGR 等多次整帧拷贝。
+OpenCV 无法解码的格式回退到 PIL。客户端直接上传的未压缩像素缓冲区（decode_pixels）
+按 stride 取视图后转换，完全跳过编解码。
+"""
+import io
+from typing import Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# 透明背景合成时每次处理的行数（每块额外分配一份 行数 × 宽 × 3 的 alpha 数组）
+_FLATTEN_ROWS = 256
+
+# 未压缩像素格式 -> 每像素字节数
+PIXEL_FORMATS = {"bgra": 4, "rgba": 4, "bgr": 3, "rgb": 3, "gray": 1}
+
+
+def flatten_alpha(bgra: np.ndarray) -> np.ndarray:
+    """
+    BGRA 数组合成到白底，返回 BGR 数组
+
+    先去掉 alpha 通道得到输出数组，再按行分块在输出数组上原地计算
+    255 - (255 - c) * a / 255（四舍五入，与 PIL paste 结果一致）；
+    全部不透明的行块跳过合成
+    """
+    bgr = cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR)
+    for start in range(0, bgr.shape[0], _FLATTEN_ROWS):
+        alpha = bgra[start:start + _FLATTEN_ROWS, :, 3]
+        if alpha.min() == 255:
+            continue
+        block = bgr[start:start + _FLATTEN_ROWS]
+        cv2.bitwise_not(block, dst=block)
+        cv2.multiply(block, cv2.cvtColor(alpha, cv2.COLOR_GRAY2BGR), dst=block, scale=1 / 255)
+        cv2.bitwise_not(block, dst=block)
+    return bgr
+
+
+def _to_bgr(img: np.ndarray) -> np.ndarray:
+    """cv2.imdecode(IMREAD_UNCHANGED) 的结果统一为 uint8 BGR"""
+    if img.dtype == np.uint16:
+        img = (img >> 8).astype(np.uint8)
+    elif img.dtype != np.uint8:
+        raise ValueError(f"不支持的像素类型: {img.dtype}")
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    if img.shape[2] == 4:
+        return flatten_alpha(img)
+    if img.shape[2] == 1:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    return img
+
+
+def pil_to_bgr(image: Image.Image) -> np.ndarray:
+    """PIL 图片转为 BGR 数组（透明背景合成到白底）"""
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = np.array(image.convert("RGBA"))
+        return flatten_alpha(cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGRA, dst=rgba))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR)
+
+
+def decode_image(image_data: bytes) -> np.ndarray:
+    """编码后的图片字节 -> BGR 数组"""
+    img = cv2.imdecode(np.frombuffer(image_data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        # OpenCV 不支持的格式（如 GIF 等）
+        return pil_to_bgr(Image.open(io.BytesIO(image_data)))
+    return _to_bgr(img)
+
+
+def decode_pixels(
+    buffer, width: int, height: int, stride: int = 0, pixel_format: str = "bgra"
+) -> np.ndarray:
+    """
+    未压缩的像素缓冲区 -> BGR 数组（跳过 PNG 编解码）
+
+    stride 为每行字节数（0 表示紧密排列），pixel_format 见 PIXEL_FORMATS；
+    带 alpha 的格式按非预乘 alpha 合成到白底。紧密排列的 bgr 直接使用 buffer，不复制
+    """
+    if pixel_format not in PIXEL_FORMATS:
+        raise ValueError(
+            f"不支持的像素格式: {pixel_format}（可选: {', '.join(PIXEL_FORMATS)}）"
+        )
+    channels = PIXEL_FORMATS[pixel_format]
+    row_bytes = width * channels
+    stride = stride or row_bytes
+    if width <= 0 or height <= 0 or stride < row_bytes:
+        raise ValueError(f"无效的像素尺寸: {width}x{height}，stride {stride}")
+    if len(buffer) < stride * (height - 1) + row_bytes:
+        raise ValueError(f"像素数据不足: 需要 {stride * height} 字节，实际 {len(buffer)} 字节")
+
+    rows = np.frombuffer(buffer, dtype=np.uint8, count=stride * (height - 1) + row_bytes)
+    # 按 stride 取行的视图（行尾填充字节不参与计算）
+    img = np.lib.stride_tricks.as_strided(
+        rows, shape=(height, width, channels), strides=(stride, channels, 1), writeable=False
+    )
+    if pixel_format == "gray":
+        return cv2.cvtColor(img[..., 0], cv2.COLOR_GRAY2BGR)
+    if pixel_format == "bgr":
+        return np.ascontiguousarray(img)
+    if pixel_format == "rgb":
+        return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+    if pixel_format == "rgba":
+        return flatten_alpha(cv2.cvtColor(img, cv2.COLOR_RGBA2BGRA))
+    return flatten_alpha(img)
+
+
+def read_image_file(file_path: str) -> np.ndarray:
+    """图片文件 -> BGR 数组"""
+    with open(file_path, "rb") as f:
+        return decode_image(f.read())
+
+
+def to_bgr(image: Union[Image.Image, np.ndarray]) -> np.ndarray:
+    """PIL 图片或已解码的 BGR 数组统一为 BGR 数组"""
+    if isinstance(image, np.ndarray):
+        return image
+    return pil_to_bgr(image)
@@ -0,0 +1,175 @@
+"""
+语言检测模块 - 按码位查表统计文字类别
+
+把文本编码为 UTF-32 码位数组，经预先构建的 码位 -> 类别 表一次查出所有字符的类别，
+再用 bincount 计数，不再逐字符做 Python 分支判断。
+支持 zh-Hans / zh-Hant / ja / ko / ru / en / fr / de / es。
+"""
+from typing import List
+
+import numpy as np
+
+# 字符类别
+_NONE = 0
+_LATIN = 1
+_HAN = 2
+_HAN_SIMP = 3  # 只在简体中出现的汉字
+_HAN_TRAD = 4  # 只在繁体中出现的汉字
+_KANA = 5
+_HANGUL = 6
+_CYRILLIC = 7
+# 8 起为法 / 德 / 西的特征字母，每个字母单独一个类别（见 _LATIN_HINTS）
+_HINT_BASE = 8
+
+# 常用字中简繁写法不同的字（两者互不出现在对方的规范文本中）
+_SIMPLIFIED_ONLY = (
+    "这个们来时为说国会对学发经过动现进长还产种样开问题关点应书门车东见间语话认电气马鸟鱼"
+    "无与义乐习乡买亚从仅众优伟传伤体侧债倾儿党兰兴养写军农决况冻净减击刘则刚创删别办务劳"
+    "势华协单卖卫却历压厅县参双变叹吗员响团园围图圆圣场坏块坚报壮声处备复够头夺奋奖妇妈孙"
+    "实宝宫宽寻导尽层岁岛币师帐带帮广庆库废异弃张弹强归当录忆忧怀态怜总恋恶悬惊惯愿戏战户"
+    "护担拥择拦拨挂挤换据摄摆摊敌数断旧显晒晓暂机杀权条杨极构枪标栏树桥梦检楼横欢欧残毁毕"
+    "汇汉汤沟没泪泽洁浅测济浓涂润涨渐温湾湿满灭灯灵灾炉炼烟烦烧热爱爷牵犹狮独猎献环画畅疗"
+    "盐监盖盘确础祸离积称稳穷竞笔筑签简类粮紧红约级纪纯纳纸线练组细织终经结绕绘给络统继绩"
+    "续维绿编缩罗职联脑脚脸艺节苏药获营蓝虑虽补观规视觉计订认讨让训议记讲许论设访证评识诉"
+    "词译试诗询该详误请读课谁调谈谢贝负财责败货质贫购贵贸费资赏赛赞赢赶跃践轨转轮软轻载较"
+    "辆输边达运远违连迟选递遗邮邻释鉴针钟钢钱铁银链销锁错键镇镜闭闻阅队阳阴阵阶际陆陈险随"
+    "隐难雾韩页顶项顺须顾顿预领频颜额风飞饭饮饱馆驶驾验骑鲜鸡麦黄齐龙"
+)
+_TRADITIONAL_ONLY = (
+    "這個們來時為說國會對學發經過動現進長還產種樣開問題關點應書門車東見間語話認電氣馬鳥魚"
+    "無與義樂習鄉買亞從僅眾優偉傳傷體側債傾兒黨蘭興養寫軍農決況凍淨減擊劉則剛創刪別辦務勞"
+    "勢華協單賣衛卻歷壓廳縣參雙變嘆嗎員響團園圍圖圓聖場壞塊堅報壯聲處備復夠頭奪奮獎婦媽孫"
+    "實寶宮寬尋導盡層歲島幣師帳帶幫廣慶庫廢異棄張彈強歸當錄憶憂懷態憐總戀惡懸驚慣願戲戰戶"
+    "護擔擁擇攔撥掛擠換據攝擺攤敵數斷舊顯曬曉暫機殺權條楊極構槍標欄樹橋夢檢樓橫歡歐殘毀畢"
+    "匯漢湯溝沒淚澤潔淺測濟濃塗潤漲漸溫灣濕滿滅燈靈災爐煉煙煩燒熱愛爺牽猶獅獨獵獻環畫暢療"
+    "鹽監蓋盤確礎禍離積稱穩窮競筆築簽簡類糧緊紅約級紀純納紙線練組細織終經結繞繪給絡統繼績"
+    "續維綠編縮羅職聯腦腳臉藝節蘇藥獲營藍慮雖補觀規視覺計訂認討讓訓議記講許論設訪證評識訴"
+    "詞譯試詩詢該詳誤請讀課誰調談謝貝負財責敗貨質貧購貴貿費資賞賽贊贏趕躍踐軌轉輪軟輕載較"
+    "輛輸邊達運遠違連遲選遞遺郵鄰釋鑒針鐘鋼錢鐵銀鏈銷鎖錯鍵鎮鏡閉聞閱隊陽陰陣階際陸陳險隨"
+    "隱難霧韓頁頂項順須顧頓預領頻顏額風飛飯飲飽館駛駕驗騎鮮雞麥黃齊龍"
+)
+
+# 拉丁语系的特征字母（é 等多种语言共用的字母不计入）
+_LATIN_HINTS = (
+    "àâæçèêëîïôœùûÿÀÂÆÇÈÊËÎÏÔŒÙÛŸ",  # fr
+    "äöüßÄÖÜẞ",  # de
+    "ñáíóú¿¡ÑÁÍÓÚ",  # es
+)
+_HINT_CHARS = "".join(_LATIN_HINTS)
+_CLASSES = _HINT_BASE + len(_HINT_CHARS)
+# 特征字母 -> 所属语言（法 / 德 / 西）的 one-hot 矩阵
+_HINT_LANGUAGE = np.zeros((len(_HINT_CHARS), len(_LATIN_HINTS)), dtype=np.int64)
+_HINT_LANGUAGE[
+    np.arange(len(_HINT_CHARS)),
+    np.repeat(np.arange(len(_LATIN_HINTS)), [len(chars) for chars in _LATIN_HINTS]),
+] = 1
+
+# 日文假名占中日文字符的比例超过该值时判为日文（日文中汉字常多于假名）
+_KANA_RATIO = 0.1
+# 特征字母占拉丁字母的比例达到该值、且至少有 _HINT_MIN_DISTINCT 种不同的特征字母时
+# 判为对应语言，否则为英文（英文里的人名、地名、外来词如 Zürich、jalapeño 只有个别特征字母）
+_HINT_RATIO = 0.03
+_HINT_MIN_DISTINCT = 3
+
+
+def _build_table() -> np.ndarray:
+    """构建 BMP 码位 -> 字符类别 查找表"""
+    table = np.zeros(0x10000, dtype=np.uint8)
+
+    def mark(start: int, end: int, cls: int):
+        table[start:end + 1] = cls
+
+    mark(0x0041, 0x005A, _LATIN)
+    mark(0x0061, 0x007A, _LATIN)
+    mark(0x00C0, 0x024F, _LATIN)
+    mark(0x1E00, 0x1EFF, _LATIN)
+    table[[0x00D7, 0x00F7]] = _NONE  # × ÷
+    mark(0x0400, 0x052F, _CYRILLIC)
+    mark(0x3040, 0x30FF, _KANA)
+    mark(0x31F0, 0x31FF, _KANA)
+    mark(0xFF66, 0xFF9F, _KANA)
+    table[0x30FB] = _NONE  # 中点「・」中文里也常用
+    mark(0x1100, 0x11FF, _HANGUL)
+    mark(0x3130, 0x318F, _HANGUL)
+    mark(0xAC00, 0xD7AF, _HANGUL)
+    mark(0x3400, 0x4DBF, _HAN)
+    mark(0x4E00, 0x9FFF, _HAN)
+    mark(0xF900, 0xFAFF, _HAN)
+
+    for chars, cls in ((_SIMPLIFIED_ONLY, _HAN_SIMP), (_TRADITIONAL_ONLY, _HAN_TRAD)):
+        table[_codepoints(chars)] = cls
+    table[_codepoints(_HINT_CHARS)] = _HINT_BASE + np.arange(len(_HINT_CHARS))
+    return table
+
+
+def _codepoints(text: str) -> np.ndarray:
+    """文本 -> 码位数组（BMP 之外的字符映射到无类别的 0xFFFF）"""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    return np.minimum(codes, 0xFFFF)
+
+
+_TABLE = _build_table()
+
+
+# _classify 返回的语言编号 -> 语言代码
+_LANGUAGES = np.array(["auto", "zh-Hans", "zh-Hant", "ja", "ko", "ru", "en", "fr", "de", "es"])
+
+
+def _classify(counts: np.ndarray) -> np.ndarray:
+    """
+    根据各类字符数判断语言，counts 形状为 (行数, _CLASSES)，返回 _LANGUAGES 下标
+
+    各文字体系的字符数取最大者（并列时依次优先中日文、韩文、俄文、拉丁文）
+    """
+    counts = counts.astype(np.int64)
+    han = counts[:, _HAN] + counts[:, _HAN_SIMP] + counts[:, _HAN_TRAD]
+    kana = counts[:, _KANA]
+    letters = counts[:, _HINT_BASE:]
+    # 各语言特征字母的出现次数与不同字母数
+    hints = letters @ _HINT_LANGUAGE
+    distinct = (letters > 0).astype(np.int64) @ _HINT_LANGUAGE
+    latin = counts[:, _LATIN] + hints.sum(axis=1)
+    scores = np.stack([han + kana, counts[:, _HANGUL], counts[:, _CYRILLIC], latin], axis=1)
+    script = scores.argmax(axis=1)
+
+    # 中日文：假名比例区分日文，简繁特征字区分简体/繁体
+    cjk = np.where(
+        kana > _KANA_RATIO * (han + kana),
+        3,
+        np.where(counts[:, _HAN_TRAD] > counts[:, _HAN_SIMP], 2, 1),
+    )
+    # 拉丁文：特征字母足够多时判为法/德/西，否则为英文
+    hint = hints.argmax(axis=1)
+    hint_count = hints.max(axis=1)
+    hint_distinct = distinct[np.arange(len(hint)), hint]
+    latin_lang = np.where(
+        (hint_distinct >= _HINT_MIN_DISTINCT) & (hint_count >= _HINT_RATIO * latin), 7 + hint, 6
+    )
+
+    lang = np.choose(script, [cjk, 4, 5, latin_lang])
+    return np.where(scores.max(axis=1) > 0, lang, 0)
+
+
+def detect_language(text: str) -> str:
+    """检测文本的主要语言，没有可识别的文字时返回 auto"""
+    if not text:
+        return "auto"
+    counts = np.bincount(_TABLE[_codepoints(text)], minlength=_CLASSES)
+    return str(_LANGUAGES[_classify(counts[None, :])[0]])
+
+
+def detect_line_languages(lines: List[str]) -> List[str]:
+    """
+    逐行检测语言
+
+    所有行拼成一次查表，按行号做二维 bincount，再对所有行一起判断
+    """
+    if not lines:
+        return []
+    classes = _TABLE[_codepoints("".join(lines))]
+    lengths = np.fromiter((len(line) for line in lines), dtype=np.int64, count=len(lines))
+    line_ids = np.repeat(np.arange(len(lines)), lengths)
+    counts = np.bincount(
+        line_ids * _CLASSES + classes, minlength=len(lines) * _CLASSES
+    ).reshape(len(lines), _CLASSES)
+    return _LANGUAGES[_classify(counts)].tolist()
@@ -0,0 +1,284 @@
+"""
+版面分析模块 - 多栏阅读顺序
+
+在检测/识别之后，用递归 XY-cut 把文本框切分为版块（栏）与段落：
+水平方向的大间隙切出栏，垂直方向的间隙切出段落；版块按阅读顺序
+（先上后下、同一高度先左后右）排列，版块内部仍按行合并文本。
+按位置分行（group_lines）也在本模块，普通的按行输出与版块内部共用。
+"""
+import itertools
+from typing import List, Tuple
+
+import numpy as np
+
+# 垂直间隙超过中位行高的该倍数时分段
+PARAGRAPH_GAP = 0.9
+# 水平间隙超过中位行高的该倍数时分栏
+COLUMN_GAP = 2.5
+
+
+def _find_gaps(start: np.ndarray, end: np.ndarray, min_gap: float) -> List[float]:
+    """
+    在一维区间投影上寻找空白，返回每个空白的中点（空白宽度 >= min_gap）
+
+    区间按起点排序后，用前缀最大终点判断空白，O(n log n)
+    """
+    order = np.argsort(start, kind="stable")
+    s = start[order]
+    reach = np.maximum.accumulate(end[order])
+    gaps = s[1:] - reach[:-1]
+    idx = np.flatnonzero(gaps >= min_gap)
+    return ((reach[idx] + s[idx + 1]) / 2).tolist()
+
+
+def _split(values: np.ndarray, cuts: List[float]) -> np.ndarray:
+    """按切分位置给每个元素分配区段编号"""
+    return np.searchsorted(np.asarray(cuts), values)
+
+
+class _Region:
+    """XY-cut 的一个节点"""
+
+    __slots__ = ("index", "children", "vertical")
+
+    def __init__(self, index: np.ndarray):
+        self.index = index  # 节点内文本框的下标
+        self.children: List["_Region"] = []
+        self.vertical = False  # True 表示子节点是左右分栏
+
+
+def _xy_cut(index: np.ndarray, rects: np.ndarray, unit: float) -> _Region:
+    """
+    递归 XY-cut
+
+    并排且在垂直方向同时有内容的两栏优先分栏（整栏读完再读下一栏）；
+    否则按行间空白分段。不并排的"栏"（如左右交替的聊天气泡）不切分，
+    保持从上到下的顺序
+    """
+    region = _Region(index)
+    if len(index) < 2:
+        return region
+
+    _, y0, _, y1 = rects[index].T
+
+    # 垂直方向（上下）空白 -> 候选段落
+    rows = [index]
+    cuts = _find_gaps(y0, y1, unit * PARAGRAPH_GAP)
+    if cuts:
+        part = _split((y0 + y1) / 2, cuts)
+        rows = [index[part == k] for k in range(len(cuts) + 1)]
+
+    # 通栏的标题/页脚与多栏正文混在一起时先上下切开，相邻的同类行带合并
+    if len(rows) > 1:
+        kinds = [_columns(r, rects, unit) is not None for r in rows]
+        if any(kinds) and not all(kinds):
+            bands = [
+                np.concatenate([r for r, _ in group])
+                for _, group in itertools.groupby(zip(rows, kinds), key=lambda item: item[1])
+            ]
+            return _set_children(region, bands, rects, unit, vertical=False)
+
+    columns = _columns(index, rects, unit)
+    if columns is not None:
+        return _set_children(region, columns, rects, unit, vertical=True)
+    if len(rows) > 1:
+        return _set_children(region, rows, rects, unit, vertical=False)
+    return region
+
+
+def _columns(index: np.ndarray, rects: np.ndarray, unit: float):
+    """
+    尝试按水平方向（左右）空白分栏，返回各栏的下标数组；不构成并排多栏时返回 None
+
+    两侧都需包含多行，避免把同一行内的词拆开
+    """
+    x0, _, x1, _ = rects[index].T
+    cuts = _find_gaps(x0, x1, unit * COLUMN_GAP)
+    if not cuts:
+        return None
+    part = _split((x0 + x1) / 2, cuts)
+    parts = [index[part == k] for k in range(len(cuts) + 1)]
+    if not all(_line_count(rects[p], unit) >= 2 for p in parts):
+        return None
+    if not _side_by_side(parts, rects):
+        return None
+    return parts
+
+
+def _set_children(region: _Region, parts, rects, unit, vertical: bool) -> _Region:
+    region.vertical = vertical
+    region.children = [_xy_cut(p, rects, unit) for p in parts]
+    return region
+
+
+def _line_count(rects: np.ndarray, unit: float) -> int:
+    """估算一组框覆盖的行数"""
+    return len(_find_gaps(rects[:, 1], rects[:, 3], unit * 0.2)) + 1
+
+
+def _coverage(rects: np.ndarray, top: int, size: int) -> np.ndarray:
+    """一组框在垂直方向上的覆盖掩码（差分数组 + 前缀和）"""
+    diff = np.zeros(size + 1, dtype=np.int32)
+    np.add.at(diff, (rects[:, 1] - top).astype(np.int64), 1)
+    np.add.at(diff, (rects[:, 3] - top).astype(np.int64), -1)
+    return np.cumsum(diff[:-1]) > 0
+
+
+def _side_by_side(parts: List[np.ndarray], rects: np.ndarray) -> bool:
+    """相邻两栏在垂直方向同时有内容的比例都超过一半时视为并排的栏"""
+    sub = rects[np.concatenate(parts)]
+    top = int(np.floor(sub[:, 1].min()))
+    size = int(np.ceil(sub[:, 3].max())) - top + 1
+    masks = [_coverage(rects[p], top, size) for p in parts]
+    for a, b in zip(masks, masks[1:]):
+        both = np.count_nonzero(a & b)
+        if both < 0.5 * min(np.count_nonzero(a), np.count_nonzero(b)):
+            return False
+    return True
+
+
+def _collect_blocks(region: _Region) -> Tuple[bool, List[List[np.ndarray]]]:
+    """
+    把 XY-cut 树整理为版块列表，每个版块是若干段落（框下标数组）
+
+    子树内没有分栏时整棵子树是一个版块，叶子即段落
+    """
+    if not region.children:
+        return False, [[region.index]]
+
+    has_columns = region.vertical
+    child_blocks = []
+    for child in region.children:
+        child_columns, blocks = _collect_blocks(child)
+        has_columns = has_columns or child_columns
+        child_blocks.append(blocks)
+
+    if not has_columns:
+        paragraphs = [p for blocks in child_blocks for block in blocks for p in block]
+        return False, [paragraphs]
+    return True, [block for blocks in child_blocks for block in blocks]
+
+
+def _bbox(rects: np.ndarray) -> List[float]:
+    return [
+        round(float(rects[:, 0].min()), 1),
+        round(float(rects[:, 1].min()), 1),
+        round(float(rects[:, 2].max()), 1),
+        round(float(rects[:, 3].max()), 1),
+    ]
+
+
+def _blocks(boxes: np.ndarray) -> Tuple[np.ndarray, List[List[np.ndarray]]]:
+    """XY-cut 切分，返回 (外接矩形 (n, 4), 版块 -> 段落 -> 框下标)"""
+    rects = np.stack(
+        [
+            boxes[:, :, 0].min(axis=1),
+            boxes[:, :, 1].min(axis=1),
+            boxes[:, :, 0].max(axis=1),
+            boxes[:, :, 1].max(axis=1),
+        ],
+        axis=1,
+    )
+    heights = rects[:, 3] - rects[:, 1]
+    unit = max(float(np.median(heights)), 1.0)
+
+    root = _xy_cut(np.arange(len(boxes)), rects, unit)
+    _, block_indices = _collect_blocks(root)
+    return rects, block_indices
+
+
+def group_lines(boxes: np.ndarray) -> List[np.ndarray]:
+    """
+    按文本框位置分行，返回每行的框下标（行按从上到下，行内按从左到右）
+
+    boxes 形状为 (n, 4, 2)。先按 (Y 中心, 左边缘) 排序，再顺序扫描：
+    与当前行首框的 Y 中心差小于当前行平均高度的 0.6 倍（至少 10 像素）
+    即归入当前行。平均高度用累计和维护，整体 O(n log n)
+    """
+    n = len(boxes)
+    if n == 0:
+        return []
+
+    ys = boxes[:, :, 1]
+    # Y 中心点（四个点依次相加再取平均）
+    y_center = (ys[:, 0] + ys[:, 1] + ys[:, 2] + ys[:, 3]) / 4
+    # 左边缘的 X 坐标用于排序
+    x_left = boxes[:, :, 0].min(axis=1)
+    # 文本框高度（用于判断行间距阈值）
+    height = ys.max(axis=1) - ys.min(axis=1)
+
+    order = np.lexsort((x_left, y_center))
+
+    # 顺序扫描分行，阈值依赖当前行的累计统计量
+    line_ids = np.empty(n, dtype=np.int64)
+    sorted_y = y_center[order].tolist()
+    sorted_h = height[order].tolist()
+    line_id = 0
+    line_y = sorted_y[0]
+    height_sum = sorted_h[0]
+    line_count = 1
+    line_ids[0] = 0
+    for k in range(1, n):
+        threshold = max(height_sum / line_count * 0.6, 10)  # 至少 10 像素
+        if abs(sorted_y[k] - line_y) < threshold:
+            height_sum += sorted_h[k]
+            line_count += 1
+        else:
+            line_id += 1
+            line_y = sorted_y[k]
+            height_sum = sorted_h[k]
+            line_count = 1
+        line_ids[k] = line_id
+
+    # 行内按 X 排序（稳定排序，X 相同时保持原顺序）
+    regroup = np.lexsort((x_left[order], line_ids))
+    ordered = order[regroup]
+    bounds = (np.flatnonzero(np.diff(line_ids[regroup])) + 1).tolist()
+    return [ordered[a:b] for a, b in zip([0] + bounds, bounds + [n])]
+
+
+def reading_order(boxes: np.ndarray) -> np.ndarray:
+    """
+    文本框的阅读顺序（与 analyze_layout 输出的顺序一致），返回框下标
+
+    只依赖几何位置，识别之前即可确定，用于流式输出
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    _, block_indices = _blocks(boxes)
+    return np.concatenate([
+        index[line]
+        for block in block_indices
+        for index in block
+        for line in group_lines(boxes[index])
+    ])
+
+
+def analyze_layout(boxes: np.ndarray, texts: List[str]) -> Tuple[List[str], List[dict]]:
+    """
+    版面分析：返回 (按阅读顺序排列的文本行, 版块结构)
+
+    boxes 形状为 (n, 4, 2)。版块结构为::
+
+        [{"bbox": [x0, y0, x1, y1],
+          "paragraphs": [{"bbox": [...], "lines": ["...", ...]}, ...]}, ...]
+    """
+    if len(texts) == 0:
+        return [], []
+
+    rects, block_indices = _blocks(boxes)
+
+    lines_out = []
+    blocks = []
+    for block in block_indices:
+        paragraphs = []
+        for index in block:
+            lines = [
+                " ".join([texts[i] for i in index[line].tolist()])
+                for line in group_lines(boxes[index])
+            ]
+            lines_out.extend(lines)
+            paragraphs.append({"bbox": _bbox(rects[index]), "lines": lines})
+        block_rects = rects[np.concatenate(block)]
+        blocks.append({"bbox": _bbox(block_rects), "paragraphs": paragraphs})
+    return lines_out, blocks
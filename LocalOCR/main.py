@@ -6,13 +6,23 @@ SnapText - macOS 菜单栏 OCR 服务
 import os
 import sys
 import time
-import tempfile
 import threading
-import base64
 import subprocess
 import traceback
 import logging
 
+# 命令行模式（snaptext ocr ...）不需要 GUI，在导入 AppKit 之前分发
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "ocr":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    if getattr(sys, 'frozen', False):
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+    # 以 cli.py 作为 __main__ 运行：spawn 出的 OCR worker 重新导入的是 cli.py 而不是本文件（不加载 GUI）
+    import runpy
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py"), run_name="__main__")
+
 # GUI Frameworks
 import AppKit
 import Cocoa
@@ -28,8 +38,10 @@ else:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config import config
-from ocr_server import run_server_threaded, set_status_callback
-from ocr_engine import ocr_from_base64
+from ocr_server import run_server_threaded, set_status_callback, stop_server
+from ocr_engine import ocr_from_bytes
+import history_store
+from screen_capture import capture_interactive
 from status_overlay import status_overlay
 from hotkey_manager import init_hotkey_manager
 
@@ -252,8 +264,9 @@ class SnapTextApp(rumps.App):
             self.quit_item
         ]
         
-        # 定时刷新配置
-        rumps.Timer(self.refresh_config, 2).start()
+        # 设置窗口（独立进程）修改配置文件后，监听线程重新加载并通知
+        config.subscribe(self.on_config_changed, ("port", "hotkey"))
+        config.watch()
 
     def _parse_hotkey_for_menu(self, hotkey_str):
         """解析热键字符串用于菜单显示"""
@@ -299,18 +312,17 @@ class SnapTextApp(rumps.App):
         except Exception as e:
             logger.warning(f"Failed to set menu modifiers: {e}")
 
-    def refresh_config(self, _):
-        """刷新配置与 UI 状态"""
-        old_hotkey = config.hotkey
-        
-        config.reload()
-        
+    def on_config_changed(self, changed):
+        """配置变更回调（监听线程），在主线程更新 UI"""
+        run_in_main_thread(lambda: self.refresh_config(changed))
+
+    def refresh_config(self, changed):
+        """按变化的配置项刷新 UI 状态"""
         # 更新文本
         self.port_item.title = f"端口: {config.port}"
-        self.update_stats_display()
         
         # 检查热键变更
-        if config.hotkey != old_hotkey:
+        if "hotkey" in changed:
             if self.hm:
                 self.hm.set_hotkey(config.hotkey)
                 logger.info(f"Hotkey updated to {config.hotkey}")
@@ -346,6 +358,11 @@ class SnapTextApp(rumps.App):
             else:
                 cmd = [sys.executable] + sys.argv
             
+            # 先释放端口，新进程才能监听
+            stop_server()
+            config.flush_stats()
+            history_store.shutdown_history()
+
             # Spawn new process
             subprocess.Popen(cmd, close_fds=True)
             
@@ -395,51 +412,36 @@ class SnapTextApp(rumps.App):
         threading.Thread(target=self.capture_and_ocr, daemon=True).start()
 
     def capture_and_ocr(self):
-        """执行截图 -> OCR"""
-        temp_path = None
+        """执行截图 -> OCR（图片字节直接交给引擎，不经过 base64）"""
         try:
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as f:
-                temp_path = f.name
-            
-            # 调用 screencapture
-            # -i: 交互式, -x: 无声
-            result = subprocess.run(['screencapture', '-i', '-x', temp_path], capture_output=True)
-            
-            if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+            img_data, _ = capture_interactive(config.capture_method)
+            if not img_data:
                 # 用户取消
-                if temp_path and os.path.exists(temp_path):
-                    os.remove(temp_path)
                 return
 
             # 显示 Loading
             run_in_main_thread(status_overlay.show_loading_at_mouse)
             
-            # 读取并编码
-            with open(temp_path, 'rb') as f:
-                img_data = f.read()
-            
-            # 清理
-            os.remove(temp_path)
-            temp_path = None
-            
-            base64_img = base64.b64encode(img_data).decode('utf-8')
-            
             # 执行 OCR (复用逻辑)
-            self._perform_ocr(base64_img)
+            self._perform_ocr(img_data)
             
         except Exception as e:
             logger.error(f"Capture error: {e}")
-            if temp_path and os.path.exists(temp_path):
-                os.remove(temp_path)
             run_in_main_thread(lambda: self.handle_ocr_error(str(e)))
 
-    def _perform_ocr(self, base64_image):
+    def _perform_ocr(self, image_data):
         """执行 OCR (后台线程)"""
         try:
             run_in_main_thread(lambda: setattr(self.status_item, "title", "正在识别..."))
             
-            texts, language = ocr_from_base64(base64_image)
+            start = time.perf_counter()
+            texts, language = ocr_from_bytes(image_data)
+            logger.info(
+                f"截图识别: {len(image_data) // 1024} KB, "
+                f"耗时 {(time.perf_counter() - start) * 1000:.0f} ms"
+            )
             
+            history_store.record('\n'.join(texts), language, 'screenshot', image_data)
             run_in_main_thread(lambda: self.handle_ocr_result(texts))
         except Exception as e:
             run_in_main_thread(lambda: self.handle_ocr_error(str(e)))
@@ -474,9 +476,7 @@ class SnapTextApp(rumps.App):
 
     def show_result_notification(self, text):
         """显示结果通知/弹窗"""
-        # 强制重新读取配置确保 silent_mode 是最新的
-        config.reload()
-        
+        # silent_mode 由配置监听保持最新，这里不读磁盘
         if config.silent_mode:
             # 仅通知
             pass
@@ -611,6 +611,10 @@ class SnapTextApp(rumps.App):
                 self.settings_process.terminate()
             except:
                 pass
+        # 等待进行中的识别请求完成，再写回识别计数
+        stop_server()
+        config.flush_stats()
+        history_store.shutdown_history()
         rumps.quit_application()
 
 
@@ -646,4 +650,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # OCR 进程池使用 spawn 启动 worker，打包后的应用需要先交给 multiprocessing 处理
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,295 @@
+"""
+指标模块 - Prometheus 文本格式的运行指标
+
+计数器 / 仪表 / 直方图都是线程安全的轻量实现（不依赖 prometheus_client），
+render() 输出 Prometheus 文本格式，由 /metrics 端点返回。
+
+进程池 worker 里的直方图观测值无法直接写入主进程：worker 在 capture() 中执行任务，
+观测值随结果带回，由主进程 replay() 记录。
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 延迟直方图的桶（秒）：覆盖从毫秒级的解码到大图的十几秒识别
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_registry: Dict[str, "_Metric"] = {}
+_registry_lock = threading.Lock()
+
+# 当前线程的观测值收集列表（capture 期间不为 None）
+_capture = threading.local()
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """指标基类：按标签值分别保存数据，创建时注册到全局表"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            if name in _registry:
+                raise ValueError(f"指标重复注册: {name}")
+            _registry[name] = self
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 的标签应为 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[Tuple[str, str, float]]:
+        """(指标名后缀, 标签文本, 值) 列表"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class _ValueMetric(_Metric):
+    """计数器与仪表的公共部分；可设置取值函数，在输出时读取外部状态"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable] = None
+
+    def _add(self, amount: float, labels: dict) -> float:
+        key = self._key(labels)
+        with self._lock:
+            value = self._values.get(key, 0.0) + amount
+            self._values[key] = value
+        return value
+
+    def set_function(self, function: Callable):
+        """
+        输出时调用 function 取值：无标签时返回数值，
+        有标签时返回 {标签值元组: 数值}；返回 None 表示暂无数据
+        """
+        self._function = function
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        if self._function is not None:
+            values = self._function()
+            if values is None:
+                return []
+            if not isinstance(values, dict):
+                values = {(): values}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [
+            ("", _format_labels(self.labelnames, key), value)
+            for key, value in sorted(values.items())
+        ]
+
+
+class Counter(_ValueMetric):
+    """只增不减的计数器"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> float:
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        return self._add(amount, labels)
+
+
+class Gauge(_ValueMetric):
+    """可增可减的仪表，inc / dec 返回更新后的值"""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> float:
+        return self._add(amount, labels)
+
+    def dec(self, amount: float = 1, **labels) -> float:
+        return self._add(-amount, labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    """累积直方图（le 桶 + _sum + _count）"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> [各桶计数（含 +Inf）, 总和]
+        self._data: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        captured = getattr(_capture, "observations", None)
+        if captured is not None:
+            captured.append((self.name, value, labels))
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._data.get(key)
+            if data is None:
+                data = self._data[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            data[0][index] += 1
+            data[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文：退出时记录耗时（秒），异常时同样记录"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            data = {key: (list(counts), total) for key, (counts, total) in self._data.items()}
+        samples = []
+        for key, (counts, total) in sorted(data.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames + ("le",), key + (_format_value(float(bound)),)
+                )
+                samples.append(("_bucket", labels, cumulative))
+            labels = _format_labels(self.labelnames, key)
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+
+@contextmanager
+def capture():
+    """在当前线程收集直方图观测值而不记录，产出 [(指标名, 值, 标签)] 列表"""
+    previous = getattr(_capture, "observations", None)
+    _capture.observations = observations = []
+    try:
+        yield observations
+    finally:
+        _capture.observations = previous
+
+
+def replay(observations: list):
+    """记录 capture() 收集到的观测值（如进程池 worker 带回的阶段耗时）"""
+    for name, value, labels in observations:
+        metric = _registry.get(name)
+        if isinstance(metric, Histogram):
+            metric.observe(value, **labels)
+
+
+def render() -> str:
+    """全部指标的 Prometheus 文本格式"""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        try:
+            lines.extend(metric.render())
+        except Exception as e:
+            # 取值函数出错不影响其他指标
+            print(f"指标 {metric.name} 输出失败: {e}")
+    return "\n".join(lines) + "\n"
+
+
+# ---- SnapText 指标 ----
+
+REQUESTS = Counter(
+    "snaptext_ocr_requests_total", "OCR 请求数（按 HTTP 状态码）", ("status",)
+)
+REQUEST_LATENCY = Histogram(
+    "snaptext_ocr_request_duration_seconds",
+    "成功的 OCR 请求耗时（按上传方式 base64 / bytes / array，流式请求为 stream）",
+    ("upload",),
+)
+STAGE_LATENCY = Histogram(
+    "snaptext_ocr_stage_duration_seconds",
+    "OCR 各阶段耗时：capture_read / base64_decode / image_decode / cache_lookup / detect / "
+    "classify / recognize / merge / language",
+    ("stage",),
+)
+IMAGE_MEGAPIXELS = Histogram(
+    "snaptext_ocr_image_megapixels",
+    "识别的图片尺寸（百万像素）",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 33),
+)
+REQUEST_BYTES = Histogram(
+    "snaptext_ocr_request_bytes",
+    "OCR 请求体大小（字节）",
+    buckets=tuple(2 ** n * 1024 for n in range(4, 16, 2)),
+)
+IN_FLIGHT = Gauge("snaptext_ocr_requests_in_flight", "正在处理的 OCR 请求数")
+QUEUE_DEPTH = Gauge("snaptext_ocr_pool_queue_depth", "进程池中等待执行的任务数（未启用进程池时为 0）")
+HTTP_CONNECTIONS = Gauge("snaptext_http_connections", "已建立的 HTTP 连接数（含空闲的 keep-alive 连接）")
+HTTP_QUEUED = Gauge("snaptext_http_requests_queued", "等待空闲 worker 线程的 HTTP 请求数")
+# 丢弃原因：排队已满 / 超过截止时间 / 客户端在排队期间断开
+SHED_REASONS = ("queue_full", "deadline", "disconnected")
+SHED = Counter(
+    "snaptext_http_requests_shed_total",
+    "执行前被丢弃的 OCR 请求数（reason 为 queue_full / deadline / disconnected）",
+    ("reason",),
+)
+ERRORS = Counter("snaptext_ocr_errors_total", "OCR 请求错误数（按异常类型）", ("type",))
+CACHE_LOOKUPS = Counter(
+    "snaptext_ocr_cache_lookups_total",
+    "结果缓存查询次数（result 为 hit / disk_hit / miss）",
+    ("result",),
+)
+COALESCED = Counter(
+    "snaptext_ocr_single_flight_total",
+    "按图片内容合并的识别调用（result 为 executed 实际执行 / coalesced 等待已有的识别）",
+    ("result",),
+)
+CACHE_HIT_RATIO = Gauge("snaptext_ocr_cache_hit_ratio", "结果缓存命中率（内存 + 磁盘）")
+CACHE_ENTRIES = Gauge("snaptext_ocr_cache_entries", "内存缓存条目数")
+CACHE_BYTES = Gauge("snaptext_ocr_cache_bytes", "内存缓存占用字节数")
+
+
+def stage(name: str):
+    """OCR 阶段计时上下文"""
+    return STAGE_LATENCY.time(stage=name)
@@ -1,78 +1,272 @@
 """
 OCR 引擎模块 - RapidOCR 封装
 """
+import atexit
 import base64
-import io
-from typing import List, Tuple, Optional
-from PIL import Image
-
-# 延迟导入 RapidOCR 以加快启动速度
-_ocr_engine = None
-
-
-def get_ocr_engine():
-    """获取 OCR 引擎实例（单例模式）"""
-    global _ocr_engine
-    if _ocr_engine is None:
-        from rapidocr_onnxruntime import RapidOCR
-        # 优化参数以提高精度
-        _ocr_engine = RapidOCR(
-            text_score=0.5,  # 文本置信度阈值（默认0.5）
-            det_use_cuda=False,
-            rec_use_cuda=False,
+import contextlib
+import hashlib
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Tuple, Optional, Union
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import metrics
+from config import config
+from document_input import Document, DocumentSource, is_multipage
+from image_input import decode_image, read_image_file, to_bgr
+from language import detect_language, detect_line_languages
+from layout import analyze_layout, group_lines, reading_order
+from single_flight import SingleFlight
+
+# 识别模式对应的 RapidOCR 参数
+# accurate: 保持原有配置；fast: 缩小检测输入、关闭方向分类、放宽框阈值
+MODE_PROFILES = {
+    "accurate": {
+        "text_score": 0.5,  # 文本置信度阈值（默认0.5）
+    },
+    "fast": {
+        "text_score": 0.5,
+        "use_cls": False,  # 截图文字基本不会倒置，跳过方向分类
+        "max_side_len": 1600,  # 整图最长边上限（默认 2000）
+        "det_limit_side_len": 480,  # 检测输入短边（默认 736）
+        "det_box_thresh": 0.4,  # 文本框阈值（默认 0.5）
+    },
+}
+
+# 模型档位：fp32 为 RapidOCR 自带模型；int8 为 quantize_models.py 生成的静态量化模型
+MODEL_PROFILES = ("fp32", "int8")
+
+# 使用分块检测的识别模式（fast 以速度为先，大图整体缩小后检测）
+TILED_MODES = ("accurate",)
+
+# 文本合并方式：lines 仅按行合并；blocks 先做多栏版面分析再按阅读顺序输出
+LAYOUTS = ("lines", "blocks")
+
+# 延迟导入 RapidOCR 以加快启动速度；每种 (模式, 模型档位) 缓存一个独立实例
+_ocr_engines: Dict[Tuple[str, str], Any] = {}
+_ocr_engines_lock = threading.Lock()
+
+# 多进程引擎池（pool_size > 0 时启用）
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+# 大图分块检测的线程池（ONNX Runtime 推理期间释放 GIL）
+_tile_executor = None
+_tile_executor_lock = threading.Lock()
+
+# 识别结果缓存（cache_enabled 时启用）
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+# 正在执行的识别按图片内容合并（并发的重复请求只推理一次）
+_single_flight = SingleFlight()
+
+# 启动预热状态：idle -> loading -> (warming) -> ready / error，error 在之后识别成功时转为 ready
+_warmup_status: Dict[str, Any] = {"state": "idle"}
+_warmup_lock = threading.Lock()
+
+
+def resolve_mode(mode: Optional[str] = None) -> str:
+    """校验识别模式，未指定时使用配置中的默认模式"""
+    if not mode:
+        mode = config.mode
+    if mode not in MODE_PROFILES:
+        raise ValueError(f"不支持的识别模式: {mode}（可选: {', '.join(MODE_PROFILES)}）")
+    return mode
+
+
+def resolve_layout(layout: Optional[str] = None) -> str:
+    """校验文本合并方式，未指定时使用配置中的默认值"""
+    if not layout:
+        layout = config.layout
+    if layout not in LAYOUTS:
+        raise ValueError(f"不支持的版面模式: {layout}（可选: {', '.join(LAYOUTS)}）")
+    return layout
+
+
+def resolve_model_profile(model_profile: Optional[str] = None) -> str:
+    """校验模型档位，未指定时使用配置中的默认值"""
+    if not model_profile:
+        model_profile = config.model_profile
+    if model_profile not in MODEL_PROFILES:
+        raise ValueError(
+            f"不支持的模型档位: {model_profile}（可选: {', '.join(MODEL_PROFILES)}）"
         )
-    return _ocr_engine
+    return model_profile
 
 
-def detect_language(text: str) -> str:
-    """简单的语言检测"""
-    if not text:
-        return "auto"
-    
-    # 统计字符类型
-    chinese_count = 0
-    english_count = 0
-    japanese_count = 0
-    korean_count = 0
-    
-    for char in text:
-        code = ord(char)
-        if 0x4E00 <= code <= 0x9FFF:  # 中文
-            chinese_count += 1
-        elif 0x3040 <= code <= 0x30FF:  # 日文假名
-            japanese_count += 1
-        elif 0xAC00 <= code <= 0xD7AF:  # 韩文
-            korean_count += 1
-        elif 0x0041 <= code <= 0x007A:  # 英文字母
-            english_count += 1
-    
-    # 确定主要语言
-    counts = {
-        "zh-Hans": chinese_count,
-        "en": english_count,
-        "ja": japanese_count,
-        "ko": korean_count
-    }
-    
-    max_lang = max(counts, key=counts.get)
-    if counts[max_lang] > 0:
-        return max_lang
-    return "auto"
+def get_ocr_engine(mode: str = "accurate", model_profile: Optional[str] = None):
+    """获取指定模式与模型档位的 OCR 引擎实例（每种组合一个单例）"""
+    mode = resolve_mode(mode)
+    model_profile = resolve_model_profile(model_profile)
+    key = (mode, model_profile)
+    engine = _ocr_engines.get(key)
+    if engine is None:
+        with _ocr_engines_lock:
+            engine = _ocr_engines.get(key)
+            if engine is None:
+                import ort_session
+                from rapidocr_onnxruntime import RapidOCR
+                # ONNX 会话参数来自配置，优化后的模型缓存在 ~/.snaptext/models
+                ort_session.install()
+                try:
+                    engine = RapidOCR(
+                        det_use_cuda=False,
+                        rec_use_cuda=False,
+                        rec_batch_num=config.rec_batch_size,
+                        **ort_session.model_path_kwargs(ort_session.model_sources(model_profile)),
+                        **MODE_PROFILES[mode],
+                    )
+                except Exception:
+                    ort_session.commit_cached_models(success=False)
+                    raise
+                ort_session.commit_cached_models()
+                _ocr_engines[key] = engine
+                _recover_warmup()
+    return engine
+
+
+def get_ocr_pool():
+    """
+    获取 OCR 进程池（按需启动）
+
+    配置 pool_size 为 0 时返回 None，OCR 在当前进程内执行
+    """
+    global _ocr_pool
+    if config.pool_size <= 0:
+        return None
+    if _ocr_pool is None:
+        with _ocr_pool_lock:
+            if _ocr_pool is None:
+                from ocr_pool import OCRProcessPool
+                pool = OCRProcessPool(config.pool_size, overrides=config.overrides)
+                pool.start()
+                _ocr_pool = pool
+    return _ocr_pool
+
+
+def shutdown_ocr_pool():
+    """关闭 OCR 进程池（如已启动）"""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        pool, _ocr_pool = _ocr_pool, None
+    if pool is not None:
+        pool.shutdown()
+
 
+atexit.register(shutdown_ocr_pool)
 
-def process_image(image_data: bytes) -> Image.Image:
-    """处理图片数据"""
-    return Image.open(io.BytesIO(image_data))
 
+def get_result_cache():
+    """获取识别结果缓存（按需创建），未启用时返回 None"""
+    global _result_cache
+    if not config.cache_enabled:
+        return None
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                from result_cache import OCRResultCache
+                persist_path = None
+                if config.cache_persist:
+                    persist_path = config.config_dir / "ocr_cache.sqlite3"
+                _result_cache = OCRResultCache(
+                    max_entries=config.cache_max_entries,
+                    max_bytes=config.cache_max_bytes,
+                    persist_path=persist_path,
+                )
+    return _result_cache
 
-def base64_to_image(base64_str: str) -> Image.Image:
-    """Base64 转图片"""
-    # 移除可能的 data URL 前缀
-    if "," in base64_str:
-        base64_str = base64_str.split(",")[1]
+
+def get_coalescing_stats() -> dict:
+    """并发重复请求的合并统计"""
+    return _single_flight.stats()
+
+
+def get_cache_stats() -> dict:
+    """缓存命中统计（未启用时仅返回 enabled=False）"""
+    cache = get_result_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+def _register_metrics():
+    """缓存与进程池相关的指标在输出 /metrics 时读取当前状态（不会因此创建缓存或进程池）"""
+
+    def cache_stat(read):
+        def function():
+            cache = _result_cache
+            return None if cache is None else read(cache.stats())
+        return function
+
+    metrics.CACHE_LOOKUPS.set_function(cache_stat(lambda stats: {
+        ("hit",): stats["hits"],
+        ("disk_hit",): stats["disk_hits"],
+        ("miss",): stats["misses"],
+    }))
+    metrics.CACHE_HIT_RATIO.set_function(cache_stat(lambda stats: stats["hit_rate"]))
+    metrics.CACHE_ENTRIES.set_function(cache_stat(lambda stats: stats["entries"]))
+    metrics.CACHE_BYTES.set_function(cache_stat(lambda stats: stats["bytes"]))
+    def single_flight_counts():
+        stats = _single_flight.stats()
+        return {("executed",): stats["executed"], ("coalesced",): stats["coalesced"]}
+
+    metrics.COALESCED.set_function(single_flight_counts)
+    metrics.QUEUE_DEPTH.set_function(
+        lambda: _ocr_pool.queue_depth() if _ocr_pool is not None else 0
+    )
+
+
+_register_metrics()
+
+
+def _profile_digest(mode: str, layout: str) -> bytes:
+    """识别模式及其阈值参数、实际使用的模型档位、版面模式，作为缓存 key 的一部分"""
+    import ort_session
+
+    model_profile = config.model_profile
+    # INT8 模型未生成时实际用的是 FP32，结果按 fp32 缓存，生成模型后不会命中回退时的结果
+    if model_profile == "int8" and not ort_session.int8_available():
+        model_profile = "fp32"
+    return json.dumps(
+        [mode, MODE_PROFILES[mode], model_profile, layout], sort_keys=True
+    ).encode("utf-8")
+
+
+def make_cache_key(img: np.ndarray, mode: str, layout: str) -> str:
+    """按解码后的像素内容（BGR 数组）+ 模式参数计算缓存 key"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(_profile_digest(mode, layout))
+    h.update(f"bgr:{img.shape[1]}x{img.shape[0]}".encode("ascii"))
+    # 直接哈希数组内存，不再像 PIL tobytes() 那样复制整帧
+    h.update(np.ascontiguousarray(img).data)
+    return "px:" + h.hexdigest()
+
+
+def make_raw_cache_key(image_data: bytes, mode: str, layout: str) -> str:
+    """按编码后的图片字节计算缓存 key（完全相同的文件无需解码即可命中）"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(_profile_digest(mode, layout))
+    h.update(image_data)
+    return "raw:" + h.hexdigest()
+
+
+def decode_base64(base64_str: str) -> bytes:
+    """Base64 解码为图片字节"""
+    # 移除可能的 data URL 前缀（只检查开头，不扫描整个字符串）
+    if base64_str.startswith("data:"):
+        base64_str = base64_str[base64_str.index(",") + 1:]
     
-    image_data = base64.b64decode(base64_str)
-    return process_image(image_data)
+    with metrics.stage("base64_decode"):
+        return base64.b64decode(base64_str)
 
 
 def merge_lines_by_position(ocr_result: list) -> List[str]:
@@ -84,105 +278,786 @@ def merge_lines_by_position(ocr_result: list) -> List[str]:
     if not ocr_result:
         return []
     
-    # 提取每个文本框的信息：(y_center, x_left, text)
-    items = []
-    for item in ocr_result:
-        box = item[0]  # [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
-        text = item[1]
-        
-        # 计算 Y 中心点（取四个点的平均值）
-        y_center = sum(point[1] for point in box) / 4
-        # 取左边缘的 X 坐标用于排序
-        x_left = min(point[0] for point in box)
-        # 计算文本框高度（用于判断行间距阈值）
-        y_coords = [point[1] for point in box]
-        height = max(y_coords) - min(y_coords)
-        
-        items.append({
-            'y_center': y_center,
-            'x_left': x_left,
-            'text': text,
-            'height': height
-        })
+    # [[x1,y1], [x2,y2], [x3,y3], [x4,y4]] -> (n, 4, 2)
+    coords = itertools.chain.from_iterable(
+        itertools.chain.from_iterable(item[0] for item in ocr_result)
+    )
+    boxes = np.fromiter(coords, dtype=np.float64, count=len(ocr_result) * 8).reshape(-1, 4, 2)
+    texts = [item[1] for item in ocr_result]
     
-    # 按 Y 坐标分组（Y 坐标接近的为同一行）
-    # 阈值：文本框高度的一半
-    items.sort(key=lambda x: (x['y_center'], x['x_left']))
-    
-    lines = []
-    current_line = [items[0]]
+    return join_lines(boxes, texts)
+
+
+def join_lines(boxes: np.ndarray, texts: List[str]) -> List[str]:
+    """按位置分行，同一行的文本用空格连接"""
+    return [' '.join([texts[i] for i in line.tolist()]) for line in group_lines(boxes)]
+
+
+def _detect_array(engine, img: np.ndarray, with_crops: bool = True) -> Tuple[list, list]:
+    """
+    对 BGR 数组执行检测，返回 (文本行裁剪图列表, 原图坐标系下的文本框列表)
+
+    与 RapidOCR.__call__ 的检测部分一致，但不做识别，方便跨图片合批
+    """
+    raw_h, raw_w = img.shape[:2]
+    op_record = {}
+    img, ratio_h, ratio_w = engine.preprocess(img)
+    op_record["preprocess"] = {"ratio_h": ratio_h, "ratio_w": ratio_w}
+    img, op_record = engine.maybe_add_letterbox(img, op_record)
+
+    dt_boxes, _ = engine.auto_text_det(img)
+    if dt_boxes is None:
+        return [], []
+
+    crops = engine.get_crop_img_list(img, dt_boxes) if with_crops else []
+    boxes = engine._get_origin_points(dt_boxes, op_record, raw_h, raw_w)
+    return crops, list(boxes)
+
+
+def _detect(engine, img: np.ndarray, mode: str = "accurate") -> Tuple[list, list]:
+    """
+    检测阶段：输入 BGR 数组，返回 (文本行裁剪图列表, 原图坐标系下的文本框列表)
+
+    accurate 模式下最长边超过 tile_threshold 的大图（4K 及以上）不再整体缩小，而是分块并行检测；
+    fast 模式始终整体缩小后检测（分块在全分辨率上检测，比缩小后检测慢）
+    """
+    metrics.IMAGE_MEGAPIXELS.observe(img.shape[0] * img.shape[1] / 1e6)
+    with metrics.stage("detect"):
+        tile_size = config.tile_size
+        threshold = max(config.tile_threshold, engine.max_side_len, tile_size)
+        if tile_size > 0 and mode in TILED_MODES and max(img.shape[:2]) > threshold:
+            return _detect_tiled(engine, img, tile_size, config.tile_overlap)
+        return _detect_array(engine, img)
+
+
+def _get_tile_executor() -> ThreadPoolExecutor:
+    """分块检测线程池（按需创建）"""
+    global _tile_executor
+    if _tile_executor is None:
+        with _tile_executor_lock:
+            if _tile_executor is None:
+                workers = config.tile_workers or os.cpu_count() or 1
+                _tile_executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="ocr-tile"
+                )
+    return _tile_executor
+
+
+def _tile_starts(length: int, tile: int, overlap: int) -> List[int]:
+    """沿一个方向切块，返回各块起点（相邻块至少重叠 overlap 像素）"""
+    if length <= tile:
+        return [0]
+    step = max(tile - overlap, 1)
+    count = math.ceil((length - overlap) / step)
+    stride = (length - tile) / (count - 1)
+    return [round(i * stride) for i in range(count)]
+
+
+def _detect_tiled(engine, img: np.ndarray, tile: int, overlap: int) -> Tuple[list, list]:
+    """将大图切成重叠的块并行检测，合并接缝处的重复框后从原图裁剪"""
+    h, w = img.shape[:2]
+    tiles = [
+        (x, y)
+        for y in _tile_starts(h, tile, overlap)
+        for x in _tile_starts(w, tile, overlap)
+    ]
+
+    def detect_tile(origin):
+        x, y = origin
+        tile_img = np.ascontiguousarray(img[y:y + tile, x:x + tile])
+        _, boxes = _detect_array(engine, tile_img, with_crops=False)
+        for box in boxes:
+            box[:, 0] += x
+            box[:, 1] += y
+        return boxes
+
+    boxes = []
+    tile_ids = []
+    for tile_id, tile_boxes in enumerate(_get_tile_executor().map(detect_tile, tiles)):
+        boxes.extend(tile_boxes)
+        tile_ids.extend([tile_id] * len(tile_boxes))
+    if not boxes:
+        return [], []
+
+    boxes = merge_tile_boxes(np.array(boxes, dtype=np.float32), np.array(tile_ids))
+    crops = engine.get_crop_img_list(img, boxes)
+    return crops, boxes
+
+
+def merge_tile_boxes(boxes: np.ndarray, tile_ids: np.ndarray) -> List[np.ndarray]:
+    """
+    合并分块检测在接缝处产生的重复框
+
+    来自不同块、彼此相交且在垂直方向大部分重叠（同一行文字）的框视为同一个，
+    取外接矩形合并；同一块内的框保持原样。boxes 形状为 (n, 4, 2)
+    """
+    x0 = boxes[:, :, 0].min(axis=1)
+    x1 = boxes[:, :, 0].max(axis=1)
+    y0 = boxes[:, :, 1].min(axis=1)
+    y1 = boxes[:, :, 1].max(axis=1)
+    heights = y1 - y0
+
+    inter_w = np.minimum(x1[:, None], x1[None, :]) - np.maximum(x0[:, None], x0[None, :])
+    inter_h = np.minimum(y1[:, None], y1[None, :]) - np.maximum(y0[:, None], y0[None, :])
+    min_h = np.minimum(heights[:, None], heights[None, :])
+    duplicate = (
+        (inter_w > 0)
+        & (inter_h > 0.5 * min_h)
+        & (tile_ids[:, None] != tile_ids[None, :])
+    )
+
+    # 并查集：把互为重复的框归为一组
+    parent = list(range(len(boxes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(duplicate, 1))):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[root_j] = root_i
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(boxes)):
+        groups.setdefault(find(i), []).append(i)
+
+    merged = []
+    for members in groups.values():
+        if len(members) == 1:
+            merged.append(boxes[members[0]])
+            continue
+        gx0, gx1 = x0[members].min(), x1[members].max()
+        gy0, gy1 = y0[members].min(), y1[members].max()
+        merged.append(np.array(
+            [[gx0, gy0], [gx1, gy0], [gx1, gy1], [gx0, gy1]], dtype=np.float32
+        ))
+    return merged
+
+
+def _recognize(engine, crops: list) -> list:
+    """
+    识别阶段：方向分类（如启用）+ 文本识别
+
+    text_rec 内部按宽高比排序后以 rec_batch_num 为单位组批，
+    因此传入的裁剪图越多，每个 ONNX 批次越满、宽度越接近
+    """
+    if not crops:
+        return []
+    if engine.use_cls:
+        with metrics.stage("classify"):
+            crops, _, _ = engine.text_cls(crops)
+    with metrics.stage("recognize"):
+        rec_res, _ = engine.text_rec(crops)
+    return rec_res
+
+
+def _assemble(engine, boxes: list, rec_res: list) -> Tuple[np.ndarray, List[str]]:
+    """按置信度过滤识别结果，返回 (文本框数组 (n, 4, 2), 文本列表)"""
+    keep = [i for i, res in enumerate(rec_res) if float(res[1]) >= engine.text_score]
+    if not keep:
+        return np.empty((0, 4, 2), dtype=np.float64), []
+    kept_boxes = np.array([boxes[i] for i in keep], dtype=np.float64)
+    return kept_boxes, [rec_res[i][0] for i in keep]
+
+
+def _finish(boxes: np.ndarray, line_texts: List[str], layout: str = "lines") -> dict:
+    """
+    合并文本行并检测语言，返回识别结果::
+
+        {"texts": [...], "from": "zh-Hans", "blocks": [...]}
+
+    layout 为 "blocks" 时按版面分析的阅读顺序输出，并附带版块结构
+    """
+    result = {"texts": [], "from": "auto"}
+    if layout == "blocks":
+        result["blocks"] = []
+    if not line_texts:
+        return result
     
-    for item in items[1:]:
-        # 判断是否为同一行：Y 坐标差小于当前行平均高度的一半
-        avg_height = sum(i['height'] for i in current_line) / len(current_line)
-        threshold = max(avg_height * 0.6, 10)  # 至少 10 像素
-        
-        if abs(item['y_center'] - current_line[0]['y_center']) < threshold:
-            current_line.append(item)
+    with metrics.stage("merge"):
+        if layout == "blocks":
+            # 多栏版面：按栏/段落的阅读顺序排列
+            texts, result["blocks"] = analyze_layout(boxes, line_texts)
         else:
-            lines.append(current_line)
-            current_line = [item]
+            # 智能合并同一行的文本
+            texts = join_lines(boxes, line_texts)
     
-    lines.append(current_line)
-    
-    # 每行内部按 X 坐标排序，然后用空格连接
-    result = []
-    for line in lines:
-        line.sort(key=lambda x: x['x_left'])
-        line_text = ' '.join(item['text'] for item in line)
-        result.append(line_text)
+    # 检测语言
+    combined_text = " ".join(texts)
+    result["texts"] = texts
+    with metrics.stage("language"):
+        result["from"] = detect_language(combined_text)
     
     return result
 
 
-def _ocr_image(image: Image.Image, mode: str = "accurate") -> Tuple[List[str], str]:
+def _ocr_image(
+    image: Union[Image.Image, np.ndarray],
+    mode: str = "accurate",
+    layout: str = "lines",
+    model_profile: Optional[str] = None,
+) -> dict:
     """
     内部 OCR 处理函数
+
+    image 为 PIL 图片或 image_input 解码得到的 BGR 数组（数组直接交给引擎，不再复制）
     """
-    # 转换为 RGB 模式
-    if image.mode == "RGBA":
-        background = Image.new("RGB", image.size, (255, 255, 255))
-        background.paste(image, mask=image.split()[3])
-        image = background
-    elif image.mode != "RGB":
-        image = image.convert("RGB")
+    if isinstance(image, np.ndarray):
+        img = image
+    else:
+        with metrics.stage("image_decode"):
+            img = to_bgr(image)
     
     # 执行 OCR
-    ocr = get_ocr_engine()
-    result, _ = ocr(image)
+    engine = get_ocr_engine(mode, model_profile)
+    crops, boxes = _detect(engine, img, mode)
+    rec_res = _recognize(engine, crops)
     
+    return _finish(*_assemble(engine, boxes, rec_res), layout)
+
+
+def ocr_batch(
+    images: List[Union[Image.Image, np.ndarray]],
+    mode: Optional[str] = None,
+    layout: Optional[str] = None,
+) -> List[dict]:
+    """
+    批量 OCR：逐张检测，再把所有图片的文本行裁剪图合在一起识别
+
+    各图片的裁剪图共享按宽度分桶的识别批次，结果按原顺序拆回每张图片，
+    返回与 images 等长的识别结果列表。在当前进程内执行，
+    批量任务可在每个进程内调用本函数以充分利用单核吞吐。
+    """
+    mode = resolve_mode(mode)
+    layout = resolve_layout(layout)
+    engine = get_ocr_engine(mode)
+
+    all_crops = []
+    image_boxes = []
+    for image in images:
+        crops, boxes = _detect(engine, to_bgr(image), mode)
+        all_crops.extend(crops)
+        image_boxes.append(boxes)
+
+    rec_res = _recognize(engine, all_crops)
+
+    results = []
+    offset = 0
+    for boxes in image_boxes:
+        count = len(boxes)
+        results.append(
+            _finish(*_assemble(engine, boxes, rec_res[offset:offset + count]), layout)
+        )
+        offset += count
+    return results
+
+
+def _open_task_image(kind: str, payload: Any) -> np.ndarray:
+    """把任务对应的图片解码为 BGR 数组"""
+    if kind == "bytes":
+        with metrics.stage("image_decode"):
+            return decode_image(payload)
+    if kind == "file":
+        with metrics.stage("image_decode"):
+            return read_image_file(payload)
+    if kind == "array":
+        return payload
+    raise ValueError(f"未知的 OCR 任务类型: {kind}")
+
+
+def _run_task(kind: str, payload: Any, mode: str, layout: str) -> dict:
+    """
+    在当前进程执行一次 OCR 任务（进程池 worker 同样调用此函数）
+
+    kind 为 "bytes" 时 payload 是编码后的图片数据，为 "file" 时是文件路径，
+    为 "array" 时是已解码的 BGR 数组；"warmup" 为预热任务，返回加载与推理耗时
+    """
+    if kind == "warmup":
+        return _warm_up(mode)
+    return _ocr_image(_open_task_image(kind, payload), mode, layout)
+
+
+def _warmup_image() -> Image.Image:
+    """预热用的小图：白底黑字，检测与识别模型都会执行一次"""
+    image = Image.new("RGB", (160, 32), "white")
+    ImageDraw.Draw(image).text((8, 10), "SnapText 0123", fill="black", font=ImageFont.load_default())
+    return image.resize((480, 96))
+
+
+def _warm_up(mode: str, on_loaded=None) -> dict:
+    """在当前进程加载模型并执行一次推理，返回耗时（毫秒）"""
+    start = time.perf_counter()
+    get_ocr_engine(mode)
+    load_ms = (time.perf_counter() - start) * 1000
+    if on_loaded is not None:
+        on_loaded()
+
+    start = time.perf_counter()
+    _ocr_image(_warmup_image(), mode, "lines")
+    warmup_ms = (time.perf_counter() - start) * 1000
+    return {"load_ms": round(load_ms, 1), "warmup_ms": round(warmup_ms, 1)}
+
+
+def _set_warmup_status(**fields):
+    with _warmup_lock:
+        _warmup_status.update(fields)
+
+
+def _recover_warmup():
+    """
+    预热失败后模型又加载或识别成功（如首个请求按需加载）时，把状态改回 ready
+
+    否则 /health 会一直返回 503，负载均衡与客户端把可用的服务当作不可用
+    """
+    if _warmup_status["state"] != "error":
+        return
+    with _warmup_lock:
+        if _warmup_status["state"] == "error":
+            _warmup_status["recovered_error"] = _warmup_status.pop("error", None)
+            _warmup_status["state"] = "ready"
+
+
+def _run_in_pool(pool, kind: str, payload: Any, mode: str, layout: str) -> dict:
+    """交给进程池执行（worker 中的模型加载不经过本进程的 get_ocr_engine）"""
+    result = pool.run(kind, payload, mode=mode, layout=layout)
+    _recover_warmup()
+    return result
+
+
+def _run_warmup(mode: str):
+    """预热线程：启用进程池时每个 worker 各预热一次，否则在当前进程预热"""
+    start = time.perf_counter()
+    try:
+        pool = get_ocr_pool()
+        if pool is not None:
+            # 同时提交，按负载派发后每个 worker 各执行一个
+            futures = [pool.submit("warmup", None, mode=mode, layout="lines") for _ in range(pool.size)]
+            timings = [future.result() for future in futures]
+            timing = {
+                "load_ms": max(t["load_ms"] for t in timings),
+                "warmup_ms": max(t["warmup_ms"] for t in timings),
+            }
+        else:
+            timing = _warm_up(mode, on_loaded=lambda: _set_warmup_status(state="warming"))
+    except Exception as e:
+        print(f"OCR 预热失败: {e}")
+        _set_warmup_status(state="error", error=str(e))
+        return
+    total_ms = round((time.perf_counter() - start) * 1000, 1)
+    _set_warmup_status(state="ready", total_ms=total_ms, **timing)
+
+
+def start_warmup(mode: Optional[str] = None) -> bool:
+    """
+    在后台线程加载模型并执行一次推理，避免首个请求承担模型加载耗时
+
+    只会启动一次；配置关闭预热时不做任何事，返回是否启动了预热
+    """
+    if not config.warmup:
+        return False
+    mode = resolve_mode(mode)
+    with _warmup_lock:
+        if _warmup_status["state"] != "idle":
+            return False
+        _warmup_status.update(state="loading", mode=mode)
+    threading.Thread(target=_run_warmup, args=(mode,), name="ocr-warmup", daemon=True).start()
+    return True
+
+
+def get_warmup_status() -> dict:
+    """
+    预热状态：state 为 idle（未预热，首次请求时加载）/ loading / warming / ready / error，
+    完成后附带 load_ms / warmup_ms / total_ms
+
+    warming（模型已加载、正在首次推理）只在进程内预热时出现；启用进程池时加载与首次推理
+    都在 worker 中完成，状态从 loading 直接变为 ready。预热失败（error）后模型按需加载
+    或识别成功时变为 ready，原错误保存在 recovered_error
+    """
+    with _warmup_lock:
+        return dict(_warmup_status)
+
+
+def _dispatch(kind: str, payload: Any, mode: Optional[str], layout: Optional[str]) -> dict:
+    """
+    查询结果缓存；未命中时交给进程池空闲 worker 执行，未启用进程池则在当前线程执行
+
+    同一张图片（相同识别参数）正在识别时，后到的请求等待同一个结果，不再重复推理：
+    编码后的图片按字节、已解码的数组按像素计算 key；文件任务来自批量识别，不做合并
+    """
+    mode = resolve_mode(mode)
+    layout = resolve_layout(layout)
+    cache = get_result_cache()
+    if kind not in ("bytes", "array"):
+        return _execute(kind, payload, mode, layout, cache)
+
+    with metrics.stage("cache_lookup"):
+        if kind == "bytes":
+            key = make_raw_cache_key(payload, mode, layout)
+            # 相同的图片字节直接命中，跳过解码
+            result = cache.get(key, count_miss=False) if cache is not None else None
+        else:
+            key = make_cache_key(payload, mode, layout)
+            result = None
+    if result is not None:
+        return result
+    return _single_flight.run(key, lambda: _execute(kind, payload, mode, layout, cache, key))
+
+
+def _execute(
+    kind: str, payload: Any, mode: str, layout: str, cache, key: Optional[str] = None
+) -> dict:
+    """
+    执行一次识别（结果写入缓存）
+
+    key 为 _dispatch 已计算的 key：bytes 任务是图片字节的 key，array 任务是像素 key
+    """
+    pool = get_ocr_pool()
+    if cache is None:
+        if pool is not None:
+            return _run_in_pool(pool, kind, payload, mode, layout)
+        return _run_task(kind, payload, mode, layout)
+
+    if pool is not None and kind != "array":
+        # 进程池模式下图片由 worker 解码；本进程只为像素 key 再解码一次不划算，只按编码后的字节查询
+        with metrics.stage("cache_lookup"):
+            if key is None:
+                with open(payload, "rb") as f:
+                    key = make_raw_cache_key(f.read(), mode, layout)
+            result = cache.get(key)
+        if result is None:
+            result = _run_in_pool(pool, kind, payload, mode, layout)
+            cache.put(key, result)
+        return result
+
+    # 按像素内容查询（重新编码或格式不同的同一张图也能命中）
+    image = _open_task_image(kind, payload)
+    if kind == "array" and key is not None:
+        pixel_key = key
+    else:
+        with metrics.stage("cache_lookup"):
+            pixel_key = make_cache_key(image, mode, layout)
+    with metrics.stage("cache_lookup"):
+        result = cache.get(pixel_key)
     if result is None:
-        return [], "auto"
-    
-    # 智能合并同一行的文本
-    texts = merge_lines_by_position(result)
-    
-    # 检测语言
-    combined_text = " ".join(texts)
-    language = detect_language(combined_text)
-    
-    return texts, language
+        if pool is not None:
+            result = _run_in_pool(pool, kind, payload, mode, layout)
+        else:
+            result = _ocr_image(image, mode, layout)
+        cache.put(pixel_key, result)
+    if kind == "bytes" and key is not None:
+        cache.put(key, result)
+    return result
+
+
+def _with_line_languages(result: dict, line_languages: bool) -> dict:
+    """需要时附加每一行的语言（languages 与 texts 一一对应）"""
+    if line_languages:
+        result["languages"] = detect_line_languages(result["texts"])
+    return result
 
 
-def ocr_from_base64(base64_str: str, mode: str = "accurate") -> Tuple[List[str], str]:
+def ocr_detailed_from_bytes(
+    image_data: bytes,
+    mode: Optional[str] = None,
+    layout: Optional[str] = None,
+    line_languages: bool = False,
+) -> dict:
     """
-    从 Base64 图片进行 OCR
+    从编码后的图片字节（PNG / JPEG 等）进行 OCR，返回包含 texts / from（以及 blocks）的识别结果
+
+    mode 为 "fast" / "accurate"，layout 为 "lines" / "blocks"，未指定时使用配置；
+    line_languages 为 True 时附带逐行语言 languages
     """
     try:
-        image = base64_to_image(base64_str)
-        return _ocr_image(image, mode)
+        # 图片解码交给执行 OCR 的进程
+        result = _dispatch("bytes", image_data, mode, layout)
+        return _with_line_languages(result, line_languages)
     except Exception as e:
         print(f"OCR 错误: {e}")
         raise
 
 
-def ocr_from_file(file_path: str, mode: str = "accurate") -> Tuple[List[str], str]:
+def ocr_detailed_from_array(
+    img: np.ndarray,
+    mode: Optional[str] = None,
+    layout: Optional[str] = None,
+    line_languages: bool = False,
+) -> dict:
     """
-    从文件进行 OCR
+    从已解码的 BGR 数组（如 image_input.decode_pixels 的结果）进行 OCR
     """
     try:
-        image = Image.open(file_path)
-        return _ocr_image(image, mode)
+        result = _dispatch("array", img, mode, layout)
+        return _with_line_languages(result, line_languages)
     except Exception as e:
         print(f"OCR 错误: {e}")
         raise
+
+
+def ocr_detailed_from_base64(
+    base64_str: str,
+    mode: Optional[str] = None,
+    layout: Optional[str] = None,
+    line_languages: bool = False,
+) -> dict:
+    """
+    从 Base64 图片进行 OCR，返回包含 texts / from（以及 blocks）的识别结果
+    """
+    return ocr_detailed_from_bytes(decode_base64(base64_str), mode, layout, line_languages)
+
+
+def ocr_detailed_from_file(
+    file_path: str,
+    mode: Optional[str] = None,
+    layout: Optional[str] = None,
+    line_languages: bool = False,
+) -> dict:
+    """
+    从文件进行 OCR，返回包含 texts / from（以及 blocks）的识别结果
+    """
+    try:
+        # PDF 与多帧 TIFF 逐页识别；单页图片交给执行 OCR 的进程解码
+        if is_multipage(file_path):
+            return ocr_detailed_from_document(file_path, mode, layout, line_languages=line_languages)
+        result = _dispatch("file", file_path, mode, layout)
+        return _with_line_languages(result, line_languages)
+    except Exception as e:
+        print(f"OCR 错误: {e}")
+        raise
+
+
+def _reading_order(boxes: np.ndarray, layout: str) -> np.ndarray:
+    """识别前按检测框确定阅读顺序（与最终 texts 的顺序一致）"""
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    if layout == "blocks":
+        return reading_order(boxes)
+    return np.concatenate(group_lines(boxes))
+
+
+def ocr_stream(
+    kind: str,
+    payload: Any,
+    mode: Optional[str] = None,
+    layout: Optional[str] = None,
+    line_languages: bool = False,
+) -> Iterator[dict]:
+    """
+    流式 OCR：依次产出事件字典，识别出的文本框按阅读顺序尽早输出
+
+    - {"event": "detected", "count": n, "detect_ms": ...}：检测完成
+    - {"event": "line", "index": i, "text": ..., "score": ..., "box": [[x, y] * 4]}：
+      每识别完一批（rec_batch_size 个框）即输出其中置信度达标的框，index 为阅读顺序下标
+    - {"event": "done", "texts": [...], "from": ..., "timings": {...}}：最终结果，
+      与非流式接口的返回值相同（texts 为合并后的行），另附各阶段耗时
+
+    kind / payload 同 _run_task。始终在当前进程执行（不经过进程池）；
+    结果缓存命中时只产出 done 事件（附带 "cached": true）
+    """
+    mode = resolve_mode(mode)
+    layout = resolve_layout(layout)
+    start = time.perf_counter()
+
+    def elapsed_ms() -> float:
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    img = _open_task_image(kind, payload)
+    cache = get_result_cache()
+    key = None
+    if cache is not None:
+        with metrics.stage("cache_lookup"):
+            key = make_cache_key(img, mode, layout)
+            result = cache.get(key)
+        if result is not None:
+            result = _with_line_languages(result, line_languages)
+            yield {"event": "done", **result, "cached": True, "timings": {"total_ms": elapsed_ms()}}
+            return
+
+    engine = get_ocr_engine(mode)
+    crops, boxes = _detect(engine, img, mode)
+    detect_ms = elapsed_ms()
+    yield {"event": "detected", "count": len(boxes), "detect_ms": detect_ms}
+
+    order = _reading_order(np.array(boxes, dtype=np.float64).reshape(-1, 4, 2), layout)
+    rec_res = [None] * len(boxes)
+    first_line_ms = None
+    position = 0
+    batch = config.rec_batch_size
+    for chunk_start in range(0, len(order), batch):
+        chunk = order[chunk_start:chunk_start + batch].tolist()
+        for i, res in zip(chunk, _recognize(engine, [crops[i] for i in chunk])):
+            rec_res[i] = res
+            if float(res[1]) < engine.text_score:
+                continue
+            if first_line_ms is None:
+                first_line_ms = elapsed_ms()
+            yield {
+                "event": "line",
+                "index": position,
+                "text": res[0],
+                "score": round(float(res[1]), 4),
+                "box": np.round(boxes[i], 1).tolist(),
+            }
+            position += 1
+    recognize_ms = elapsed_ms()
+
+    result = _finish(*_assemble(engine, boxes, rec_res), layout)
+    if key is not None:
+        cache.put(key, result)
+    result = _with_line_languages(result, line_languages)
+    yield {
+        "event": "done",
+        **result,
+        "timings": {
+            "detect_ms": detect_ms,
+            "first_line_ms": first_line_ms,
+            "recognize_ms": recognize_ms,
+            "total_ms": elapsed_ms(),
+        },
+    }
+
+
+def _ocr_page(number: int, img: np.ndarray, mode: str, layout: str, line_languages: bool) -> dict:
+    start = time.perf_counter()
+    try:
+        result = {"page": number, **ocr_detailed_from_array(img, mode, layout, line_languages)}
+    except Exception as e:
+        result = {"page": number, "error": str(e)}
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def ocr_document(
+    source: Union[DocumentSource, Document],
+    mode: Optional[str] = None,
+    layout: Optional[str] = None,
+    dpi: Optional[int] = None,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+    line_languages: bool = False,
+    pages_in_flight: Optional[int] = None,
+) -> Iterator[dict]:
+    """
+    多页文档（PDF / 多帧 TIFF）逐页 OCR，按页码顺序产出每页的结果::
+
+        {"page": 1, "texts": [...], "from": "zh-Hans", "elapsed_ms": ...}
+        {"page": 2, "error": "..."}    # 该页识别失败，不影响其他页
+
+    source 为文件路径、文档字节或已打开的 document_input.Document（由调用方关闭）。
+    页面在当前线程逐页栅格化（dpi 默认 document_dpi），交给识别线程并行识别（启用进程池时
+    由 worker 执行）。栅格化之后、识别完成之前的页面不超过 pages_in_flight（默认
+    document_pages_in_flight），达到上限时等待识别完成再栅格化下一页，内存占用与文档页数无关；
+    已识别完的后续页只保留文本结果，等前面的页完成后按顺序产出。
+    """
+    mode = resolve_mode(mode)
+    layout = resolve_layout(layout)
+    window = max(int(pages_in_flight or config.document_pages_in_flight), 1)
+    owned = not isinstance(source, Document)
+    document = Document(source, dpi or config.document_dpi) if owned else source
+    # (页码, future)，按页码顺序
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix="DocumentOCR")
+    try:
+        for number, img in document.pages(first_page, last_page):
+            pending.append(executor.submit(_ocr_page, number, img, mode, layout, line_languages))
+            # 不保留页面数组的引用，识别完成后即可释放
+            del img
+            while pending:
+                if pending[0].done():
+                    yield pending.popleft().result()
+                    continue
+                running = [future for future in pending if not future.done()]
+                if len(running) < window:
+                    break
+                wait(running, return_when=FIRST_COMPLETED)
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # 提前结束迭代（客户端断开等）时不再识别排队中的页面
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        if owned:
+            document.close()
+
+
+def ocr_detailed_from_document(
+    source: Union[DocumentSource, Document],
+    mode: Optional[str] = None,
+    layout: Optional[str] = None,
+    dpi: Optional[int] = None,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+    line_languages: bool = False,
+) -> dict:
+    """
+    识别整个多页文档，返回 {"texts": [...], "from": ..., "pages": [每页结果]}
+
+    texts 为各页文本按页码顺序拼接；任意一页失败时抛出异常
+    """
+    pages = []
+    with contextlib.closing(
+        ocr_document(source, mode, layout, dpi, first_page, last_page)
+    ) as results:
+        for page in results:
+            if "error" in page:
+                raise RuntimeError(f"第 {page['page']} 页识别失败: {page['error']}")
+            pages.append(page)
+    texts = [text for page in pages for text in page["texts"]]
+    result = {
+        "texts": texts,
+        "from": detect_language(" ".join(texts)) if texts else "auto",
+        "pages": pages,
+    }
+    return _with_line_languages(result, line_languages)
+
+
+def ocr_from_base64(
+    base64_str: str, mode: Optional[str] = None, layout: Optional[str] = None
+) -> Tuple[List[str], str]:
+    """
+    从 Base64 图片进行 OCR
+
+    mode 为 "fast" / "accurate"，未指定时使用配置中的模式
+    """
+    result = ocr_detailed_from_base64(base64_str, mode, layout)
+    return result["texts"], result["from"]
+
+
+def ocr_from_bytes(
+    image_data: bytes, mode: Optional[str] = None, layout: Optional[str] = None
+) -> Tuple[List[str], str]:
+    """
+    从编码后的图片字节进行 OCR（截图等进程内调用，省去 base64 编解码）
+
+    mode 为 "fast" / "accurate"，未指定时使用配置中的模式
+    """
+    result = ocr_detailed_from_bytes(image_data, mode, layout)
+    return result["texts"], result["from"]
+
+
+def ocr_from_array(
+    img: np.ndarray, mode: Optional[str] = None, layout: Optional[str] = None
+) -> Tuple[List[str], str]:
+    """
+    从已解码的 BGR 数组进行 OCR
+
+    mode 为 "fast" / "accurate"，未指定时使用配置中的模式
+    """
+    result = ocr_detailed_from_array(img, mode, layout)
+    return result["texts"], result["from"]
+
+
+def ocr_from_file(
+    file_path: str, mode: Optional[str] = None, layout: Optional[str] = None
+) -> Tuple[List[str], str]:
+    """
+    从文件进行 OCR
+
+    mode 为 "fast" / "accurate"，未指定时使用配置中的模式
+    """
+    result = ocr_detailed_from_file(file_path, mode, layout)
+    return result["texts"], result["from"]
@@ -0,0 +1,208 @@
+"""
+OCR 进程池模块 - 多进程并行推理
+
+每个 worker 是独立进程，持有自己加载的 RapidOCR 模型，
+并拥有各自的任务队列；结果统一回到一个结果队列，由收集线程分发给调用方。
+worker 中记录的阶段耗时等指标随结果带回，由收集线程写入主进程的指标。
+"""
+import itertools
+import logging
+import multiprocessing
+import pickle
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+import metrics
+
+logger = logging.getLogger("ocr_pool")
+
+
+def _worker_main(worker_id: int, task_queue, result_queue, overrides: dict):
+    """worker 进程入口：循环读取自己的任务队列并执行 OCR"""
+    # 终端的 Ctrl-C 会发给整个进程组；worker 由主进程在 shutdown() 时关闭，
+    # 不随之退出（否则进行中的任务丢失，收集线程还会不断重启 worker）
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if overrides:
+        from config import config
+        config.override(**overrides)
+    # 在子进程中导入，模型在首个任务时加载到本进程
+    import ocr_engine
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        task_id, kind, payload, options = task
+        try:
+            with metrics.capture() as observations:
+                result = ocr_engine._run_task(kind, payload, **options)
+            result_queue.put((worker_id, task_id, True, (result, observations)))
+        except Exception as e:
+            # 异常对象不一定可以 pickle，失败时退化为 RuntimeError
+            try:
+                pickle.dumps(e)
+                error = e
+            except Exception:
+                error = RuntimeError(f"{type(e).__name__}: {e}")
+            result_queue.put((worker_id, task_id, False, error))
+
+
+class _Worker:
+    """单个 worker 进程及其任务队列"""
+
+    def __init__(self, process, task_queue):
+        self.process = process
+        self.task_queue = task_queue
+        self.pending = set()  # 已派发但未完成的任务 ID
+
+
+class OCRProcessPool:
+    """OCR 进程池：N 个 worker 进程，按当前负载最少的原则派发任务"""
+
+    def __init__(self, size: int, overrides: Optional[dict] = None):
+        """
+        overrides 为 worker 进程中的 config.override() 配置：spawn 启动的 worker 重新读取
+        配置文件，主进程内存中覆盖的配置项需要显式传入
+        """
+        if size < 1:
+            raise ValueError("进程池大小必须 >= 1")
+        self.size = size
+        self.overrides = dict(overrides or {})
+        # macOS 上 fork 与 ObjC 运行时不兼容，统一使用 spawn
+        self._ctx = multiprocessing.get_context("spawn")
+        self._result_queue = self._ctx.Queue()
+        self._workers: List[Optional[_Worker]] = [None] * size
+        self._futures: Dict[int, Future] = {}
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._collector = None
+        self._closed = False
+
+    def start(self):
+        """启动全部 worker 与结果收集线程"""
+        with self._lock:
+            for index in range(self.size):
+                self._spawn(index)
+        self._collector = threading.Thread(
+            target=self._collect, name="ocr-pool-collector", daemon=True
+        )
+        self._collector.start()
+        logger.info(f"OCR 进程池已启动，worker 数: {self.size}")
+
+    def _spawn(self, index: int):
+        """启动（或重启）指定位置的 worker（调用方需持有锁）"""
+        task_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, task_queue, self._result_queue, self.overrides),
+            name=f"ocr-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._workers[index] = _Worker(process, task_queue)
+
+    def submit(self, kind: str, payload: Any, **options) -> Future:
+        """提交任务，返回 Future；options 原样传给 worker 中的 ocr_engine._run_task"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("OCR 进程池已关闭")
+            task_id = next(self._task_ids)
+            index = min(range(self.size), key=lambda i: len(self._workers[i].pending))
+            worker = self._workers[index]
+            worker.pending.add(task_id)
+            self._futures[task_id] = future
+        worker.task_queue.put((task_id, kind, payload, options))
+        return future
+
+    def run(self, kind: str, payload: Any, timeout: float = None, **options):
+        """提交任务并等待结果"""
+        return self.submit(kind, payload, **options).result(timeout=timeout)
+
+    def queue_depth(self) -> int:
+        """已派发但尚未开始执行的任务数（每个 worker 同时只执行一个任务）"""
+        with self._lock:
+            return sum(max(len(w.pending) - 1, 0) for w in self._workers if w is not None)
+
+    def _collect(self):
+        """收集线程：分发结果，并检测意外退出的 worker"""
+        last_check = time.monotonic()
+        while True:
+            # 即使结果源源不断，也要定期检查 worker 存活
+            if time.monotonic() - last_check >= 1.0:
+                self._check_workers()
+                last_check = time.monotonic()
+            try:
+                worker_id, task_id, ok, value = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if self._closed:
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+
+            with self._lock:
+                future = self._futures.pop(task_id, None)
+                worker = self._workers[worker_id]
+                if worker is not None:
+                    worker.pending.discard(task_id)
+            if future is None or future.done():
+                continue
+            if ok:
+                result, observations = value
+                metrics.replay(observations)
+                future.set_result(result)
+            else:
+                future.set_exception(value)
+
+    def _check_workers(self):
+        """worker 崩溃时让其未完成的任务失败，并重新拉起进程"""
+        failed = []
+        with self._lock:
+            if self._closed:
+                return
+            for index, worker in enumerate(self._workers):
+                if worker is None or worker.process.is_alive():
+                    continue
+                logger.warning(
+                    f"OCR worker {index} 意外退出 (exitcode={worker.process.exitcode})，正在重启"
+                )
+                for task_id in worker.pending:
+                    future = self._futures.pop(task_id, None)
+                    if future is not None:
+                        failed.append(future)
+                self._spawn(index)
+        for future in failed:
+            future.set_exception(RuntimeError("OCR worker 进程意外退出"))
+
+    def shutdown(self, timeout: float = 5.0):
+        """关闭进程池"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = [w for w in self._workers if w is not None]
+        for worker in workers:
+            try:
+                worker.task_queue.put(None)
+            except Exception:
+                pass
+        for worker in workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        # 收集线程在结果队列空闲时看到 _closed 后退出
+        if self._collector is not None and self._collector is not threading.current_thread():
+            self._collector.join(timeout)
+        with self._lock:
+            futures = list(self._futures.values())
+            self._futures.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(RuntimeError("OCR 进程池已关闭"))
+        logger.info("OCR 进程池已关闭")
@@ -1,10 +1,33 @@
 """
 HTTP 服务器模块 - 提供 OCR API
 """
+import contextlib
+import ipaddress
+import json
 import logging
-from flask import Flask, request, jsonify
-from ocr_engine import ocr_from_base64
+import threading
+import time
+from flask import Flask, Response, request, jsonify
+from ocr_engine import (
+    decode_base64,
+    get_cache_stats,
+    get_coalescing_stats,
+    get_warmup_status,
+    ocr_detailed_from_array,
+    ocr_detailed_from_bytes,
+    ocr_document,
+    ocr_stream,
+    resolve_layout,
+    resolve_mode,
+    start_warmup,
+)
+from document_input import Document
+from image_input import decode_pixels
+from language import detect_language
+from async_server import BODY_ENVIRON_KEY, DEADLINE_ENVIRON_KEY, DEADLINE_HEADER, parse_deadline
 from config import config
+import history_store
+import metrics
 
 # 配置日志
 # 获取 logger (配置由主程序统一管理)
@@ -16,9 +39,32 @@ app = Flask(__name__)
 flask_log = logging.getLogger('werkzeug')
 flask_log.setLevel(logging.ERROR)
 
+# 未压缩像素上传的 Content-Type（尺寸与格式由 X-Image-* 请求头给出）
+PIXELS_CONTENT_TYPE = "application/x-snaptext-pixels"
+# 流式读取请求体的块大小
+_READ_CHUNK = 1024 * 1024
+_CORS_HEADERS = (
+    "Content-Type, X-Image-Width, X-Image-Height, X-Image-Stride, X-Pixel-Format, X-Request-Timeout"
+)
+# 流式响应格式 -> Content-Type
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+class UploadError(Exception):
+    """请求体不合法（附带 HTTP 状态码）"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
 # 回调函数，用于通知菜单栏应用状态变化
 _status_callback = None
-_processing = False
+# 进行中的请求数与回调的更新保持原子，避免并发请求结束时状态错乱
+_status_lock = threading.Lock()
 
 
 def set_status_callback(callback):
@@ -28,11 +74,221 @@ def set_status_callback(callback):
 
 
 def notify_status(is_processing: bool):
-    """通知状态变化"""
-    global _processing
-    _processing = is_processing
-    if _status_callback:
-        _status_callback(is_processing)
+    """
+    请求开始 / 结束时更新进行中的请求数（snaptext_ocr_requests_in_flight），
+    仅在 0 与 1 之间变化时通知菜单栏：并发请求中的一个结束不会清除处理中状态
+    """
+    with _status_lock:
+        if is_processing:
+            in_flight = metrics.IN_FLIGHT.inc()
+            changed = in_flight == 1
+        else:
+            in_flight = metrics.IN_FLIGHT.dec()
+            changed = in_flight == 0
+        if changed and _status_callback:
+            _status_callback(in_flight > 0)
+
+
+def _record_request(status: int, error: Exception = None):
+    """记录请求状态码与错误类型"""
+    metrics.REQUESTS.inc(status=status)
+    if error is not None:
+        metrics.ERRORS.inc(type=type(error).__name__)
+
+
+def _json_response(payload: dict, status: int = 200):
+    """JSON 响应（允许跨域）"""
+    response = jsonify(payload)
+    response.status_code = status
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+def _read_body() -> bytearray:
+    """
+    读取请求体，超过 max_upload_bytes 时抛出 413
+
+    asyncio 服务器已把请求体完整读入内存，直接返回该缓冲区（不复制）；
+    werkzeug 模式下已知长度时预分配缓冲区、分块 readinto，不经过 get_data() 的整体缓冲与复制
+    """
+    limit = config.max_upload_bytes
+    body = request.environ.get(BODY_ENVIRON_KEY)
+    if body is not None:
+        if len(body) > limit:
+            raise UploadError(f"请求体过大（上限 {limit} 字节）", 413)
+        return body
+
+    length = request.content_length
+    stream = request.stream
+    if length is not None:
+        if length > limit:
+            raise UploadError(f"请求体过大（上限 {limit} 字节）", 413)
+        body = bytearray(length)
+        view = memoryview(body)
+        received = 0
+        while received < length:
+            count = stream.readinto(view[received:received + _READ_CHUNK])
+            if not count:
+                raise UploadError(f"请求体不完整: {received}/{length} 字节")
+            received += count
+        return body
+
+    # 分块传输编码：边读边检查上限
+    body = bytearray()
+    while True:
+        chunk = stream.read(_READ_CHUNK)
+        if not chunk:
+            return body
+        body += chunk
+        if len(body) > limit:
+            raise UploadError(f"请求体过大（上限 {limit} 字节）", 413)
+
+
+def _header_int(name: str, default: int = None) -> int:
+    value = request.headers.get(name)
+    if value is None:
+        if default is None:
+            raise UploadError(f"缺少请求头 {name}")
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise UploadError(f"请求头 {name} 不是整数: {value}")
+
+
+def _request_deadline():
+    """
+    请求的截止时间（time.monotonic()），未指定时为 None
+
+    asyncio 服务器按收到请求头的时刻计算后放在 environ 中；
+    werkzeug 模式下按当前时刻与 X-Request-Timeout 计算
+    """
+    deadline = request.environ.get(DEADLINE_ENVIRON_KEY)
+    if deadline is None:
+        deadline = parse_deadline(request.headers.get(DEADLINE_HEADER), time.monotonic())
+    return deadline
+
+
+def _deadline_exceeded_response():
+    """上传与解码后已超过截止时间：不再执行识别，返回 503"""
+    metrics.SHED.inc(reason='deadline')
+    _record_request(503)
+    logger.warning("丢弃请求（deadline）: 识别开始前已超过截止时间")
+    response = _json_response({'error': '请求在识别开始前已超过截止时间'}, 503)
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def _parse_flag(value) -> bool:
+    """JSON 布尔值或查询参数 1 / true / yes"""
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def _stream_format(options: dict):
+    """
+    流式响应格式：选项 stream 为 ndjson / sse（true 等同 ndjson），
+    未指定时按 Accept 请求头判断，返回 None 表示普通 JSON 响应
+    """
+    value = options.get('stream')
+    if value in (None, False, '', '0', 'false'):
+        accept = request.headers.get('Accept', '')
+        for name, mimetype in STREAM_FORMATS.items():
+            if mimetype in accept:
+                return name
+        return None
+    if value is True or value in ('1', 'true'):
+        return 'ndjson'
+    if value not in STREAM_FORMATS:
+        raise ValueError(f"不支持的流式格式: {value}（可选: {', '.join(STREAM_FORMATS)}）")
+    return value
+
+
+def _encode_event(event: dict, fmt: str) -> str:
+    """事件编码为一行 NDJSON 或一条 SSE 消息"""
+    data = json.dumps(event, ensure_ascii=False)
+    if fmt == 'sse':
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+def _stream_response(kind: str, image, mode: str, layout: str, line_languages: bool, fmt: str):
+    """流式 OCR 响应：识别出的文本框按阅读顺序逐条输出，最后输出完整结果"""
+    if kind == 'base64':
+        kind, image = 'bytes', decode_base64(image)
+
+    def generate():
+        start = time.perf_counter()
+        notify_status(True)
+        try:
+            for event in ocr_stream(kind, image, mode, layout, line_languages):
+                if event['event'] == 'done':
+                    config.increment_count()
+                    history_store.record('\n'.join(event['texts']), event['from'], 'api', image)
+                    metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, upload='stream')
+                    logger.info(f"OCR 成功（流式）: {len(event['texts'])} 行文本, 语言: {event['from']}")
+                yield _encode_event(event, fmt)
+        except Exception as e:
+            # 响应头已发出，错误作为最后一个事件返回
+            logger.error(f"OCR 错误: {str(e)}")
+            metrics.ERRORS.inc(type=type(e).__name__)
+            yield _encode_event({'event': 'error', 'error': str(e)}, fmt)
+        finally:
+            notify_status(False)
+
+    response = Response(generate(), mimetype=STREAM_FORMATS[fmt])
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Cache-Control'] = 'no-cache'
+    # 反向代理（nginx）不缓冲，逐条转发
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _parse_upload():
+    """
+    解析 /ocr 请求体，返回 (图片类型, 图片数据, 选项)
+
+    - application/json：{"image": "<base64>", ...}，选项在 JSON 中
+    - multipart/form-data：文件字段 image，选项在表单字段或查询参数中
+    - application/x-snaptext-pixels：未压缩像素，尺寸与格式见 X-Image-* 请求头
+    - 其他（image/png、image/jpeg、application/octet-stream 等）：请求体即图片文件
+    """
+    if request.content_length is not None and request.content_length > config.max_upload_bytes:
+        raise UploadError(f"请求体过大（上限 {config.max_upload_bytes} 字节）", 413)
+
+    mimetype = request.mimetype
+    if mimetype == 'application/json' or request.is_json:
+        data = request.get_json(silent=True)
+        if not data or 'image' not in data:
+            raise UploadError('缺少图片数据')
+        return 'base64', data['image'], data
+
+    options = request.args.to_dict()
+    if mimetype == 'multipart/form-data':
+        options.update(request.form.to_dict())
+        upload = request.files.get('image')
+        if upload is None:
+            raise UploadError('缺少图片文件字段 image')
+        return 'bytes', upload.read(), options
+
+    body = _read_body()
+    if not body:
+        raise UploadError('缺少图片数据')
+    if mimetype == PIXELS_CONTENT_TYPE:
+        try:
+            with metrics.stage("image_decode"):
+                img = decode_pixels(
+                    body,
+                    _header_int('X-Image-Width'),
+                    _header_int('X-Image-Height'),
+                    _header_int('X-Image-Stride', 0),
+                    request.headers.get('X-Pixel-Format', 'bgra').lower(),
+                )
+        except ValueError as e:
+            raise UploadError(str(e))
+        return 'array', img, options
+    return 'bytes', body, options
 
 
 @app.route('/ocr', methods=['POST', 'OPTIONS'])
@@ -43,83 +299,373 @@ def ocr_endpoint():
         response = app.make_default_options_response()
         response.headers['Access-Control-Allow-Origin'] = '*'
         response.headers['Access-Control-Allow-Methods'] = 'POST, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+        response.headers['Access-Control-Allow-Headers'] = _CORS_HEADERS
         return response
     
+    start = time.perf_counter()
+    if request.content_length is not None:
+        metrics.REQUEST_BYTES.observe(request.content_length)
+    try:
+        kind, image, options = _parse_upload()
+        # 允许请求单独指定识别模式与版面模式，否则使用配置
+        mode = resolve_mode(options.get('mode'))
+        layout = resolve_layout(options.get('layout'))
+        stream = _stream_format(options)
+    except UploadError as e:
+        _record_request(e.status, e)
+        return _json_response({'error': str(e)}, e.status)
+    except ValueError as e:
+        _record_request(400, e)
+        return _json_response({'error': str(e)}, 400)
+    line_languages = _parse_flag(options.get('line_languages'))
+    
+    deadline = _request_deadline()
+    if deadline is not None and time.monotonic() >= deadline:
+        return _deadline_exceeded_response()
+    
+    if stream is not None:
+        # 响应头先于识别发出，识别中的错误在流中以 error 事件返回
+        _record_request(200)
+        return _stream_response(kind, image, mode, layout, line_languages, stream)
+    
     try:
         notify_status(True)
         
-        data = request.get_json()
-        if not data or 'image' not in data:
-            return jsonify({'error': '缺少图片数据'}), 400
-        
-        base64_image = data['image']
-        mode = config.mode
+        upload = kind
+        if kind == 'base64':
+            # 只解码一次，识别与历史记录（图片哈希）共用解码后的字节
+            kind, image = 'bytes', decode_base64(image)
         
         # 执行 OCR
-        texts, language = ocr_from_base64(base64_image, mode)
+        ocr = {
+            'bytes': ocr_detailed_from_bytes,
+            'array': ocr_detailed_from_array,
+        }[kind]
+        result = ocr(image, mode, layout, line_languages=line_languages)
         
-        # 更新统计
+        # 更新统计，记录历史（后台线程写入）
         config.increment_count()
+        history_store.record('\n'.join(result['texts']), result['from'], 'api', image)
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, upload=upload)
+        _record_request(200)
         
-        logger.info(f"OCR 成功: {len(texts)} 行文本, 语言: {language}")
+        logger.info(f"OCR 成功: {len(result['texts'])} 行文本, 语言: {result['from']}")
         
-        response = jsonify({
-            'texts': texts,
-            'from': language
-        })
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
+        # 返回 texts / from；layout 为 blocks 时附带版块结构
+        return _json_response(result)
         
     except Exception as e:
         logger.error(f"OCR 错误: {str(e)}")
-        response = jsonify({'error': str(e)})
-        response.status_code = 500
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
+        _record_request(500, e)
+        return _json_response({'error': str(e)}, 500)
         
     finally:
         notify_status(False)
 
 
+def _option_int(options: dict, name: str, default=None):
+    value = options.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} 必须是整数: {value}")
+
+
+def _document_response(document: Document, pages: range, mode: str, layout: str,
+                       line_languages: bool, fmt: str):
+    """逐页识别文档，按页码顺序流式输出每页结果，最后输出汇总"""
+
+    def generate():
+        start = time.perf_counter()
+        texts = []
+        failed = 0
+        notify_status(True)
+        try:
+            yield _encode_event({
+                'event': 'document',
+                'type': document.kind,
+                'pages': document.page_count,
+                'first_page': pages.start,
+                'last_page': pages.stop - 1,
+            }, fmt)
+            results = ocr_document(
+                document, mode, layout, first_page=pages.start, last_page=pages.stop - 1,
+                line_languages=line_languages,
+            )
+            # 客户端断开时关闭逐页识别，不再栅格化后续页面
+            with contextlib.closing(results):
+                for page in results:
+                    if 'error' in page:
+                        failed += 1
+                    else:
+                        texts.extend(page['texts'])
+                    yield _encode_event({'event': 'page', **page}, fmt)
+            language = detect_language(' '.join(texts)) if texts else 'auto'
+            config.increment_count()
+            history_store.record('\n'.join(texts), language, 'api')
+            metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, upload='document')
+            logger.info(f"OCR 成功（文档）: {len(pages)} 页, {len(texts)} 行文本, 失败 {failed} 页")
+            yield _encode_event({
+                'event': 'done',
+                'pages': len(pages),
+                'failed': failed,
+                'from': language,
+                'timings': {'total_ms': round((time.perf_counter() - start) * 1000, 1)},
+            }, fmt)
+        except Exception as e:
+            logger.error(f"OCR 错误: {str(e)}")
+            metrics.ERRORS.inc(type=type(e).__name__)
+            yield _encode_event({'event': 'error', 'error': str(e)}, fmt)
+        finally:
+            notify_status(False)
+
+    response = Response(generate(), mimetype=STREAM_FORMATS[fmt])
+    # 响应结束（包括客户端断开、生成器未启动）时释放文档
+    response.call_on_close(document.close)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/ocr/document', methods=['POST', 'OPTIONS'])
+def ocr_document_endpoint():
+    """
+    多页文档（PDF / 多帧 TIFF）OCR 端点，按页码顺序流式返回每页结果
+
+    请求体同 /ocr（不支持未压缩像素）；选项 mode / layout / line_languages，
+    dpi（PDF 栅格化分辨率，默认 document_dpi）、first_page / last_page（1 起始，包含两端），
+    stream 为 ndjson（默认）或 sse
+    """
+    if request.method == 'OPTIONS':
+        response = app.make_default_options_response()
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        response.headers['Access-Control-Allow-Methods'] = 'POST, OPTIONS'
+        response.headers['Access-Control-Allow-Headers'] = _CORS_HEADERS
+        return response
+
+    if request.content_length is not None:
+        metrics.REQUEST_BYTES.observe(request.content_length)
+    try:
+        kind, data, options = _parse_upload()
+        if kind == 'array':
+            raise UploadError('文档识别不支持未压缩像素上传')
+        if kind == 'base64':
+            data = decode_base64(data)
+        mode = resolve_mode(options.get('mode'))
+        layout = resolve_layout(options.get('layout'))
+        fmt = _stream_format(options) or 'ndjson'
+        dpi = min(max(_option_int(options, 'dpi', config.document_dpi), 36), 600)
+        first_page = _option_int(options, 'first_page', 1)
+        last_page = _option_int(options, 'last_page')
+        # 只读取页数，页面在识别时逐页栅格化
+        document = Document(data, dpi)
+    except UploadError as e:
+        _record_request(e.status, e)
+        return _json_response({'error': str(e)}, e.status)
+    except ValueError as e:
+        _record_request(400, e)
+        return _json_response({'error': str(e)}, 400)
+    except RuntimeError as e:
+        # 缺少 PDF 依赖
+        _record_request(501, e)
+        return _json_response({'error': str(e)}, 501)
+    line_languages = _parse_flag(options.get('line_languages'))
+
+    pages = document.page_range(first_page, last_page)
+    if not pages:
+        document.close()
+        _record_request(400)
+        return _json_response({'error': f'页码范围为空（文档共 {document.page_count} 页）'}, 400)
+
+    deadline = _request_deadline()
+    if deadline is not None and time.monotonic() >= deadline:
+        document.close()
+        return _deadline_exceeded_response()
+
+    _record_request(200)
+    return _document_response(document, pages, mode, layout, line_languages, fmt)
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """健康检查端点"""
-    return jsonify({'status': 'ok', 'port': config.port})
+    """
+    健康检查端点
+
+    模型预热完成（或未开启预热）前返回 503，status 为 starting / error，
+    state 给出 loading / warming / ready 等细分状态及加载耗时。
+    预热失败后，只要之后有一次识别成功（模型按需加载），就恢复为 ok
+    """
+    warmup = get_warmup_status()
+    ready = warmup['state'] in ('ready', 'idle')
+    if ready:
+        status = 'ok'
+    elif warmup['state'] == 'error':
+        status = 'error'
+    else:
+        status = 'starting'
+    response = jsonify({'status': status, 'port': config.port, **warmup})
+    if not ready:
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+    return response
 
 
 @app.route('/stats', methods=['GET'])
 def get_stats():
     """获取统计信息"""
-    stats = config.get_stats()
+    stats = dict(config.get_stats())
+    stats['cache'] = get_cache_stats()
+    # 并发的重复请求合并（等待同一次识别）的次数
+    stats['coalescing'] = get_coalescing_stats()
+    # 执行前被丢弃的请求数（排队已满 / 超过截止时间 / 客户端断开）
+    stats['shed'] = {reason: int(metrics.SHED.value(reason=reason)) for reason in metrics.SHED_REASONS}
+    history = history_store.get_history()
+    if history is not None:
+        stats['history'] = history.stats()
     return jsonify(stats)
 
 
+# /history 只接受这些 Host（防止 DNS 重绑定把外部域名解析到本机后读取历史）
+_LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def _private_json_response(payload: dict, status: int = 200):
+    """JSON 响应（不允许跨域，用于包含用户数据的接口）"""
+    response = jsonify(payload)
+    response.status_code = status
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def _is_local_request() -> bool:
+    """
+    请求来自本机的非浏览器客户端：来源地址为回环地址、Host 为本机名且没有 Origin 请求头
+
+    浏览器中的网页跨域请求总会带 Origin，局域网中的其他主机来源地址不是回环地址
+    """
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    if getattr(address, 'ipv4_mapped', None) is not None:
+        address = address.ipv4_mapped
+    if not address.is_loopback:
+        return False
+    host = request.host.lower()
+    # 去掉端口：[::1]:9999 / localhost:9999
+    host = host[1:host.find(']')] if host.startswith('[') else host.rsplit(':', 1)[0]
+    if host not in _LOCAL_HOSTS:
+        return False
+    return 'Origin' not in request.headers
+
+
+@app.route('/history', methods=['GET'])
+def get_history():
+    """
+    识别历史（按时间倒序）
+
+    查询参数：q 为检索词（空格分隔，需全部包含），limit 为条数（默认 history_limit），
+    before 为上一页最后一条的 id，thumbnails=1 时附带 base64 缩略图。
+    历史包含用户的截图文本：只响应本机的非浏览器请求，且不带 CORS 响应头
+    """
+    if not _is_local_request():
+        return _private_json_response({'error': '识别历史只允许本机访问'}, 403)
+    history = history_store.get_history()
+    if history is None:
+        return _private_json_response({'error': '未开启识别历史'}, 404)
+    try:
+        limit = min(int(request.args.get('limit', config.history_limit)), 1000)
+        before = request.args.get('before')
+        before = int(before) if before else None
+    except ValueError:
+        return _private_json_response({'error': 'limit / before 必须是整数'}, 400)
+    start = time.perf_counter()
+    entries = history.search(
+        request.args.get('q', ''),
+        limit=limit,
+        before=before,
+        thumbnails=_parse_flag(request.args.get('thumbnails')),
+    )
+    return _private_json_response({
+        'entries': entries,
+        'next_before': entries[-1]['id'] if len(entries) == limit and entries else None,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus 文本格式的运行指标"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+# asyncio 模式下正在运行的服务器（用于 stop_server）
+_server = None
+
+
+def _create_server(port: int):
+    """按配置创建 asyncio 服务器"""
+    global _server
+    from async_server import AsyncWSGIServer
+    _server = AsyncWSGIServer(
+        app,
+        host='0.0.0.0',
+        port=port,
+        workers=config.server_workers,
+        keepalive_timeout=config.server_keepalive_timeout,
+        max_body_size=config.max_upload_bytes,
+        queue_size=config.server_queue_size,
+    )
+    return _server
+
+
 def run_server(port: int = None):
-    """运行服务器"""
+    """运行服务器（阻塞当前线程）"""
     if port is None:
         port = config.port
     
     logger.info(f"启动 OCR 服务器，端口: {port}")
-    app.run(host='0.0.0.0', port=port, threaded=True, use_reloader=False)
+    start_warmup()
+    if config.server_backend == 'werkzeug':
+        app.run(host='0.0.0.0', port=port, threaded=True, use_reloader=False)
+    else:
+        _create_server(port).serve_forever()
 
 
 def run_server_threaded(port: int = None):
-    """在线程中运行服务器"""
-    import threading
-    
+    """在线程中运行服务器；asyncio 模式下端口监听失败会直接抛出异常"""
     if port is None:
         port = config.port
     
-    server_thread = threading.Thread(
-        target=lambda: app.run(
-            host='0.0.0.0',
-            port=port,
-            threaded=True,
-            use_reloader=False
-        ),
-        daemon=True
-    )
-    server_thread.start()
+    if config.server_backend == 'werkzeug':
+        server_thread = threading.Thread(
+            target=lambda: app.run(
+                host='0.0.0.0',
+                port=port,
+                threaded=True,
+                use_reloader=False
+            ),
+            daemon=True
+        )
+        server_thread.start()
+    else:
+        server_thread = _create_server(port).start()
     logger.info(f"OCR 服务器线程已启动，端口: {port}")
+    # 服务已可接受连接，模型在后台加载，/health 在就绪前返回 503
+    start_warmup()
     return server_thread
+
+
+def stop_server(timeout: float = 5.0):
+    """
+    停止 asyncio 服务器：不再接受新连接，等待进行中的请求完成（最多 timeout 秒）
+
+    werkzeug 模式下不做任何事（服务线程随进程退出）
+    """
+    global _server
+    server, _server = _server, None
+    if server is not None:
+        server.shutdown(timeout)
@@ -0,0 +1,257 @@
+"""
+ONNX Runtime 会话配置模块
+
+RapidOCR 在 OrtInferSession._init_sess_opts 中写死了会话参数，这里替换为按 Config 生成
+（线程数、图优化级别、内存 arena、执行模式）。首次加载时把优化后的模型图序列化到
+~/.snaptext/models，之后启动直接加载优化后的模型，跳过与硬件无关的图优化。
+"""
+import hashlib
+import os
+import platform
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from config import config
+
+# 配置值 -> onnxruntime.GraphOptimizationLevel 成员名
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+# 配置值 -> onnxruntime.ExecutionMode 成员名
+EXECUTION_MODES = {
+    "sequential": "ORT_SEQUENTIAL",
+    "parallel": "ORT_PARALLEL",
+}
+
+# 写入缓存的模型最多做到 extended 级别：all 级别的布局变换（NCHWc 等）按当前 CPU 的指令集
+# 选择内核，序列化后换到特性不同的 CPU（同为 x86_64）上可能无法加载或结果出错
+PERSISTED_OPTIMIZATION_LEVELS = ("basic", "extended")
+
+# 本次构建引擎时正在写入的优化模型：(临时文件, 缓存文件)
+_pending: List[Tuple[Path, Path]] = []
+_installed = False
+
+
+def model_cache_dir() -> Path:
+    """优化后模型的缓存目录"""
+    return config.config_dir / "models"
+
+
+def _graph_optimization_name() -> str:
+    name = config.ort_graph_optimization
+    if name not in GRAPH_OPTIMIZATION_LEVELS:
+        print(f"未知的图优化级别: {name}，使用 all")
+        name = "all"
+    return name
+
+
+def _execution_mode_name() -> str:
+    name = config.ort_execution_mode
+    if name not in EXECUTION_MODES:
+        print(f"未知的执行模式: {name}，使用 sequential")
+        name = "sequential"
+    return name
+
+
+def _persisted_level() -> str:
+    """写入缓存的优化级别（all 降为 extended，硬件相关的变换在加载时按本机 CPU 重做）"""
+    level = _graph_optimization_name()
+    return level if level in PERSISTED_OPTIMIZATION_LEVELS else "extended"
+
+
+def _cache_path(model_path: str) -> Path:
+    """
+    优化后模型的缓存文件路径
+
+    缓存的模型与硬件无关（见 PERSISTED_OPTIMIZATION_LEVELS），优化结果只与 ONNX Runtime 版本、
+    CPU 架构和源模型有关，任一变化都会得到新的文件名
+    """
+    import onnxruntime
+
+    source = Path(model_path)
+    stat = source.stat()
+    h = hashlib.blake2b(digest_size=8)
+    for part in (
+        onnxruntime.__version__,
+        platform.machine(),
+        str(source.resolve()),
+        str(stat.st_size),
+        str(int(stat.st_mtime)),
+        _persisted_level(),
+    ):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return model_cache_dir() / f"{source.stem}.{h.hexdigest()}.onnx"
+
+
+def _is_cached_model(model_path: str) -> bool:
+    return Path(model_path).parent == model_cache_dir()
+
+
+def _init_sess_opts(module_config: dict):
+    """替换 OrtInferSession._init_sess_opts：按 Config 生成 SessionOptions"""
+    import onnxruntime as ort
+
+    sess_opt = ort.SessionOptions()
+    sess_opt.log_severity_level = 4
+    sess_opt.enable_cpu_mem_arena = config.ort_cpu_mem_arena
+    sess_opt.execution_mode = getattr(ort.ExecutionMode, EXECUTION_MODES[_execution_mode_name()])
+    # 0 表示由 ONNX Runtime 决定（默认使用全部物理核）
+    if config.ort_intra_op_threads > 0:
+        sess_opt.intra_op_num_threads = config.ort_intra_op_threads
+    if config.ort_inter_op_threads > 0:
+        sess_opt.inter_op_num_threads = config.ort_inter_op_threads
+
+    level = _graph_optimization_name()
+    sess_opt.graph_optimization_level = getattr(
+        ort.GraphOptimizationLevel, GRAPH_OPTIMIZATION_LEVELS[level]
+    )
+    model_path = module_config.get("model_path")
+    if model_path and _is_cached_model(model_path):
+        # 缓存的模型已完成与硬件无关的优化；all 级别只需在本机 CPU 上补做布局变换
+        if level in PERSISTED_OPTIMIZATION_LEVELS:
+            sess_opt.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        return sess_opt
+
+    if model_path and config.ort_model_cache and level != "disable":
+        target = _cache_path(model_path)
+        # 先写临时文件，会话创建成功后再改名，避免留下不完整的缓存
+        temp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if level in PERSISTED_OPTIMIZATION_LEVELS:
+                sess_opt.optimized_model_filepath = str(temp)
+            else:
+                _save_optimized(model_path, temp)
+            _pending.append((temp, target))
+        except Exception as e:
+            temp.unlink(missing_ok=True)
+            print(f"模型缓存写入失败: {e}")
+    return sess_opt
+
+
+def _save_optimized(model_path: str, path: Path):
+    """
+    按 extended 级别优化模型并写入 path
+
+    本次会话仍按 all 级别创建；all 级别的优化结果与 CPU 相关，不能直接序列化进缓存，
+    只在首次加载时多创建一次会话（约 0.1 s）
+    """
+    import onnxruntime as ort
+
+    sess_opt = ort.SessionOptions()
+    sess_opt.log_severity_level = 4
+    sess_opt.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    sess_opt.optimized_model_filepath = str(path)
+    ort.InferenceSession(model_path, sess_options=sess_opt, providers=["CPUExecutionProvider"])
+
+
+def install():
+    """让 RapidOCR 创建的所有 ONNX 会话使用本模块的会话配置（只需调用一次）"""
+    global _installed
+    if _installed:
+        return
+    from rapidocr_onnxruntime.utils import OrtInferSession
+
+    OrtInferSession._init_sess_opts = staticmethod(_init_sess_opts)
+    _installed = True
+
+
+def bundled_model_dir() -> Path:
+    """随应用打包的模型目录（resources/models）"""
+    if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
+        return Path(sys._MEIPASS) / "resources" / "models"
+    return Path(__file__).resolve().parent / "resources" / "models"
+
+
+def default_model_paths() -> Dict[str, str]:
+    """RapidOCR 自带的检测 / 方向分类 / 识别模型路径"""
+    from rapidocr_onnxruntime.main import DEFAULT_CFG_PATH
+    from rapidocr_onnxruntime.utils import read_yaml, update_model_path
+
+    cfg = update_model_path(read_yaml(DEFAULT_CFG_PATH))
+    return {
+        "det": cfg["Det"]["model_path"],
+        "cls": cfg["Cls"]["model_path"],
+        "rec": cfg["Rec"]["model_path"],
+    }
+
+
+def int8_model_dir() -> Path:
+    """
+    quantize_models.py 生成的 INT8 模型目录
+
+    量化模型不入库（.gitignore），源码运行需先执行 quantize_models.py 生成；
+    release.sh 打包前会在缺失时自动生成
+    """
+    return bundled_model_dir() / "int8"
+
+
+def int8_available() -> bool:
+    """INT8 模型是否已生成（没有时 int8 档位回退到 FP32）"""
+    int8_dir = int8_model_dir()
+    return int8_dir.is_dir() and any(int8_dir.glob("*.onnx"))
+
+
+def model_sources(profile: str) -> Dict[str, str]:
+    """
+    模型档位对应的检测 / 方向分类 / 识别模型路径
+
+    int8 档位使用 quantize_models.py 生成的量化模型；模型尚未生成时整体回退到 FP32
+    并打印提示，未量化的模型（如方向分类）沿用 FP32
+    """
+    sources = default_model_paths()
+    if profile == "int8":
+        int8_dir = int8_model_dir()
+        if not int8_available():
+            print(
+                f"未找到 INT8 模型（{int8_dir}）：量化模型不随源码提供，"
+                f"请先运行 python quantize_models.py 生成；本次使用 FP32 模型"
+            )
+            return sources
+        for name, source in sources.items():
+            quantized = int8_dir / Path(source).name
+            if quantized.exists():
+                sources[name] = str(quantized)
+    return sources
+
+
+def model_path_kwargs(sources: Dict[str, str]) -> Dict[str, str]:
+    """
+    生成 RapidOCR 的 det/cls/rec_model_path 参数
+
+    已有优化缓存的模型指向缓存文件，否则指向源模型（加载时写入缓存）
+    """
+    kwargs = {}
+    for name, source in sources.items():
+        path = source
+        if config.ort_model_cache and _graph_optimization_name() != "disable":
+            try:
+                cached = _cache_path(source)
+                if cached.exists():
+                    path = str(cached)
+            except OSError:
+                pass
+        kwargs[f"{name}_model_path"] = path
+    return kwargs
+
+
+def commit_cached_models(success: bool = True):
+    """
+    引擎构建结束后调用：成功时把写好的优化模型改名为缓存文件，失败时清理临时文件
+    """
+    while _pending:
+        temp, target = _pending.pop()
+        try:
+            if success and temp.exists():
+                os.replace(temp, target)
+            else:
+                temp.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"模型缓存写入失败: {e}")
+
@@ -0,0 +1,286 @@
+"""
+INT8 模型生成脚本
+
+从 RapidOCR 自带的 FP32 模型（SnapText.spec 中 collect_data_files('rapidocr_onnxruntime')
+打包的同一批模型）生成静态量化的 INT8 模型，写入 resources/models/int8，随 resources 一起打包。
+
+步骤：opset 升级到 13（逐通道量化需要）-> ONNX Runtime 量化预处理 ->
+用固定种子的基准语料（bench.corpus.suite_corpus，latin / cjk / mixed 轮流）跑一遍 FP32 流水线，
+记录各模型的真实输入作为校准数据 -> QDQ 格式静态量化（权重 int8 逐通道，激活 uint8，MinMax 校准）->
+在另一个种子的语料上按文字分别比较 FP32 与 INT8 的识别相似度。
+同样的 RapidOCR / ONNX Runtime 版本、参数与字体得到同样的模型，参数与评估结果记录在 manifest.json。
+
+中日文字体缺失时语料只剩英文，校准出的激活范围不覆盖中文识别，默认直接报错退出；
+确实只需要英文时加 --latin-only。
+
+需要额外安装 onnx（仅构建时使用）::
+
+    pip install onnx
+    python quantize_models.py [--models det rec] [--images 9] [--latin-only]
+"""
+import argparse
+import hashlib
+import json
+import math
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+import ort_session
+from bench.corpus import BenchCase, suite_corpus
+from text_metrics import similarity
+
+# 默认量化的模型：方向分类模型很小，量化后反而更慢，保持 FP32
+DEFAULT_MODELS = ["det", "rec"]
+# 校准语料的随机种子（与评估用的语料区分开）
+CALIBRATION_SEED = 1
+# 评估语料的随机种子（与 bench.suite 相同）
+EVALUATION_SEED = 0
+# 每个模型最多记录的校准样本数
+MAX_CALIBRATION_SAMPLES = 16
+# 校准输入裁剪到的最大边长（检测为全卷积网络、识别按宽度滑动，裁剪不影响激活值分布，
+# 但校准时每个样本的全部中间结果都在内存中，大图和长行单个样本就会占用数 GB）
+MAX_CALIBRATION_SIDE = 960
+QUANT_OPSET = 13
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _decode(case: BenchCase) -> np.ndarray:
+    return cv2.imdecode(np.frombuffer(case.png, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def _check_scripts(skipped: List[str], latin_only: bool):
+    """缺少中日文字体时报错退出（--latin-only 时只打印警告）"""
+    if not skipped:
+        return
+    message = f"未找到中日文字体，语料缺少 {', '.join(skipped)}"
+    if not latin_only:
+        sys.exit(f"{message}；只用英文校准的 INT8 模型中文识别会明显变差。"
+                 f"请安装中日文字体（见 bench/corpus.py 的 FONT_CANDIDATES），或加 --latin-only")
+    print(f"警告：{message}，仅用英文校准与评估")
+
+
+def calibration_cases(images: int) -> List[BenchCase]:
+    """
+    校准用的 images 张语料图片，按 latin / cjk / mixed 轮流选取
+
+    一套语料不够时换下一个种子继续生成，相同参数与字体得到相同图片
+    """
+    by_script: Dict[str, List[BenchCase]] = {}
+    seed = CALIBRATION_SEED
+    while sum(len(v) for v in by_script.values()) < images:
+        cases, _ = suite_corpus(seed=seed)
+        for case in cases:
+            by_script.setdefault(case.script, []).append(case)
+        seed += 1
+    queues = list(by_script.values())
+    selected = []
+    for index in range(max(len(q) for q in queues)):
+        selected.extend(q[index] for q in queues if index < len(q))
+    return selected[:images]
+
+
+def collect_calibration_inputs(cases: List[BenchCase]) -> Dict[str, List[np.ndarray]]:
+    """
+    用 FP32 模型识别语料图片，记录 det/cls/rec 各模型实际收到的输入
+
+    每张图片最多贡献 MAX_CALIBRATION_SAMPLES / 图片数 个样本，
+    避免前几张英文图片的文本行就占满识别模型的样本数
+    """
+    from rapidocr_onnxruntime import RapidOCR
+    from rapidocr_onnxruntime.utils import OrtInferSession
+
+    engine = RapidOCR()
+    sessions = {
+        id(engine.text_det.infer): "det",
+        id(engine.text_cls.infer): "cls",
+        id(engine.text_rec.session): "rec",
+    }
+    inputs: Dict[str, List[np.ndarray]] = {"det": [], "cls": [], "rec": []}
+    per_image = max(math.ceil(MAX_CALIBRATION_SAMPLES / max(len(cases), 1)), 1)
+    taken: Dict[str, int] = {}
+    original_call = OrtInferSession.__call__
+
+    def recording_call(self, input_content):
+        name = sessions.get(id(self))
+        if name is not None:
+            room = min(MAX_CALIBRATION_SAMPLES - len(inputs[name]), per_image - taken.get(name, 0))
+            if room > 0:
+                sample = input_content[:room, ..., :MAX_CALIBRATION_SIDE, :MAX_CALIBRATION_SIDE]
+                # 批次拆成单个样本，MinMax 校准的结果不变，但峰值内存只与单个样本有关
+                inputs[name].extend(np.array(item[None], copy=True) for item in sample)
+                taken[name] = taken.get(name, 0) + len(sample)
+        return original_call(self, input_content)
+
+    OrtInferSession.__call__ = recording_call
+    try:
+        for case in cases:
+            taken.clear()
+            engine(_decode(case))
+    finally:
+        OrtInferSession.__call__ = original_call
+    return inputs
+
+
+def evaluate(sources: Dict[str, str], cases: List[BenchCase]) -> Dict[str, float]:
+    """用给定的模型识别评估语料，返回各文字（latin / cjk / mixed）的平均字符相似度"""
+    from rapidocr_onnxruntime import RapidOCR
+
+    engine = RapidOCR(**{f"{name}_model_path": path for name, path in sources.items()})
+    scores: Dict[str, List[float]] = {}
+    for case in cases:
+        result, _ = engine(_decode(case))
+        texts = [item[1] for item in result or []]
+        scores.setdefault(case.script, []).append(similarity(texts, case.lines))
+    return {script: round(statistics.mean(values), 4) for script, values in scores.items()}
+
+
+def quantize_model(source: str, target: Path, samples: List[np.ndarray]):
+    """把单个 FP32 模型静态量化为 INT8（QDQ）"""
+    import onnx
+    import onnxruntime as ort
+    from onnx import version_converter
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    input_name = ort.InferenceSession(source, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class _Reader(CalibrationDataReader):
+        """配合 CalibStridedMinMax 逐段读取：每段校准完立即归约成数值范围再读下一段"""
+
+        def __init__(self):
+            self._items = iter([])
+
+        def __len__(self):
+            return len(samples)
+
+        def set_range(self, start_index: int, end_index: int):
+            self._items = iter([{input_name: sample} for sample in samples[start_index:end_index]])
+
+        def get_next(self):
+            return next(self._items, None)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        upgraded = Path(workdir) / "upgraded.onnx"
+        prepared = Path(workdir) / "prepared.onnx"
+        model = onnx.load(source)
+        if model.opset_import[0].version < QUANT_OPSET:
+            model = version_converter.convert_version(model, QUANT_OPSET)
+        onnx.save(model, str(upgraded))
+        # 常量折叠后卷积权重才是 initializer，才能被量化
+        quant_pre_process(str(upgraded), str(prepared), skip_symbolic_shape=True)
+        quantize_static(
+            str(prepared),
+            str(target),
+            _Reader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+            calibrate_method=CalibrationMethod.MinMax,
+            extra_options={"CalibStridedMinMax": 1},
+        )
+
+    # 识别模型的字符表保存在模型元数据里，量化后补回
+    source_meta = onnx.load(source, load_external_data=False).metadata_props
+    if source_meta:
+        quantized = onnx.load(str(target))
+        del quantized.metadata_props[:]
+        quantized.metadata_props.extend(source_meta)
+        onnx.save(quantized, str(target))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 INT8 量化模型")
+    parser.add_argument(
+        "--models", nargs="+", default=DEFAULT_MODELS, choices=["det", "cls", "rec"],
+        help="要量化的模型",
+    )
+    parser.add_argument("--images", type=int, default=9, help="校准用语料图片数量")
+    parser.add_argument(
+        "--latin-only", action="store_true", help="没有中日文字体时仍然继续（只用英文校准与评估）"
+    )
+    parser.add_argument(
+        "--output", type=Path, default=ort_session.int8_model_dir(), help="输出目录"
+    )
+    args = parser.parse_args()
+
+    import onnxruntime
+
+    evaluation_cases, skipped = suite_corpus(seed=EVALUATION_SEED)
+    _check_scripts(skipped, args.latin_only)
+    cases = calibration_cases(args.images)
+    sources = ort_session.default_model_paths()
+    args.output.mkdir(parents=True, exist_ok=True)
+
+    print(f"收集校准数据（{len(cases)} 张语料图片）...")
+    calibration = collect_calibration_inputs(cases)
+
+    manifest = {
+        "onnxruntime": onnxruntime.__version__,
+        "calibration_seed": CALIBRATION_SEED,
+        "calibration_images": len(cases),
+        "calibration_scripts": {
+            script: sum(case.script == script for case in cases)
+            for script in dict.fromkeys(case.script for case in cases)
+        },
+        "models": {},
+    }
+    quantized = dict(sources)
+    for name in args.models:
+        source = sources[name]
+        target = args.output / Path(source).name
+        start = time.perf_counter()
+        quantize_model(source, target, calibration[name])
+        print(
+            f"{name}: {Path(source).stat().st_size / 1e6:.1f} MB -> "
+            f"{target.stat().st_size / 1e6:.1f} MB（{time.perf_counter() - start:.0f}s）"
+        )
+        quantized[name] = str(target)
+        manifest["models"][name] = {
+            "file": target.name,
+            "source": Path(source).name,
+            "source_blake2b": _file_digest(source),
+            "calibration_samples": len(calibration[name]),
+        }
+
+    print(f"评估识别相似度（{len(evaluation_cases)} 张语料图片）...")
+    accuracy = {
+        "fp32": evaluate(sources, evaluation_cases),
+        "int8": evaluate(quantized, evaluation_cases),
+    }
+    # 各文字分别记录，英文的高分不会掩盖中文识别的退化
+    manifest["evaluation"] = {
+        "seed": EVALUATION_SEED,
+        "images": len(evaluation_cases),
+        "skipped": skipped,
+        "accuracy": accuracy,
+    }
+    for script in accuracy["fp32"]:
+        print(f"  {script}: fp32 {accuracy['fp32'][script]:.3f} -> int8 {accuracy['int8'][script]:.3f}")
+
+    (args.output / "manifest.json").write_text(json.dumps(manifest, indent=2, ensure_ascii=False))
+    print(f"已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
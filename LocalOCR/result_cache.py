@@ -0,0 +1,234 @@
+"""
+OCR 结果缓存模块 - 按图片内容寻址
+
+内存层为按条目数和字节数限制的 LRU；可选的持久层是 SQLite 文件（WAL 模式），
+应用重启后仍然有效。持久层的写入（新结果、访问时间、淘汰）由后台线程批量提交，
+请求线程只做一次按主键的读取。
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+# 单条缓存的固定开销估算（key、字典、列表等对象）
+_ENTRY_OVERHEAD = 256
+# 持久层写入的合并窗口（秒）：窗口内的写入在一个事务中提交
+_WRITE_DELAY = 0.5
+
+
+class OCRResultCache:
+    """
+    内容寻址的 OCR 结果缓存（线程安全）
+
+    结果字典以 JSON 文本保存：大小可直接计量，取出时反序列化即得到独立副本
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 8 * 1024 * 1024,
+        persist_path: Optional[Path] = None,
+        persist_max_entries: int = 10000,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persist_max_entries = persist_max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._db = None
+        self._db_lock = threading.Lock()
+        # 待写入的记录：key -> JSON 文本（新结果）或 None（只更新访问时间）
+        self._pending: Dict[str, Optional[str]] = {}
+        self._pending_clear = False
+        self._pending_lock = threading.Lock()
+        self._pending_event = threading.Event()
+        self._writer = None
+        if persist_path is not None:
+            self._open_db(persist_path)
+
+    def _open_db(self, path: Path):
+        """打开持久层并启动写入线程，失败时只使用内存缓存"""
+        try:
+            db = sqlite3.connect(str(path), check_same_thread=False)
+            # WAL 下提交只追加日志，synchronous=NORMAL 不在每次提交时 fsync
+            db.execute("PRAGMA journal_mode = WAL")
+            db.execute("PRAGMA synchronous = NORMAL")
+            columns = [row[1] for row in db.execute("PRAGMA table_info(results)")]
+            if columns and "value" not in columns:
+                # 旧版表结构只保存 texts/language，直接重建
+                db.execute("DROP TABLE results")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, atime REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS results_atime ON results(atime)")
+            db.commit()
+            self._db = db
+        except sqlite3.Error as e:
+            print(f"OCR 缓存持久化不可用: {e}")
+            return
+        self._writer = threading.Thread(target=self._run_writer, name="OCRCacheWriter", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[dict]:
+        """
+        查询缓存，未命中返回 None
+
+        count_miss 为 False 时未命中不计入统计（用于后面还有其他 key 可查的情况）
+        """
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return json.loads(encoded)
+
+        # 持久层读取不占用内存层的锁
+        encoded = self._db_get(key)
+        with self._lock:
+            if encoded is not None:
+                self._disk_hits += 1
+                self._store(key, encoded)
+                return json.loads(encoded)
+            if count_miss:
+                self._misses += 1
+            return None
+
+    def put(self, key: str, value: dict):
+        """写入缓存"""
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._store(key, encoded)
+        self._queue_write(key, encoded)
+
+    def _store(self, key: str, encoded: str):
+        """写入内存层并按限制淘汰（调用方需持有锁）"""
+        size = self._size_of(key, encoded)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= self._size_of(key, old)
+        self._entries[key] = encoded
+        self._bytes += size
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._bytes -= self._size_of(evicted_key, evicted)
+
+    @staticmethod
+    def _size_of(key: str, encoded: str) -> int:
+        """一条缓存占用的字节数"""
+        return _ENTRY_OVERHEAD + len(key) + len(encoded.encode("utf-8"))
+
+    def _db_get(self, key: str) -> Optional[str]:
+        if self._db is None:
+            return None
+        with self._pending_lock:
+            # 尚未提交的新结果（可能已被内存层淘汰）
+            encoded = self._pending.get(key)
+            if encoded is not None or self._pending_clear:
+                return encoded
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value FROM results WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        self._queue_write(key, None)
+        return row[0]
+
+    def _queue_write(self, key: str, encoded: Optional[str]):
+        """登记一次持久层写入，由写入线程在合并窗口结束后批量提交"""
+        if self._db is None:
+            return
+        with self._pending_lock:
+            if encoded is not None or key not in self._pending:
+                self._pending[key] = encoded
+        self._pending_event.set()
+
+    def _run_writer(self):
+        while True:
+            self._pending_event.wait()
+            # 等待合并窗口结束，窗口内的写入在同一个事务中提交
+            time.sleep(_WRITE_DELAY)
+            self.flush()
+
+    def flush(self):
+        """立即提交尚未写入持久层的记录（退出时自动调用）"""
+        if self._db is None:
+            return
+        # 先取得连接锁再取出待写入的记录：查询在提交完成前等待，不会漏掉正在提交的结果
+        with self._db_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+                clear, self._pending_clear = self._pending_clear, False
+                self._pending_event.clear()
+            if pending or clear:
+                self._commit(pending, clear)
+
+    def _commit(self, pending: Dict[str, Optional[str]], clear: bool):
+        """在一个事务中写入一批记录（调用方需持有连接锁）"""
+        now = time.time()
+        try:
+            with self._db as db:
+                if clear:
+                    db.execute("DELETE FROM results")
+                db.executemany(
+                    "UPDATE results SET atime = ? WHERE key = ?",
+                    [(now, key) for key, encoded in pending.items() if encoded is None],
+                )
+                rows = [
+                    (key, encoded, now) for key, encoded in pending.items() if encoded is not None
+                ]
+                if rows:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO results (key, value, atime) VALUES (?, ?, ?)", rows
+                    )
+                    # 超出上限时删除最久未访问的记录
+                    db.execute(
+                        "DELETE FROM results WHERE key IN ("
+                        " SELECT key FROM results ORDER BY atime DESC LIMIT -1 OFFSET ?)",
+                        (self.persist_max_entries,),
+                    )
+        except sqlite3.Error as e:
+            print(f"OCR 缓存写入失败: {e}")
+
+    def clear(self):
+        """清空缓存（含持久层）"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._db is not None:
+            with self._pending_lock:
+                self._pending.clear()
+                self._pending_clear = True
+            self._pending_event.set()
+
+    def stats(self) -> dict:
+        """命中统计"""
+        with self._lock:
+            hits = self._hits + self._disk_hits
+            total = hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "persistent": self._db is not None,
+            }
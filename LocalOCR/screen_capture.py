@@ -0,0 +1,62 @@
+"""
+截图模块 - 交互式截图并直接取得图片字节
+
+默认让 screencapture 把截图放到剪贴板（-c），从 NSPasteboard 读取 PNG / TIFF 字节，
+不经过临时文件；图片字节直接交给 ocr_engine 的字节入口，不做 base64 编码与解码。
+capture_method 为 file 时沿用临时文件方式（不占用剪贴板）。
+"""
+import os
+import subprocess
+import tempfile
+import time
+from typing import Optional, Tuple
+
+import metrics
+
+
+def _capture_to_pasteboard() -> Optional[bytes]:
+    """screencapture -c 截图到剪贴板后读取；用户取消（剪贴板未变化）时返回 None"""
+    import AppKit
+
+    pasteboard = AppKit.NSPasteboard.generalPasteboard()
+    change_count = pasteboard.changeCount()
+    # -i: 交互式, -x: 无声, -c: 放到剪贴板
+    subprocess.run(['screencapture', '-i', '-x', '-c'], capture_output=True)
+    if pasteboard.changeCount() == change_count:
+        return None
+    with metrics.stage("capture_read"):
+        for data_type in (AppKit.NSPasteboardTypePNG, AppKit.NSPasteboardTypeTIFF):
+            data = pasteboard.dataForType_(data_type)
+            if data is not None and data.length() > 0:
+                return bytes(data)
+    return None
+
+
+def _capture_to_file() -> Optional[bytes]:
+    """screencapture 写入临时文件后读回；用户取消时返回 None"""
+    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as f:
+        temp_path = f.name
+    try:
+        subprocess.run(['screencapture', '-i', '-x', temp_path], capture_output=True)
+        with metrics.stage("capture_read"):
+            if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+                return None
+            with open(temp_path, 'rb') as f:
+                return f.read()
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def capture_interactive(method: str = "clipboard") -> Tuple[Optional[bytes], float]:
+    """
+    交互式截图，返回 (图片字节, 截图耗时毫秒)；用户取消时图片字节为 None
+
+    截图耗时包含用户框选区域的时间，读取字节的耗时记录在 capture_read 阶段
+    """
+    start = time.perf_counter()
+    if method == "file":
+        data = _capture_to_file()
+    else:
+        data = _capture_to_pasteboard()
+    return data, (time.perf_counter() - start) * 1000
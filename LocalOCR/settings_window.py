@@ -23,7 +23,7 @@ class SettingsAPI:
 
     def get_config(self):
         """获取当前配置"""
-        # 重新加载配置（防止 Main App 修改了）
+        # 配置文件有变化时才重新加载（防止 Main App 修改了）
         config.reload()
         
         # 将内部数据转换为前端需要的格式
@@ -39,9 +39,6 @@ class SettingsAPI:
         """更新配置"""
         print(f"Setting config: {key} = {value}")
         
-        # Reload first to ensure we don't overwrite other recent changes
-        config.reload()
-        
         if key == 'launch_at_login':
             config.launch_at_login = value
         elif key == 'silent_mode':
@@ -51,9 +48,7 @@ class SettingsAPI:
         elif key == 'hotkey':
             config.hotkey = value
             # Since we are in a separate process, we don't update the main app's hotkey manager directly.
-            # The main app has a timer (refresh_config) that will pick up the change from file.
-        
-        config.save()
+            # The main app watches the config file and will pick up the change.
         
     def start_hotkey_recording(self):
         """开始录制快捷键"""
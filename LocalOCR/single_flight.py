@@ -0,0 +1,62 @@
+"""
+请求合并模块 - 相同图片的并发识别只执行一次
+
+结果缓存只对已完成的识别有效；同一张截图几乎同时提交多次（客户端重试、多个客户端）时，
+第一次识别还没完成，后到的请求会各自完整推理一遍。SingleFlight 按 key（图片内容哈希 +
+识别参数）合并正在执行的调用：第一个调用者执行，其余调用者等待并得到同一个结果（或异常）。
+"""
+import copy
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+
+class SingleFlight:
+    """按 key 合并并发调用（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    def run(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        执行 func，或等待相同 key 正在执行的调用
+
+        每个调用者得到结果的独立副本（调用方可以放心修改返回的字典）
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._executed += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            # 先移除再设置结果：之后到达的调用者重新执行（或命中结果缓存）
+            with self._lock:
+                del self._calls[key]
+        future.set_result(result)
+        return copy.deepcopy(result)
+
+    def stats(self) -> dict:
+        """合并统计：executed 为实际执行次数，coalesced 为等待已有调用的次数"""
+        with self._lock:
+            total = self._executed + self._coalesced
+            return {
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls),
+                "coalesce_rate": round(self._coalesced / total, 4) if total else 0.0,
+            }
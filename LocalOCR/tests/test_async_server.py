@@ -0,0 +1,163 @@
+"""
+async_server 的 HTTP 请求解析测试：请求体长度的确定（Content-Length / chunked）与换行符
+
+在 LocalOCR 目录下运行::
+
+    python -m unittest tests.test_async_server
+"""
+import socket
+import unittest
+
+from async_server import BODY_ENVIRON_KEY, AsyncWSGIServer
+
+
+def _echo_app(environ, start_response):
+    if environ["PATH_INFO"] == "/buffer":
+        # environ 中的缓冲区与 wsgi.input 内容一致
+        buffer = environ[BODY_ENVIRON_KEY]
+        same = isinstance(buffer, bytearray) and buffer == environ["wsgi.input"].read()
+        body = b"same" if same else b"different"
+    else:
+        body = environ["wsgi.input"].read()
+    start_response("200 OK", [
+        ("Content-Type", "application/octet-stream"),
+        ("Content-Length", str(len(body))),
+    ])
+    return [body]
+
+
+class RequestParsingTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = AsyncWSGIServer(_echo_app, host="127.0.0.1", port=0, workers=1)
+        cls.server.start()
+        cls.port = cls.server._server.sockets[0].getsockname()[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def exchange(self, raw: bytes) -> bytes:
+        """发送原始请求，读取到服务器关闭连接为止（请求都带 Connection: close 或会被拒绝）"""
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as sock:
+            sock.sendall(raw)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+
+    def responses(self, raw: bytes) -> list:
+        """[(状态码, 响应体)]"""
+        data = self.exchange(raw)
+        results = []
+        while data:
+            head, _, data = data.partition(b"\r\n\r\n")
+            lines = head.split(b"\r\n")
+            headers = dict(line.split(b": ", 1) for line in lines[1:])
+            length = int(headers.get(b"Content-Length", b"0"))
+            results.append((int(lines[0].split(b" ")[1]), data[:length]))
+            data = data[length:]
+        return results
+
+    def status(self, raw: bytes) -> int:
+        return self.responses(raw)[0][0]
+
+    # ---- 换行符 ----
+
+    def test_crlf(self):
+        raw = b"POST / HTTP/1.1\r\nHost: x\r\nContent-Length: 5\r\nConnection: close\r\n\r\nhello"
+        self.assertEqual(self.responses(raw), [(200, b"hello")])
+
+    def test_lf_only(self):
+        raw = b"POST / HTTP/1.1\nHost: x\nContent-Length: 5\nConnection: close\n\nhello"
+        self.assertEqual(self.responses(raw), [(200, b"hello")])
+
+    def test_lf_only_keep_alive(self):
+        first = b"POST / HTTP/1.1\nHost: x\nContent-Length: 3\n\none"
+        second = b"POST / HTTP/1.1\nHost: x\nContent-Length: 3\nConnection: close\n\ntwo"
+        self.assertEqual(self.responses(first + second), [(200, b"one"), (200, b"two")])
+
+    def test_leading_empty_lines(self):
+        raw = b"\r\n\r\nGET / HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"
+        self.assertEqual(self.status(raw), 200)
+
+    def test_body_buffer(self):
+        raw = b"POST /buffer HTTP/1.1\r\nHost: x\r\nContent-Length: 5\r\nConnection: close\r\n\r\nhello"
+        self.assertEqual(self.responses(raw), [(200, b"same")])
+
+    def test_bare_cr(self):
+        raw = b"POST / HTTP/1.1\r\nHost: x\rContent-Length: 5\r\nConnection: close\r\n\r\nhello"
+        self.assertEqual(self.status(raw), 400)
+
+    # ---- Content-Length ----
+
+    def test_duplicate_content_length(self):
+        raw = (b"POST / HTTP/1.1\r\nHost: x\r\nContent-Length: 5\r\nContent-Length: 5\r\n"
+               b"Connection: close\r\n\r\nhello")
+        self.assertEqual(self.status(raw), 400)
+
+    def test_conflicting_content_length(self):
+        raw = (b"POST / HTTP/1.1\r\nHost: x\r\nContent-Length: 5\r\nContent-Length: 3\r\n"
+               b"Connection: close\r\n\r\nhello")
+        self.assertEqual(self.status(raw), 400)
+
+    def test_invalid_content_length(self):
+        for value in (b"5, 5", b"+5", b"5_0", b"-1", b"0x5", b""):
+            with self.subTest(value=value):
+                raw = (b"POST / HTTP/1.1\r\nHost: x\r\nContent-Length: " + value
+                       + b"\r\nConnection: close\r\n\r\nhello")
+                self.assertEqual(self.status(raw), 400)
+
+    def test_whitespace_before_colon(self):
+        raw = b"POST / HTTP/1.1\r\nHost: x\r\nContent-Length : 5\r\nConnection: close\r\n\r\nhello"
+        self.assertEqual(self.status(raw), 400)
+
+    def test_obsolete_line_folding(self):
+        raw = b"GET / HTTP/1.1\r\nHost: x\r\nX-Folded: a\r\n b\r\nConnection: close\r\n\r\n"
+        self.assertEqual(self.status(raw), 400)
+
+    # ---- Transfer-Encoding ----
+
+    def test_chunked(self):
+        raw = (b"POST / HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+               b"3\r\nhel\r\n2;ext=1\r\nlo\r\n0\r\nX-Trailer: 1\r\n\r\n")
+        self.assertEqual(self.responses(raw), [(200, b"hello")])
+
+    def test_chunked_lf_only(self):
+        raw = (b"POST / HTTP/1.1\nHost: x\nTransfer-Encoding: chunked\nConnection: close\n\n"
+               b"3\nhel\n2\nlo\n0\n\n")
+        self.assertEqual(self.responses(raw), [(200, b"hello")])
+
+    def test_transfer_encoding_with_content_length(self):
+        raw = (b"POST / HTTP/1.1\r\nHost: x\r\nContent-Length: 3\r\nTransfer-Encoding: chunked\r\n"
+               b"Connection: close\r\n\r\n5\r\nhello\r\n0\r\n\r\n")
+        self.assertEqual(self.status(raw), 400)
+
+    def test_unsupported_transfer_encoding(self):
+        for value in (b"gzip", b"gzip, chunked", b"chunked, chunked"):
+            with self.subTest(value=value):
+                raw = (b"POST / HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: " + value
+                       + b"\r\nConnection: close\r\n\r\n0\r\n\r\n")
+                self.assertEqual(self.status(raw), 501)
+
+    def test_transfer_encoding_http10(self):
+        raw = b"POST / HTTP/1.0\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n0\r\n\r\n"
+        self.assertEqual(self.status(raw), 400)
+
+    def test_invalid_chunk_size(self):
+        for size in (b"0x5", b"+5", b"5_0", b"g"):
+            with self.subTest(size=size):
+                raw = (b"POST / HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n"
+                       b"Connection: close\r\n\r\n" + size + b"\r\nhello\r\n0\r\n\r\n")
+                self.assertEqual(self.status(raw), 400)
+
+    def test_missing_chunk_terminator(self):
+        raw = (b"POST / HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+               b"3\r\nhelXX\r\n0\r\n\r\n")
+        self.assertEqual(self.status(raw), 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,15 @@
+"""
+识别文本评估 - 识别结果与真实文本的相似度
+
+基准测试（bench.modes / bench.suite / bench.profiles）与 INT8 模型生成脚本
+（quantize_models.py）共用，保证量化评估与基准报告的准确率口径一致。
+"""
+from difflib import SequenceMatcher
+from typing import Iterable
+
+
+def similarity(texts: Iterable[str], expected: Iterable[str]) -> float:
+    """识别文本与真实文本的字符相似度（忽略空白，0-1）"""
+    a = "".join("".join(texts).split())
+    b = "".join("".join(expected).split())
+    return SequenceMatcher(None, a, b).ratio()
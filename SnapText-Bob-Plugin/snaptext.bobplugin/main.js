@@ -46,20 +46,22 @@ function ocr(query, completion) {
         url: url,
         timeout: timeout,
         header: {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            // 服务端据此丢弃已超时的排队请求，不再为放弃等待的请求做识别
+            'X-Request-Timeout': String(timeout / 1000)
         },
         body: {
             image: base64Image
         },
         handler: function (resp) {
-            // 检查响应
-            if (resp.error) {
+            const data = resp.data;
+
+            // 检查响应（服务繁忙返回 429 / 503 时带有 error 说明，优先显示）
+            if (resp.error && !(data && data.error)) {
                 handleError(resp.error, completion);
                 return;
             }
 
-            const data = resp.data;
-
             // 检查错误
             if (data.error) {
                 completion({
@@ -145,7 +147,7 @@ function pluginValidate(completion) {
         url: url,
         timeout: 5000,
         handler: function (resp) {
-            if (resp.error || !resp.data) {
+            if (!resp.data || (resp.error && !resp.data.status)) {
                 completion({
                     result: false,
                     reason: '无法连接到本地 OCR 服务，请确保 Local OCR 应用正在运行'
@@ -157,6 +159,12 @@ function pluginValidate(completion) {
                 completion({
                     result: true
                 });
+            } else if (resp.data.status === 'starting') {
+                // 服务刚启动，模型仍在后台加载（/health 返回 503）
+                completion({
+                    result: false,
+                    reason: 'OCR 模型正在加载，请稍候再试'
+                });
             } else {
                 completion({
                     result: false,
@@ -1,6 +1,7 @@
 # -*- mode: python ; coding: utf-8 -*-
 from PyInstaller.utils.hooks import collect_data_files
 
+# resources/models/int8 为 quantize_models.py 生成的 INT8 模型（release.sh 打包前生成）
 datas = [('LocalOCR/resources', 'resources')]
 datas += collect_data_files('rapidocr_onnxruntime')
 
@@ -37,6 +37,12 @@ sed -i '' "s/SnapText-Bob-Plugin_v.*.bobplugin.zip/SnapText-Bob-Plugin_v$VERSION
 echo "✅ Updated version numbers to $VERSION"
 
 # 2. Build App
+# INT8 模型（model_profile = int8）不入库，打包前按需生成到 LocalOCR/resources/models/int8
+if [ ! -f LocalOCR/resources/models/int8/manifest.json ]; then
+    echo "🧮 Generating INT8 models..."
+    (cd LocalOCR && python3 quantize_models.py)
+fi
+
 echo "🔨 Building SnapText.app..."
 python3 -m PyInstaller --clean --noconfirm SnapText.spec
 